@@ -0,0 +1,80 @@
+# analytics.py
+"""
+AI助手的分析上下文：对一个筛选状态一次性算出所有回答需要的聚合结果
+
+- 一次遍历筛选后的行：总体统计、各区域和各装修类型的平均单价
+- 推荐房源沿预先排好序的评分索引查找 (见 ranking_index.py)，找够 k 行即停止
+- 按 (数据版本, 筛选条件) 缓存，同一筛选状态下的各个问题都直接使用缓存的结果
+- 上下文只保留按位压缩的筛选结果 (每行 1 bit)，不引用数据快照：
+  缓存的上下文不会让重新加载前的旧快照继续占用内存，用到行数据时由调用方传入快照
+"""
+import numpy as np
+
+from ranking_index import DEFAULT_SCORING
+from result_cache import ResultCache, make_filter_key
+
+# 推荐房源的数量
+DEFAULT_TOP_K = 3
+RECOMMENDATION_COLUMNS = ['district', 'layout', 'area', 'price_per_sqm']
+
+_contexts = ResultCache(maxsize=128, ttl=600)
+
+
+def _group_means(codes, prices, labels):
+    # pandas 在第一次构建上下文时才导入，仪表盘启动时不导入
+    import pandas as pd
+
+    counts = np.bincount(codes, minlength=len(labels))
+    sums = np.bincount(codes, weights=prices, minlength=len(labels))
+    observed = counts > 0
+    return pd.Series(sums[observed] / counts[observed], index=pd.Index(np.asarray(labels, dtype=object)[observed]),
+                     name='price_per_sqm')
+
+
+class AnalyticsContext:
+    """
+    一个筛选状态下的聚合结果
+    """
+
+    def __init__(self, snapshot, selected_districts, selected_decorations, area_range, price_range):
+        cube = snapshot.data_cube
+        mask = snapshot.filter_index.mask(selected_districts, selected_decorations, area_range, price_range)
+        self.version = snapshot.version
+        self._bitmap = np.packbits(mask)
+        self._recommendations = {}
+        positions = np.flatnonzero(mask)
+        prices = cube.price_values[positions]
+        self.count = len(positions)
+
+        if self.count:
+            self.mean = float(prices.mean())
+            self.median = float(np.median(prices))
+            self.min = float(prices.min())
+            self.max = float(prices.max())
+        else:
+            self.mean = self.median = self.min = self.max = np.nan
+
+        self.district_means = _group_means(cube.row_district[positions], prices, cube.districts)
+        self.district_means.index.name = 'district'
+        self.decoration_means = _group_means(cube.row_decoration[positions], prices, cube.decorations)
+        self.decoration_means.index.name = 'decoration'
+
+    def recommend(self, snapshot, k=DEFAULT_TOP_K, scoring=DEFAULT_SCORING):
+        """
+        按评分推荐的前 k 套房源，结果按 (k, 评分) 保留；snapshot 须是构建上下文时的数据版本
+        """
+        if snapshot.version != self.version:
+            raise ValueError(f"数据版本不一致: 上下文为 {self.version}，快照为 {snapshot.version}")
+        if (k, scoring) not in self._recommendations:
+            rows = snapshot.ranking_index.top_k(self._bitmap, k, scoring)
+            self._recommendations[(k, scoring)] = snapshot.df.iloc[rows][RECOMMENDATION_COLUMNS]
+        return self._recommendations[(k, scoring)]
+
+
+def get_context(snapshot, selected_districts, selected_decorations, area_range, price_range):
+    """
+    返回筛选状态对应的分析上下文，优先使用缓存
+    """
+    key = (snapshot.version,) + make_filter_key(selected_districts, selected_decorations, area_range, price_range)
+    return _contexts.get_or_compute(
+        key, lambda: AnalyticsContext(snapshot, selected_districts, selected_decorations, area_range, price_range))
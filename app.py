@@ -1,23 +1,81 @@
 # app.py
+import time
+
+_boot_start = time.perf_counter()
+
 import dash
-from dash import dcc, html, Input, Output, dash_table
-import plotly.express as px
-import pandas as pd
+from dash import dcc, html, Input, Output, ALL, dash_table
 import numpy as np
 import json
 import re
+import uuid
 from datetime import datetime
+from table_paging import query_table_page
+from result_cache import ResultCache, make_filter_key
+from data_io import cleaned_data_path, load_metadata
+from data_store import add_reload_listener, get_snapshot, reload_interval
+from metrics import instrument, span
+from figure_patch import FigureParts
+from analytics import DEFAULT_TOP_K, get_context
+from ranking_index import DEFAULT_SCORING, SCORING_FUNCTIONS
+from request_coalescing import RequestCoalescer
+from assistant_jobs import DONE, FAILED, JOB_TTL, PENDING, UNKNOWN, JobQueue, QueueFull
+import metrics
+
+# 仪表盘启动耗时目标 (秒)：启动时只读取元数据，数据集在第一次回调时才加载
+BOOT_TIME_TARGET = 1.5
+
+# 布局初始的下拉选项和滑块范围来自预先计算好的元数据文件，无需在启动时读取数据；
+# 数据热加载后由 sync_data_version 回调按新快照更新
+DATA_PATH = cleaned_data_path()
+metadata = load_metadata(DATA_PATH)
+
+# 图表与统计结果缓存：按数据版本和规范化后的筛选条件命中，旧版本的结果按LRU淘汰
+# 缓存的图表已拆分为结构和数据数组 (见 figure_patch.py)，命中后可直接生成增量更新
+figure_cache = ResultCache(maxsize=64, ttl=600)
+
+# 由回调更新的图表，浏览器端各图表的结构签名保存在 figure-signatures 中
+FIGURE_IDS = ['price-by-district', 'scatter-plot', 'price-distribution']
 
-# 加载清洗后的数据
-df = pd.read_csv('data/chengdu_housing_cleaned.csv')
+# 较重的回调 (图表、数据表) 按会话合并连续请求，并限制同时执行的数量
+coalescer = RequestCoalescer()
+
+# AI助手的分析在后台线程池中执行 (见 assistant_jobs.py)，未及时完成的结果由浏览器轮询
+assistant_jobs = JobQueue()
+AI_POLL_INTERVAL_MS = 500
 
 # 初始化Dash应用
 app = dash.Dash(__name__)
 server = app.server  # 用于部署
+# 回调耗时统计和 /metrics 路由 (HOUSING_METRICS=1 时开启)
+metrics.init_app(server)
+metrics.registry.add_gauge('housing_figure_cache_hits_total', 'Figure cache hits', lambda: figure_cache.hits,
+                           'counter')
+metrics.registry.add_gauge('housing_figure_cache_misses_total', 'Figure cache misses', lambda: figure_cache.misses,
+                           'counter')
+metrics.registry.add_gauge('housing_superseded_requests_total', 'Callback requests dropped as superseded',
+                           lambda: coalescer.superseded, 'counter')
+metrics.registry.add_gauge('housing_assistant_jobs_pending', 'Assistant analyses queued or running',
+                           lambda: assistant_jobs.pending)
+metrics.registry.add_gauge('housing_assistant_jobs_rejected_total', 'Assistant analyses rejected as busy',
+                           lambda: assistant_jobs.rejected, 'counter')
 
 # 获取唯一值用于下拉菜单
-districts = sorted(df['district'].unique())
-decorations = sorted(df['decoration'].unique())
+districts = metadata['district']
+decorations = metadata['decoration']
+area_min, area_max = metadata['area_min'], metadata['area_max']
+price_min, price_max = metadata['price_per_sqm_min'], metadata['price_per_sqm_max']
+
+# 数据表展示的列
+table_columns = [i for i in metadata['columns'] if i not in ['floor_ratio', 'current_floor', 'total_floors']]
+
+
+def area_marks(low, high):
+    return {int(i): str(int(i)) for i in np.linspace(low, high, 5)}
+
+
+def price_marks(low, high):
+    return {int(i): f"{int(i // 1000)}k" for i in np.linspace(low, high, 5)}
 
 # 自定义CSS样式
 app.index_string = '''
@@ -442,6 +500,16 @@ app.index_string = '''
 
 # 应用布局
 app.layout = html.Div(className='main-container', children=[
+    # 当前页面使用的数据版本，定期与服务端比对，数据热加载后更新筛选控件
+    dcc.Store(id='data-version'),
+    dcc.Store(id='figure-signatures', data={}),
+    # 页面会话标识，用于合并同一页面的连续请求
+    dcc.Store(id='session-id'),
+    dcc.Interval(id='data-version-interval', interval=reload_interval() * 1000, disabled=reload_interval() <= 0),
+    # 等待中的AI助手后台任务，有任务时轮询结果
+    dcc.Store(id='ai-pending-jobs', data=[]),
+    dcc.Interval(id='ai-job-interval', interval=AI_POLL_INTERVAL_MS, disabled=True),
+
     html.Div(className='header', children=[
         html.H1("成都市二手房房价数据分析与可视化", style={'margin': '0', 'fontSize': '2.5em', 'textShadow': '2px 2px 4px rgba(0,0,0,0.3)'}),
         html.P("探索成都各区域房价趋势与分布", style={'margin': '10px 0 0 0', 'fontSize': '1.2em', 'opacity': '0.9'})
@@ -482,11 +550,11 @@ app.layout = html.Div(className='main-container', children=[
                         html.Label("面积范围 (平米):", className='filter-label'),
                         dcc.RangeSlider(
                             id='area-slider',
-                            min=df['area'].min(),
-                            max=df['area'].max(),
+                            min=area_min,
+                            max=area_max,
                             step=10,
-                            value=[df['area'].min(), df['area'].max()],
-                            marks={int(i): str(int(i)) for i in np.linspace(df['area'].min(), df['area'].max(), 5)},
+                            value=[area_min, area_max],
+                            marks=area_marks(area_min, area_max),
                             tooltip={'placement': 'bottom', 'always_visible': True}
                         )
                     ]),
@@ -496,12 +564,11 @@ app.layout = html.Div(className='main-container', children=[
                         html.Label("单价范围 (元/平米):", className='filter-label'),
                         dcc.RangeSlider(
                             id='price-slider',
-                            min=df['price_per_sqm'].min(),
-                            max=df['price_per_sqm'].max(),
+                            min=price_min,
+                            max=price_max,
                             step=1000,
-                            value=[df['price_per_sqm'].min(), df['price_per_sqm'].max()],
-                            marks={int(i): f"{int(i // 1000)}k" for i in
-                                   np.linspace(df['price_per_sqm'].min(), df['price_per_sqm'].max(), 5)},
+                            value=[price_min, price_max],
+                            marks=price_marks(price_min, price_max),
                             tooltip={'placement': 'bottom', 'always_visible': True}
                         )
                     ])
@@ -547,7 +614,25 @@ app.layout = html.Div(className='main-container', children=[
             # 右边 - 统计信息面板
             html.Div(className='stats-panel', children=[
                 html.H4("实时统计", style={'margin': '0 0 15px 0', 'fontSize': '1.4em', 'textShadow': '1px 1px 2px rgba(0,0,0,0.3)'}),
-                html.Div(className='stats-content', id='summary-stats')
+                # 统计项的结构固定，回调只更新其中的数值文本
+                html.Div(className='stats-content', id='summary-stats', children=[
+                    html.Div(className='stats-item', children=[
+                        html.H4("🏠 房源总数", style={'margin': '0', 'fontSize': '1.1em'}),
+                        html.P(id='stat-count', style={'margin': '5px 0', 'fontSize': '1.3em', 'fontWeight': 'bold'})
+                    ]),
+                    html.Div(className='stats-item', children=[
+                        html.H4("💰 平均单价", style={'margin': '0', 'fontSize': '1.1em'}),
+                        html.P(id='stat-mean', style={'margin': '5px 0', 'fontSize': '1.1em'})
+                    ]),
+                    html.Div(className='stats-item', children=[
+                        html.H4("📈 单价中位数", style={'margin': '0', 'fontSize': '1.1em'}),
+                        html.P(id='stat-median', style={'margin': '5px 0', 'fontSize': '1.1em'})
+                    ]),
+                    html.Div(className='stats-item', children=[
+                        html.H4("📊 价格范围", style={'margin': '0', 'fontSize': '1.1em'}),
+                        html.P(id='stat-range', style={'margin': '5px 0', 'fontSize': '1em'})
+                    ])
+                ])
             ])
         ]),
 
@@ -572,9 +657,16 @@ app.layout = html.Div(className='main-container', children=[
         html.H3("筛选后的房源数据", style={'textAlign': 'center', 'color': '#333', 'marginBottom': '20px'}),
         dash_table.DataTable(
             id='house-table',
-            columns=[{"name": i, "id": i} for i in df.columns if
-                     i not in ['floor_ratio', 'current_floor', 'total_floors']],
+            columns=[{"name": i, "id": i} for i in table_columns],
+            # 分页、排序和列筛选都在服务端完成，只传输当前页
+            page_current=0,
             page_size=10,
+            page_action='custom',
+            sort_action='custom',
+            sort_mode='multi',
+            sort_by=[],
+            filter_action='custom',
+            filter_query='',
             style_table={'overflowX': 'auto', 'borderRadius': '10px'},
             style_cell={
                 'height': 'auto',
@@ -603,55 +695,155 @@ app.layout = html.Div(className='main-container', children=[
     ])
 ])
 
-# 回调函数：更新图表和数据
+# 筛选函数：位图按位与 + 两次二分查找，供各回调共享
+# 回调开始时取得一次快照并传入，保证整个回调使用同一版本的数据
+def filter_data(selected_districts, selected_decorations, area_range, price_range, snapshot=None):
+    snapshot = snapshot or get_snapshot()
+    return snapshot.filter(selected_districts, selected_decorations, area_range, price_range)
+
+# 回调函数：数据版本变化时更新下拉选项和滑块范围，保留仍然有效的选择
+@app.callback(
+    [Output('data-version', 'data'),
+     Output('district-dropdown', 'options'),
+     Output('district-dropdown', 'value'),
+     Output('decoration-dropdown', 'options'),
+     Output('decoration-dropdown', 'value'),
+     Output('area-slider', 'min'),
+     Output('area-slider', 'max'),
+     Output('area-slider', 'marks'),
+     Output('area-slider', 'value'),
+     Output('price-slider', 'min'),
+     Output('price-slider', 'max'),
+     Output('price-slider', 'marks'),
+     Output('price-slider', 'value'),
+     Output('session-id', 'data')],
+    Input('data-version-interval', 'n_intervals'),
+    [dash.dependencies.State('data-version', 'data'),
+     dash.dependencies.State('session-id', 'data'),
+     dash.dependencies.State('district-dropdown', 'value'),
+     dash.dependencies.State('decoration-dropdown', 'value'),
+     dash.dependencies.State('area-slider', 'value'),
+     dash.dependencies.State('price-slider', 'value')]
+)
+def sync_data_version(n_intervals, page_version, session_id, selected_districts, selected_decorations, area_range,
+                      price_range):
+    snapshot = get_snapshot()
+    if snapshot.version == page_version:
+        raise dash.exceptions.PreventUpdate
+    meta = snapshot.metadata
+    new_area = [meta['area_min'], meta['area_max']]
+    new_price = [meta['price_per_sqm_min'], meta['price_per_sqm_max']]
+
+    if page_version is None:
+        # 页面首次加载：使用新数据的全部选项和完整范围
+        district_value, decoration_value = meta['district'], meta['decoration']
+        area_value, price_value = new_area, new_price
+    else:
+        district_value = [d for d in selected_districts or [] if d in meta['district']]
+        decoration_value = [d for d in selected_decorations or [] if d in meta['decoration']]
+        area_value = [min(max(v, new_area[0]), new_area[1]) for v in area_range]
+        price_value = [min(max(v, new_price[0]), new_price[1]) for v in price_range]
+
+    return (snapshot.version,
+            [{'label': i, 'value': i} for i in meta['district']], district_value,
+            [{'label': i, 'value': i} for i in meta['decoration']], decoration_value,
+            new_area[0], new_area[1], area_marks(*new_area), area_value,
+            new_price[0], new_price[1], price_marks(*new_price), price_value,
+            session_id or uuid.uuid4().hex)
+
+# 回调函数：更新统计数值
+# 只依赖预聚合立方体，开销很小，与较重的图表回调分开，筛选变化后最先返回
+@app.callback(
+    [Output('stat-count', 'children'),
+     Output('stat-mean', 'children'),
+     Output('stat-median', 'children'),
+     Output('stat-range', 'children')],
+    [Input('district-dropdown', 'value'),
+     Input('decoration-dropdown', 'value'),
+     Input('area-slider', 'value'),
+     Input('price-slider', 'value')]
+)
+@instrument('update_summary')
+def update_summary(selected_districts, selected_decorations, area_range, price_range):
+    cube_result = get_snapshot().data_cube.query(selected_districts, selected_decorations, area_range, price_range)
+    return summary_values(cube_result)
+
+def summary_values(cube_result):
+    # 统计面板中的数值文本：房源总数、平均单价、单价中位数、价格范围
+    return [
+        f"{cube_result.count} 套",
+        f"{cube_result.mean:.2f} 元/平米",
+        f"{cube_result.median:.2f} 元/平米",
+        f"{cube_result.min:.0f} - {cube_result.max:.0f} 元/平米",
+    ]
+
+# 回调函数：更新图表
+# 只回传变化的部分：图表结构不变时只发送数据数组
+# 缓存未命中时经过请求合并：拖动滑块产生的连续请求只计算最新的一次
 @app.callback(
     [Output('price-by-district', 'figure'),
      Output('scatter-plot', 'figure'),
      Output('price-distribution', 'figure'),
-     Output('summary-stats', 'children'),
-     Output('house-table', 'data')],
+     Output('figure-signatures', 'data')],
     [Input('district-dropdown', 'value'),
      Input('decoration-dropdown', 'value'),
      Input('area-slider', 'value'),
-     Input('price-slider', 'value')]
+     Input('price-slider', 'value')],
+    [dash.dependencies.State('figure-signatures', 'data'),
+     dash.dependencies.State('session-id', 'data')]
 )
-def update_figures(selected_districts, selected_decorations, area_range, price_range):
+@instrument('update_figures')
+def update_figures(selected_districts, selected_decorations, area_range, price_range, signatures, session_id):
+    snapshot = get_snapshot()
+    key = (snapshot.version,) + make_filter_key(selected_districts, selected_decorations, area_range, price_range)
+    # 每个请求 (包括命中缓存的) 都登记为最新请求，进行中的旧计算据此放弃
+    token = coalescer.begin(session_id, 'figures') if session_id is not None else None
+    cached = figure_cache.get(key)
+    if cached is None:
+        with coalescer.slot(session_id, 'figures', token):
+            cached = prepare_outputs(
+                compute_figures(selected_districts, selected_decorations, area_range, price_range, snapshot))
+        figure_cache.set(key, cached)
+        # 计算期间已有更新的请求时，结果只写入缓存，不再回传
+        coalescer.check(session_id, 'figures', token)
+    figures, _ = cached
+
+    signatures = signatures or {}
+    outputs = [parts.output(signatures.get(figure_id)) for figure_id, parts in zip(FIGURE_IDS, figures)]
+    new_signatures = {figure_id: parts.signature for figure_id, parts in zip(FIGURE_IDS, figures)}
+    return (*outputs, new_signatures)
+
+def prepare_outputs(computed):
+    # 拆分图表结构和数据数组，结果写入缓存
+    *figures, stats_values = computed
+    return [FigureParts(fig) for fig in figures], stats_values
+
+def compute_figures(selected_districts, selected_decorations, area_range, price_range, snapshot=None):
+    snapshot = snapshot or get_snapshot()
+
     # 应用筛选条件
-    filtered_df = df[
-        (df['district'].isin(selected_districts)) &
-        (df['decoration'].isin(selected_decorations)) &
-        (df['area'] >= area_range[0]) & (df['area'] <= area_range[1]) &
-        (df['price_per_sqm'] >= price_range[0]) & (df['price_per_sqm'] <= price_range[1])
-        ]
-
-    # 计算一些基本统计量
-    avg_price = filtered_df['price_per_sqm'].mean()
-    median_price = filtered_df['price_per_sqm'].median()
-    total_houses = len(filtered_df)
-    min_price = filtered_df['price_per_sqm'].min()
-    max_price = filtered_df['price_per_sqm'].max()
-
-    stats_text = html.Div(className='stats-content', children=[
-        html.Div(className='stats-item', children=[
-            html.H4("🏠 房源总数", style={'margin': '0', 'fontSize': '1.1em'}),
-            html.P(f"{total_houses} 套", style={'margin': '5px 0', 'fontSize': '1.3em', 'fontWeight': 'bold'})
-        ]),
-        html.Div(className='stats-item', children=[
-            html.H4("💰 平均单价", style={'margin': '0', 'fontSize': '1.1em'}),
-            html.P(f"{avg_price:.2f} 元/平米", style={'margin': '5px 0', 'fontSize': '1.1em'})
-        ]),
-        html.Div(className='stats-item', children=[
-            html.H4("📈 单价中位数", style={'margin': '0', 'fontSize': '1.1em'}),
-            html.P(f"{median_price:.2f} 元/平米", style={'margin': '5px 0', 'fontSize': '1.1em'})
-        ]),
-        html.Div(className='stats-item', children=[
-            html.H4("📊 价格范围", style={'margin': '0', 'fontSize': '1.1em'}),
-            html.P(f"{min_price:.0f} - {max_price:.0f} 元/平米", style={'margin': '5px 0', 'fontSize': '1em'})
-        ])
-    ])
+    with span('update_figures', 'filter'):
+        filtered_df = filter_data(selected_districts, selected_decorations, area_range, price_range, snapshot)
+
+    # 计算一些基本统计量 (由预聚合立方体得出，与行数无关)
+    with span('update_figures', 'aggregation'):
+        cube_result = snapshot.data_cube.query(selected_districts, selected_decorations, area_range, price_range)
+    stats_values = summary_values(cube_result)
+
+    with span('update_figures', 'figures'):
+        fig1, fig2, fig3 = build_figures(filtered_df, cube_result)
+
+    return fig1, fig2, fig3, stats_values
+
+def build_figures(filtered_df, cube_result):
+    # 绘图库较重，在第一次需要绘图时才导入
+    import plotly.express as px
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    from scatter_render import build_area_price_scatter
 
     # 更新各区域平均单价柱状图
-    district_avg = filtered_df.groupby('district')['price_per_sqm'].mean().sort_values().reset_index()
+    district_avg = cube_result.district_means().sort_values().reset_index()
     fig1 = px.bar(district_avg, x='price_per_sqm', y='district', orientation='h',
                   title='各区域平均单价',
                   labels={'price_per_sqm': '平均单价 (元/平米)', 'district': '区域'},
@@ -659,28 +851,116 @@ def update_figures(selected_districts, selected_decorations, area_range, price_r
                   color_continuous_scale='Viridis')
     fig1.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
 
-    # 更新散点图
-    fig2 = px.scatter(filtered_df, x='area', y='price_per_sqm', color='district',
-                      hover_data=['layout', 'decoration', 'year_built'],
-                      title='面积与单价关系',
-                      labels={'area': '面积 (平米)', 'price_per_sqm': '单价 (元/平米)', 'district': '区域'})
-    fig2.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+    # 更新散点图 (点数多时自动切换为 WebGL 或密度热力图)
+    fig2 = build_area_price_scatter(filtered_df)
+
+    # 更新价格分布图：直方图来自立方体的单价分箱计数，箱线图使用分位数草图
+    edges, counts = cube_result.price_histogram(max_bins=30)
+    q1, q3 = cube_result.quantile([0.25, 0.75]) if cube_result.count else (None, None)
+    # 须线为 1.5 倍四分位距，不超出实际的最小/最大值
+    lower_fence = max(q1 - 1.5 * (q3 - q1), cube_result.min) if cube_result.count else None
+    upper_fence = min(q3 + 1.5 * (q3 - q1), cube_result.max) if cube_result.count else None
+    fig3 = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.2, 0.8], vertical_spacing=0.02)
+    fig3.add_trace(go.Box(q1=[q1], median=[cube_result.median], q3=[q3],
+                          lowerfence=[lower_fence], upperfence=[upper_fence],
+                          y=['单价'], orientation='h', name='单价', marker_color='#667eea',
+                          showlegend=False), row=1, col=1)
+    fig3.add_trace(go.Bar(x=(edges[:-1] + edges[1:]) / 2, y=counts, width=np.diff(edges),
+                          marker_color='#667eea', name='房源数量', showlegend=False,
+                          hovertemplate='单价 (元/平米): %{x:.0f}<br>房源数量: %{y}<extra></extra>'), row=2, col=1)
+    fig3.update_xaxes(title_text='单价 (元/平米)', row=2, col=1)
+    fig3.update_yaxes(title_text='房源数量', row=2, col=1)
+    fig3.update_yaxes(showticklabels=False, row=1, col=1)
+    fig3.update_layout(title='单价分布', bargap=0, plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
 
-    # 更新价格分布图
-    fig3 = px.histogram(filtered_df, x='price_per_sqm', nbins=30, marginal='box',
-                        title='单价分布',
-                        labels={'price_per_sqm': '单价 (元/平米)', 'count': '房源数量'},
-                        color_discrete_sequence=['#667eea'])
-    fig3.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+    return fig1, fig2, fig3
 
-    # 准备表格数据
-    table_data = filtered_df.to_dict('records')
+# 新数据快照替换之前，在后台线程中预先计算完整筛选范围 (页面默认状态) 的图表
+def warm_figure_cache(snapshot):
+    meta = snapshot.metadata
+    districts_all, decorations_all = meta['district'], meta['decoration']
+    area_all = [meta['area_min'], meta['area_max']]
+    price_all = [meta['price_per_sqm_min'], meta['price_per_sqm_max']]
+    key = (snapshot.version,) + make_filter_key(districts_all, decorations_all, area_all, price_all)
+    figure_cache.set(key, prepare_outputs(compute_figures(districts_all, decorations_all, area_all, price_all,
+                                                          snapshot)))
+
+add_reload_listener(warm_figure_cache)
+
+# 回调函数：密度热力图模式下，缩放后按新的可视范围重新分箱
+@app.callback(
+    [Output('scatter-plot', 'figure', allow_duplicate=True),
+     Output('figure-signatures', 'data', allow_duplicate=True)],
+    Input('scatter-plot', 'relayoutData'),
+    [dash.dependencies.State('district-dropdown', 'value'),
+     dash.dependencies.State('decoration-dropdown', 'value'),
+     dash.dependencies.State('area-slider', 'value'),
+     dash.dependencies.State('price-slider', 'value')],
+    prevent_initial_call=True
+)
+@instrument('rebin_scatter')
+def rebin_scatter(relayout_data, selected_districts, selected_decorations, area_range, price_range):
+    zoom_changed = any(key.startswith(('xaxis.', 'yaxis.')) for key in (relayout_data or {}))
+    if not zoom_changed:
+        raise dash.exceptions.PreventUpdate
+
+    from scatter_render import build_area_price_scatter, parse_relayout_ranges, scatter_render_mode
+
+    filtered_df = filter_data(selected_districts, selected_decorations, area_range, price_range)
+    # 原始点模式下缩放由浏览器完成，无需回传
+    if scatter_render_mode(len(filtered_df)) != 'density':
+        raise dash.exceptions.PreventUpdate
+    x_range, y_range = parse_relayout_ranges(relayout_data)
+    parts = FigureParts(build_area_price_scatter(filtered_df, x_range, y_range))
+    # 同时更新浏览器端记录的散点图签名，之后的筛选变化按新结构判断能否增量更新
+    signatures = dash.Patch()
+    signatures['scatter-plot'] = parts.signature
+    return parts.figure, signatures
+
+# 回调函数：服务端分页的数据表
+# 触发后回到第一页的输入
+TABLE_RESET_PAGE_INPUTS = {'district-dropdown.value', 'decoration-dropdown.value', 'area-slider.value',
+                           'price-slider.value', 'house-table.filter_query'}
+
+@app.callback(
+    [Output('house-table', 'data'),
+     Output('house-table', 'page_count'),
+     Output('house-table', 'page_current')],
+    [Input('district-dropdown', 'value'),
+     Input('decoration-dropdown', 'value'),
+     Input('area-slider', 'value'),
+     Input('price-slider', 'value'),
+     Input('house-table', 'page_current'),
+     Input('house-table', 'page_size'),
+     Input('house-table', 'sort_by'),
+     Input('house-table', 'filter_query')],
+    dash.dependencies.State('session-id', 'data')
+)
+@instrument('update_table')
+def update_table(selected_districts, selected_decorations, area_range, price_range,
+                 page_current, page_size, sort_by, filter_query, session_id):
+    # 筛选条件变化时回到第一页；其余情况下页码由服务端截断，实际页码回传给表格
+    triggered = {item['prop_id'] for item in dash.callback_context.triggered}
+    if triggered & TABLE_RESET_PAGE_INPUTS:
+        page_current = 0
+    with coalescer.slot(session_id, 'table'):
+        with span('update_table', 'filter'):
+            filtered_df = filter_data(selected_districts, selected_decorations, area_range, price_range)
+        with span('update_table', 'page'):
+            return query_table_page(filtered_df, page_current, page_size, sort_by, filter_query, table_columns)
 
-    return fig1, fig2, fig3, stats_text, table_data
+# 快捷问题按钮对应的问题
+SUGGESTION_QUESTIONS = {
+    'suggestion-1': '哪个区域房价最贵？',
+    'suggestion-2': '装修情况对价格影响大吗？',
+    'suggestion-3': '推荐性价比高的房源',
+    'suggestion-4': '分析当前筛选结果',
+}
 
 # AI助手回调函数
 @app.callback(
-    Output('ai-chat-messages', 'children'),
+    [Output('ai-chat-messages', 'children'),
+     Output('ai-pending-jobs', 'data')],
     [Input('ai-send-btn', 'n_clicks'),
      Input('ai-input', 'n_submit'),
      Input('suggestion-1', 'n_clicks'),
@@ -691,148 +971,230 @@ def update_figures(selected_districts, selected_decorations, area_range, price_r
      dash.dependencies.State('district-dropdown', 'value'),
      dash.dependencies.State('decoration-dropdown', 'value'),
      dash.dependencies.State('area-slider', 'value'),
-     dash.dependencies.State('price-slider', 'value'),
-     dash.dependencies.State('ai-chat-messages', 'children')]
+     dash.dependencies.State('price-slider', 'value')]
 )
+@instrument('update_ai_chat')
 def update_ai_chat(send_clicks, submit_clicks, sug1_clicks, sug2_clicks, sug3_clicks, sug4_clicks,
-                   user_input, selected_districts, selected_decorations, area_range, price_range, current_messages):
+                   user_input, selected_districts, selected_decorations, area_range, price_range):
+    # 聊天记录只追加：用 Patch 回传新消息，历史消息不在浏览器和服务端之间往返
     ctx = dash.callback_context
     if not ctx.triggered:
-        return current_messages
+        raise dash.exceptions.PreventUpdate
     
     trigger_id = ctx.triggered[0]['prop_id'].split('.')[0]
-    
-    # 获取当前筛选后的数据
-    filtered_df = df[
-        (df['district'].isin(selected_districts)) &
-        (df['decoration'].isin(selected_decorations)) &
-        (df['area'] >= area_range[0]) & (df['area'] <= area_range[1]) &
-        (df['price_per_sqm'] >= price_range[0]) & (df['price_per_sqm'] <= price_range[1])
-    ]
+    filters = (selected_districts, selected_decorations, area_range, price_range)
     
     # 处理用户输入
     if trigger_id in ['ai-send-btn', 'ai-input'] and user_input:
-        user_message = html.Div(className='chat-message user-message', children=[
+        new_messages = [html.Div(className='chat-message user-message', children=[
             html.P(user_input)
-        ])
-        
-        # 生成AI回复
-        ai_response = generate_ai_response(user_input, filtered_df)
-        ai_message = html.Div(className='chat-message ai-message', children=[
-            html.P(ai_response)
-        ])
-        
-        return current_messages + [user_message, ai_message]
-    
+        ])]
+        job = (answer_question, get_snapshot(), user_input, filters)
     # 处理快捷问题
-    elif trigger_id == 'suggestion-1':
-        return current_messages + [generate_suggestion_response('哪个区域房价最贵？', filtered_df)]
-    elif trigger_id == 'suggestion-2':
-        return current_messages + [generate_suggestion_response('装修情况对价格影响大吗？', filtered_df)]
-    elif trigger_id == 'suggestion-3':
-        return current_messages + [generate_suggestion_response('推荐性价比高的房源', filtered_df)]
-    elif trigger_id == 'suggestion-4':
-        return current_messages + [generate_suggestion_response('分析当前筛选结果', filtered_df)]
+    elif trigger_id in SUGGESTION_QUESTIONS:
+        new_messages = []
+        job = (answer_suggestion, get_snapshot(), SUGGESTION_QUESTIONS[trigger_id], filters)
+    else:
+        raise dash.exceptions.PreventUpdate
+    
+    # 分析在后台任务中执行，请求线程最多等待一小段时间；
+    # 未完成时先显示占位消息，结果由 poll_ai_jobs 轮询后回填
+    pending_jobs = dash.no_update
+    try:
+        job_id = assistant_jobs.submit(*job)
+    except QueueFull:
+        new_messages.append(ai_message("助手正忙，请稍后再试。"))
+    else:
+        with span('update_ai_chat', 'wait'):
+            status, result = assistant_jobs.wait(job_id)
+        if status == PENDING:
+            new_messages.append(html.Div(className='chat-message ai-message', id={'type': 'ai-reply', 'job': job_id},
+                                         children=[html.P("正在分析，请稍候…")]))
+            pending_jobs = dash.Patch()
+            pending_jobs.append({'job': job_id, 'submitted': time.time()})
+        else:
+            new_messages.append(job_reply(status, result))
     
-    return current_messages
+    messages = dash.Patch()
+    messages.extend(new_messages)
+    return messages, pending_jobs
+
+# 回填后台任务的结果：只更新已完成任务对应的占位消息
+@app.callback(
+    [Output({'type': 'ai-reply', 'job': ALL}, 'children'),
+     Output('ai-pending-jobs', 'data', allow_duplicate=True)],
+    Input('ai-job-interval', 'n_intervals'),
+    [dash.dependencies.State('ai-pending-jobs', 'data'),
+     dash.dependencies.State({'type': 'ai-reply', 'job': ALL}, 'id')],
+    prevent_initial_call=True
+)
+@instrument('poll_ai_jobs')
+def poll_ai_jobs(n_intervals, pending, reply_ids):
+    resolved = {}
+    finished = dash.Patch()
+    for job in pending or []:
+        status, result = assistant_jobs.poll(job['job'])
+        # 本进程中找不到的任务可能由其他工作进程执行，超过保留时间后才视为失效
+        if status == PENDING or (status == UNKNOWN and time.time() - job['submitted'] < JOB_TTL):
+            continue
+        resolved[job['job']] = job_reply(status, result).children
+        finished.remove(job)
+    if not resolved:
+        raise dash.exceptions.PreventUpdate
+    return [resolved.get(reply_id['job'], dash.no_update) for reply_id in reply_ids], finished
+
+# 没有等待中的任务时停止轮询 (在浏览器中执行，始终与任务列表一致)
+app.clientside_callback(
+    "function(jobs) { return !(jobs && jobs.length); }",
+    Output('ai-job-interval', 'disabled'),
+    Input('ai-pending-jobs', 'data')
+)
+
+def ai_message(text):
+    return html.Div(className='chat-message ai-message', children=[html.P(text)])
+
+def job_reply(status, result):
+    # 后台任务结果对应的回复消息
+    if status == DONE:
+        return result
+    if status == FAILED:
+        print(f"AI助手分析失败: {result}")
+        return ai_message("分析失败，请稍后重试。")
+    return ai_message("分析结果已失效，请重新提问。")
+
+# 后台任务：获取分析上下文并生成回复消息
+def answer_question(snapshot, user_input, filters):
+    # 解析问题的意图和其中的筛选条件 (如 "武侯区 100平以下")，与页面上的筛选条件合并后获取分析上下文
+    with span('update_ai_chat', 'filter'):
+        query = snapshot.intent_matcher.parse(user_input)
+        # 问题中的数值范围与页面上的滑块范围没有交集时直接说明，而不是回复 "没有房源数据"
+        conflicts = query.conflicts(*filters[2:])
+        if conflicts:
+            details = '；'.join(f"问题中的{asked}与当前筛选的{current}没有交集" for asked, current in conflicts)
+            return ai_message(f"{details}，请调整滑块范围或问题中的条件。")
+        analytics = get_context(snapshot, *query.apply(*filters))
+    with span('update_ai_chat', 'analysis'):
+        return ai_message(generate_ai_response(query, analytics, snapshot))
+
+def answer_suggestion(snapshot, question, filters):
+    # 获取当前筛选状态的分析上下文 (同一筛选状态下的各个问题共用缓存的聚合结果)
+    with span('update_ai_chat', 'filter'):
+        analytics = get_context(snapshot, *filters)
+    with span('update_ai_chat', 'analysis'):
+        return generate_suggestion_response(question, analytics, snapshot)
 
 # AI回复生成函数
-def generate_ai_response(user_input, filtered_df):
-    # 简单的关键词匹配回复
-    input_lower = user_input.lower()
-    
-    if any(word in input_lower for word in ['贵', '价格高', '最贵', 'expensive']):
-        return analyze_expensive_districts(filtered_df)
-    elif any(word in input_lower for word in ['便宜', '性价比', '划算', 'cheap']):
-        return analyze_cheap_districts(filtered_df)
-    elif any(word in input_lower for word in ['装修', 'decoration']):
-        return analyze_decoration_impact(filtered_df)
-    elif any(word in input_lower for word in ['推荐', '建议', 'recommend']):
-        return generate_recommendations(filtered_df)
-    elif any(word in input_lower for word in ['趋势', '分析', 'trend']):
-        return analyze_trends(filtered_df)
-    else:
+def generate_ai_response(query, analytics, snapshot):
+    # 按问题意图回复 (意图识别见 intent_matcher.py)；只给出筛选条件时分析筛选结果
+    handler = AI_INTENT_HANDLERS.get(query.intent)
+    total = query.describe_total()
+    if handler is None and (query.has_constraints or total):
+        handler = analyze_current_selection
+    if handler is None:
         return "感谢您的提问！我可以帮您分析成都房价数据。请尝试问我关于房价趋势、区域比较、装修影响或推荐房源等问题。"
+    
+    response = handler(analytics, snapshot)
+    if query.has_constraints:
+        response = f"（按{query.describe()}筛选）" + response
+    if total:
+        # 筛选索引不含总价，说明问题中的总价条件没有生效，而不是把它当作单价
+        response = f"（暂不支持按总价筛选，{total}未作为筛选条件）" + response
+    return response
 
-def generate_suggestion_response(question, filtered_df):
+def generate_suggestion_response(question, analytics, snapshot):
     if question == '哪个区域房价最贵？':
         return html.Div(className='chat-message ai-message', children=[
-            html.P(analyze_expensive_districts(filtered_df))
+            html.P(analyze_expensive_districts(analytics, snapshot))
         ])
     elif question == '装修情况对价格影响大吗？':
         return html.Div(className='chat-message ai-message', children=[
-            html.P(analyze_decoration_impact(filtered_df))
+            html.P(analyze_decoration_impact(analytics, snapshot))
         ])
     elif question == '推荐性价比高的房源':
         return html.Div(className='chat-message ai-message', children=[
-            html.P(generate_recommendations(filtered_df))
+            html.P(generate_recommendations(analytics, snapshot))
         ])
     elif question == '分析当前筛选结果':
         return html.Div(className='chat-message ai-message', children=[
-            html.P(analyze_current_selection(filtered_df))
+            html.P(analyze_current_selection(analytics, snapshot))
         ])
 
-# 具体分析函数
-def analyze_expensive_districts(df):
-    if len(df) == 0:
+# 具体分析函数：参数为当前筛选状态的分析上下文 (见 analytics.py) 和它对应的数据快照
+def analyze_expensive_districts(analytics, snapshot):
+    if analytics.count == 0:
         return "当前筛选条件下没有房源数据。"
     
-    district_avg = df.groupby('district')['price_per_sqm'].mean().sort_values(ascending=False)
+    district_avg = analytics.district_means.sort_values(ascending=False)
     top_district = district_avg.index[0]
     top_price = district_avg.iloc[0]
     
     return f"根据当前数据，{top_district}区域的房价最高，平均单价为{top_price:.2f}元/平米。前五名区域为：{', '.join([f'{d}({p:.0f}元/平米)' for d, p in list(district_avg.head().items())])}"
 
-def analyze_cheap_districts(df):
-    if len(df) == 0:
+def analyze_cheap_districts(analytics, snapshot):
+    if analytics.count == 0:
         return "当前筛选条件下没有房源数据。"
     
-    district_avg = df.groupby('district')['price_per_sqm'].mean().sort_values()
+    district_avg = analytics.district_means.sort_values()
     cheap_district = district_avg.index[0]
     cheap_price = district_avg.iloc[0]
     
     return f"根据当前数据，{cheap_district}区域的房价相对较低，平均单价为{cheap_price:.2f}元/平米。性价比高的区域包括：{', '.join([f'{d}({p:.0f}元/平米)' for d, p in list(district_avg.head().items())])}"
 
-def analyze_decoration_impact(df):
-    if len(df) == 0:
+def analyze_decoration_impact(analytics, snapshot):
+    if analytics.count == 0:
         return "当前筛选条件下没有房源数据。"
     
-    decoration_avg = df.groupby('decoration')['price_per_sqm'].mean().sort_values(ascending=False)
+    decoration_avg = analytics.decoration_means.sort_values(ascending=False)
     impact_text = "装修情况对房价确实有显著影响：\n"
     for deco, price in decoration_avg.items():
         impact_text += f"• {deco}: {price:.2f}元/平米\n"
     
     return impact_text + "\n精装修的房源通常价格较高，而简装修或毛坯房价格相对较低。"
 
-def generate_recommendations(df):
-    if len(df) == 0:
+def generate_recommendations(analytics, snapshot, k=DEFAULT_TOP_K, scoring=DEFAULT_SCORING):
+    if analytics.count == 0:
         return "当前筛选条件下没有房源数据。"
     
-    # 计算性价比（单价/面积）
-    df['value_ratio'] = df['area'] / df['price_per_sqm']
-    recommendations = df.nlargest(3, 'value_ratio')
+    # 沿预先排好序的评分索引 (默认为性价比，即面积/单价) 查找满足筛选条件的前 k 套房源
+    recommendations = analytics.recommend(snapshot, k, scoring)
     
-    rec_text = "根据性价比推荐以下房源：\n"
+    rec_text = f"根据{SCORING_FUNCTIONS[scoring][0]}推荐以下房源：\n"
     for _, row in recommendations.iterrows():
         rec_text += f"• {row['district']}区 {row['layout']} {row['area']}平米，单价{row['price_per_sqm']:.0f}元/平米\n"
     
     return rec_text
 
-def analyze_trends(df):
-    if len(df) == 0:
+def analyze_trends(analytics, snapshot):
+    if analytics.count == 0:
         return "当前筛选条件下没有房源数据。"
     
-    avg_price = df['price_per_sqm'].mean()
-    median_price = df['price_per_sqm'].median()
-    price_range = f"{df['price_per_sqm'].min():.0f}-{df['price_per_sqm'].max():.0f}"
+    avg_price = analytics.mean
+    median_price = analytics.median
+    price_range = f"{analytics.min:.0f}-{analytics.max:.0f}"
     
-    return f"当前筛选条件下的房价分析：\n• 平均单价: {avg_price:.2f}元/平米\n• 单价中位数: {median_price:.2f}元/平米\n• 价格范围: {price_range}元/平米\n• 房源数量: {len(df)}套"
+    return f"当前筛选条件下的房价分析：\n• 平均单价: {avg_price:.2f}元/平米\n• 单价中位数: {median_price:.2f}元/平米\n• 价格范围: {price_range}元/平米\n• 房源数量: {analytics.count}套"
 
-def analyze_current_selection(df):
-    if len(df) == 0:
+def analyze_current_selection(analytics, snapshot):
+    if analytics.count == 0:
         return "当前筛选条件下没有房源数据，请调整筛选条件。"
     
-    return analyze_trends(df) + "\n\n" + generate_recommendations(df)
+    return analyze_trends(analytics, snapshot) + "\n\n" + generate_recommendations(analytics, snapshot)
+
+# 问题意图 (见 intent_matcher.INTENTS) 对应的分析函数
+AI_INTENT_HANDLERS = {
+    'expensive': analyze_expensive_districts,
+    'cheap': analyze_cheap_districts,
+    'decoration': analyze_decoration_impact,
+    'recommend': generate_recommendations,
+    'trend': analyze_trends,
+    'selection': analyze_current_selection,
+}
+
+# 启动耗时：只包含导入和布局构建，数据集在第一次回调时加载
+boot_time = time.perf_counter() - _boot_start
+if boot_time > BOOT_TIME_TARGET:
+    print(f"仪表盘启动耗时 {boot_time:.2f} 秒，超过目标 {BOOT_TIME_TARGET:.2f} 秒")
 
 if __name__ == '__main__':
+    print(f"仪表盘启动耗时 {boot_time:.2f} 秒")
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,101 @@
+# assistant_jobs.py
+"""
+AI助手的后台任务队列：分析在线程池中执行，Dash 请求线程最多等待一小段时间
+
+- 在等待时间内完成的分析直接回传结果，与同步执行相同
+- 未完成时先回传一条 "正在分析" 的占位消息，由浏览器定时轮询，结果就绪后替换占位消息
+- 排队的任务数有上限，超出时直接提示繁忙，请求线程不会因分析任务堆积而被占用
+
+JobQueue 是进程内的任务代理：任务只能由提交它的进程查询。多进程部署时轮询请求可能落到
+其他进程，此时占位消息在任务过期后提示重新提问；需要跨进程共享结果时，可用同样的
+submit/poll 接口接入外部消息队列
+"""
+import itertools
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor, wait as wait_futures
+
+DEFAULT_WORKERS = int(os.environ.get('HOUSING_ASSISTANT_WORKERS', 2))
+# 请求线程等待分析结果的最长时间 (秒)
+DEFAULT_WAIT_SECONDS = float(os.environ.get('HOUSING_ASSISTANT_WAIT_MS', 300)) / 1000
+# 排队和执行中的任务数上限
+MAX_PENDING_JOBS = 64
+# 任务完成后结果保留的时间 (秒)，超时未取走的结果被丢弃
+JOB_TTL = 300
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+UNKNOWN = 'unknown'
+
+
+class QueueFull(RuntimeError):
+    """
+    排队的任务数达到上限
+    """
+
+
+class JobQueue:
+    def __init__(self, workers=DEFAULT_WORKERS, max_pending=MAX_PENDING_JOBS, ttl=JOB_TTL):
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='assistant-job')
+        self._lock = threading.Lock()
+        # 任务号 -> (Future, 提交时间)
+        self._jobs = {}
+        self._ids = itertools.count()
+        self.submitted = 0
+        self.rejected = 0
+
+    def submit(self, func, *args, **kwargs):
+        """
+        提交任务并返回任务号；排队的任务数达到上限时抛出 QueueFull
+        """
+        with self._lock:
+            self._expire()
+            if sum(not future.done() for future, _ in self._jobs.values()) >= self.max_pending:
+                self.rejected += 1
+                raise QueueFull()
+            job_id = f'{uuid.uuid4().hex[:12]}-{next(self._ids)}'
+            self._jobs[job_id] = (self._executor.submit(func, *args, **kwargs), time.time())
+            self.submitted += 1
+        return job_id
+
+    def wait(self, job_id, timeout=DEFAULT_WAIT_SECONDS):
+        """
+        最多等待 timeout 秒，返回 poll(job_id) 的结果；超时后任务继续在后台执行
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is not None and timeout > 0:
+            wait_futures([job[0]], timeout=timeout)
+        return self.poll(job_id)
+
+    def poll(self, job_id):
+        """
+        返回 (状态, 结果)；任务完成或失败时取走结果，之后再查询同一任务返回 UNKNOWN
+        """
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return UNKNOWN, None
+            future = job[0]
+            if not future.done():
+                return PENDING, None
+            del self._jobs[job_id]
+        error = future.exception()
+        return (FAILED, error) if error is not None else (DONE, future.result())
+
+    @property
+    def pending(self):
+        with self._lock:
+            return sum(not future.done() for future, _ in self._jobs.values())
+
+    def _expire(self):
+        # 调用方持有锁；只丢弃已完成且超时未取走的结果
+        deadline = time.time() - self.ttl
+        for job_id in [job_id for job_id, (future, submitted) in self._jobs.items()
+                       if future.done() and submitted < deadline]:
+            del self._jobs[job_id]
@@ -0,0 +1,218 @@
+# benchmark.py
+"""
+性能基准：按不同数据规模 (默认 1千 到 1千万行) 生成模拟数据，测量各环节的耗时、吞吐量和内存峰值
+
+测量的环节：
+- clean: load_and_clean_data (读取 CSV 并清洗)
+- analysis: perform_analysis
+- analysis_incremental: 在其余数据的累积统计量上加入 1% 的新房源 (incremental_stats.py)
+- snapshot: 构建仪表盘数据快照 (筛选索引和预聚合立方体)
+- update_figures: 仪表盘图表回调的计算部分 (compute_figures)
+- ai_context, ai_*: AI助手的分析上下文和各个分析函数
+- plot_*: 静态图表的绘制和保存
+
+结果以 JSON 输出；给定基准文件时与之比较，耗时或内存峰值超出容差的环节记为回归，并以非零状态码退出
+用法: python benchmark.py --sizes 1000,100000 --baseline benchmark_baseline.json
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+DEFAULT_SIZES = [1000, 10000, 100000, 1000000, 10000000]
+DEFAULT_OUTPUT = 'benchmark_results.json'
+# 耗时或内存超过基准的比例达到该值时记为回归
+DEFAULT_TOLERANCE = 0.2
+# 每个环节计时的次数，取最短耗时
+DEFAULT_REPEAT = 3
+# 绝对差值低于下列阈值时不判定回归，避免很短的环节因计时抖动误报
+MIN_REGRESSION_SECONDS = 0.01
+MIN_REGRESSION_BYTES = 1 << 20
+
+AI_HELPERS = ['analyze_expensive_districts', 'analyze_cheap_districts', 'analyze_decoration_impact',
+              'generate_recommendations', 'analyze_trends', 'analyze_current_selection']
+
+
+def measure(func, repeat=DEFAULT_REPEAT, trace_memory=True, setup=None):
+    """
+    执行 func 并返回 (结果, 最短耗时秒数, 内存峰值字节数)
+    setup() 在每次执行前调用 (不计时)，返回值作为 func 的参数
+    计时前先不计时地执行一次作为预热 (延迟导入、首次初始化等开销不计入结果)；
+    内存峰值在这次预热的 tracemalloc 跟踪下测量，避免跟踪开销影响计时
+    """
+    def call():
+        args = setup() if setup else ()
+        # 被测函数的打印输出不计入结果
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            result = func(*args)
+            return result, time.perf_counter() - start
+
+    peak = None
+    if trace_memory:
+        tracemalloc.start()
+        try:
+            call()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    else:
+        call()
+
+    timings = []
+    result = None
+    for _ in range(max(repeat, 1)):
+        result, elapsed = call()
+        timings.append(elapsed)
+    return result, min(timings), peak
+
+
+def _record(results, name, size, elapsed, peak):
+    results[name] = {
+        'seconds': round(elapsed, 6),
+        'rows_per_second': round(size / elapsed, 1) if elapsed > 0 else None,
+        'peak_memory_mb': None if peak is None else round(peak / (1 << 20), 3),
+    }
+
+
+def benchmark_size(size, workdir, repeat=DEFAULT_REPEAT, trace_memory=True, skip=(), seed=42):
+    """
+    对一个数据规模运行全部环节，返回 {环节名: 指标}
+    """
+    from data_cleaning_analysis import load_and_clean_data, perform_analysis
+    from data_store import DataSnapshot
+    from generate_sample_data import write_sample_data
+    from incremental_stats import IncrementalStats
+
+    results = {}
+    raw_path = os.path.join(workdir, f'raw_{size}.csv')
+    write_sample_data(raw_path, size, seed=seed)
+
+    def run(name, func, setup=None):
+        if any(name.startswith(prefix) for prefix in skip):
+            return None
+        result, elapsed, peak = measure(func, repeat, trace_memory, setup)
+        _record(results, name, size, elapsed, peak)
+        print(f"  {name:<36} {elapsed:9.3f} 秒")
+        return result
+
+    cleaned = run('clean', lambda: load_and_clean_data(raw_path))
+    if cleaned is None:
+        with contextlib.redirect_stdout(io.StringIO()):
+            cleaned = load_and_clean_data(raw_path)
+    run('analysis', lambda: perform_analysis(cleaned))
+    batch = max(len(cleaned) // 100, 1)
+    run('analysis_incremental', lambda stats: stats.add(cleaned.iloc[-batch:]),
+        setup=lambda: (IncrementalStats().add(cleaned.iloc[:-batch]),))
+    snapshot = run('snapshot', lambda: DataSnapshot(cleaned, version='benchmark'))
+    if snapshot is None:
+        snapshot = DataSnapshot(cleaned, version='benchmark')
+
+    # 仪表盘回调：完整筛选范围 (页面默认状态)，与行数关系最大
+    # 绘图库在回调中首次使用时才导入，这里预先导入，导入耗时不计入结果
+    import app
+    import plotly.express  # noqa: F401
+    import scatter_render  # noqa: F401
+
+    meta = snapshot.metadata
+    selection = (meta['district'], meta['decoration'], [meta['area_min'], meta['area_max']],
+                 [meta['price_per_sqm_min'], meta['price_per_sqm_max']])
+    run('update_figures', lambda: app.compute_figures(*selection, snapshot))
+    # AI助手：先构建筛选状态的分析上下文，各分析函数都基于同一个上下文回答
+    from analytics import AnalyticsContext
+
+    context = run('ai_context', lambda: AnalyticsContext(snapshot, *selection))
+    if context is None:
+        context = AnalyticsContext(snapshot, *selection)
+    for helper in AI_HELPERS:
+        run(f'ai_{helper}', lambda: getattr(app, helper)(context, snapshot))
+
+    from visualization import STATIC_PLOTS, render_static_plot
+
+    plot_dir = os.path.join(workdir, 'plots')
+    os.makedirs(plot_dir, exist_ok=True)
+    for name, (_, columns) in STATIC_PLOTS.items():
+        data = cleaned[[col for col in columns if col in cleaned.columns]]
+        run(f'plot_{name}', lambda: render_static_plot(name, data, plot_dir, 100, ('png',)))
+    return results
+
+
+def compare_with_baseline(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    与基准结果比较，返回回归列表
+    """
+    regressions = []
+    for size, steps in report['results'].items():
+        base_steps = baseline.get('results', {}).get(size, {})
+        for name, current in steps.items():
+            base = base_steps.get(name)
+            if base is None:
+                continue
+            checks = [('seconds', current['seconds'], base['seconds'], MIN_REGRESSION_SECONDS)]
+            if current.get('peak_memory_mb') is not None and base.get('peak_memory_mb') is not None:
+                checks.append(('peak_memory_mb', current['peak_memory_mb'], base['peak_memory_mb'],
+                               MIN_REGRESSION_BYTES / (1 << 20)))
+            for metric, value, base_value, min_delta in checks:
+                if value > base_value * (1 + tolerance) and value - base_value > min_delta:
+                    regressions.append({
+                        'size': int(size), 'step': name, 'metric': metric,
+                        'baseline': base_value, 'current': value,
+                        'ratio': round(value / base_value, 3) if base_value else None,
+                    })
+    return regressions
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeat=DEFAULT_REPEAT, trace_memory=True, skip=(), seed=42):
+    report = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': repeat,
+        'results': {},
+    }
+    with tempfile.TemporaryDirectory(prefix='housing_benchmark_') as workdir:
+        for size in sizes:
+            print(f"\n数据规模 {size} 行")
+            report['results'][str(size)] = benchmark_size(size, workdir, repeat, trace_memory, skip, seed)
+    return report
+
+
+def _parse_sizes(text):
+    return [int(float(v)) for v in text.split(',') if v.strip()]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="按不同数据规模运行性能基准")
+    parser.add_argument('--sizes', default=','.join(str(s) for s in DEFAULT_SIZES),
+                        help="数据规模 (行数)，逗号分隔，如 1000,1e5")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help="每个环节计时的次数 (另有一次不计时的预热)，取最短耗时")
+    parser.add_argument('--no-memory', action='store_true', help="不测量内存峰值 (预热时不开启内存跟踪)")
+    parser.add_argument('--skip', default='', help="跳过的环节 (名称前缀)，逗号分隔，如 plot_,ai_")
+    parser.add_argument('--output', default=DEFAULT_OUTPUT, help="结果 JSON 文件路径")
+    parser.add_argument('--baseline', default=None, help="基准结果 JSON 文件路径")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help="判定回归的相对容差")
+    args = parser.parse_args()
+
+    report = run_benchmarks(_parse_sizes(args.sizes), args.repeat, not args.no_memory,
+                            tuple(s.strip() for s in args.skip.split(',') if s.strip()))
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            report['baseline'] = args.baseline
+            report['regressions'] = compare_with_baseline(report, json.load(f), args.tolerance)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"\n基准结果已保存到 '{args.output}'")
+
+    for item in report.get('regressions', []):
+        print(f"回归: {item['size']} 行 {item['step']} {item['metric']} "
+              f"{item['baseline']} -> {item['current']} (x{item['ratio']})")
+    sys.exit(1 if report.get('regressions') else 0)
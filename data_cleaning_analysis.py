@@ -1,6 +1,108 @@
 # data_cleaning_analysis.py
+import argparse
+
 import pandas as pd
 import numpy as np
+from data_io import CATEGORICAL_COLUMNS, CLEANED_CSV_PATH, CLEANED_DATA_PATH, CleanedDataWriter, save_cleaned_data
+from quantile_sketch import DEFAULT_MAX_CENTROIDS, QuantileSketch
+
+
+# 需要用中位数填充缺失值的数值型特征
+NUMERIC_FILL_COLUMNS = ['subway_distance', 'year_built']
+# 相关性分析使用的数值型特征
+CORRELATION_FEATURES = ['price_per_sqm', 'area', 'house_age', 'subway_distance', 'rooms', 'halls', 'baths',
+                        'floor_ratio']
+CURRENT_YEAR = 2024
+# 流式清洗时默认每块读取的行数
+DEFAULT_CHUNKSIZE = 100000
+
+
+# 户型字符串，如 "3室2厅1卫"；允许空格，缺少"卫"部分时卫数记为缺失
+LAYOUT_PATTERN = r'(\d+)\s*室\s*(\d+)\s*厅(?:\s*(\d+)\s*卫)?'
+# 楼层字符串，如 "12/29" (当前楼层/总楼层)；允许空格和负数楼层 (地下室)
+FLOOR_PATTERN = r'^\s*(-?\d+)\s*/\s*(\d+)\s*$'
+
+
+def _parse_unique_values(series, pattern, columns):
+    """
+    先因子化，只对每个不同取值做一次正则解析，再按编码广播回所有行
+    无法解析的字符串和缺失值得到 NaN
+    """
+    codes, uniques = pd.factorize(series)
+    parsed = pd.Series(np.asarray(uniques, dtype=object)).astype(str).str.extract(pattern).astype(float).to_numpy()
+    # 末尾追加一行 NaN，编码为 -1 (缺失值) 的行正好取到这一行
+    parsed = np.vstack([parsed.reshape(-1, len(columns)), np.full((1, len(columns)), np.nan)])
+    return pd.DataFrame(parsed[codes], columns=columns, index=series.index)
+
+
+def parse_layout(layout):
+    """
+    解析户型列，返回 rooms/halls/baths 三列
+    """
+    return _parse_unique_values(layout, LAYOUT_PATTERN, ['rooms', 'halls', 'baths'])
+
+
+def parse_floor(floor):
+    """
+    解析楼层列，返回 current_floor/total_floors 两列；总楼层不为正数时视为无效
+    """
+    parsed = _parse_unique_values(floor, FLOOR_PATTERN, ['current_floor', 'total_floors'])
+    invalid = parsed['total_floors'] <= 0
+    parsed.loc[invalid, ['current_floor', 'total_floors']] = np.nan
+    return parsed
+
+
+def iqr_bounds(q1, q3):
+    """
+    由上下四分位数计算 IQR 异常值边界
+    """
+    iqr = q3 - q1
+    return q1 - 1.5 * iqr, q3 + 1.5 * iqr
+
+
+def compute_cleaning_stats(df):
+    """
+    计算清洗所需的全局统计量：填充用的中位数和单价的异常值边界
+    """
+    medians = {col: df[col].median() for col in NUMERIC_FILL_COLUMNS}
+    lower_bound, upper_bound = iqr_bounds(df['price_per_sqm'].quantile(0.25), df['price_per_sqm'].quantile(0.75))
+    return {'medians': medians, 'price_bounds': (lower_bound, upper_bound)}
+
+
+def clean_frame(df, stats, categories=None):
+    """
+    用给定的全局统计量清洗一个DataFrame (整表或分块都适用)
+    categories 给定时，类别列使用固定的类别集合，保证各分块的类型一致
+    """
+    df = df.copy()
+
+    # 1. 用全局中位数填充缺失值
+    for col, median_val in stats['medians'].items():
+        df[col] = df[col].fillna(median_val)
+
+    # 2. 按全局 IQR 边界移除单价异常值
+    lower_bound, upper_bound = stats['price_bounds']
+    df_cleaned = df[(df['price_per_sqm'] >= lower_bound) & (df['price_per_sqm'] <= upper_bound)].copy()
+
+    # 3. 从户型字符串中提取房间数、厅数、卫数 (每种户型只解析一次)
+    df_cleaned[['rooms', 'halls', 'baths']] = parse_layout(df_cleaned['layout'])
+
+    # 4. 从楼层字符串中提取当前楼层和总楼层 (每种楼层字符串只解析一次)
+    df_cleaned[['current_floor', 'total_floors']] = parse_floor(df_cleaned['floor'])
+    # 计算楼层比率
+    df_cleaned['floor_ratio'] = df_cleaned['current_floor'] / df_cleaned['total_floors']
+
+    # 5. 计算房龄
+    df_cleaned['house_age'] = CURRENT_YEAR - df_cleaned['year_built']
+
+    # 6. 将分类变量转换为类别类型
+    for col in CATEGORICAL_COLUMNS:
+        if categories and col in categories:
+            df_cleaned[col] = pd.Categorical(df_cleaned[col], categories=categories[col])
+        else:
+            df_cleaned[col] = df_cleaned[col].astype('category')
+
+    return df_cleaned
 
 
 def load_and_clean_data(filepath):
@@ -17,72 +119,101 @@ def load_and_clean_data(filepath):
     print("\n原始数据描述性统计:")
     print(df.describe())
 
+    stats = compute_cleaning_stats(df)
+
     # 1. 处理缺失值
     # 对于数值型特征，用中位数填充
-    numeric_cols = ['subway_distance', 'year_built']
-    for col in numeric_cols:
+    for col, median_val in stats['medians'].items():
         if df[col].isnull().sum() > 0:
-            median_val = df[col].median()
-            df[col].fillna(median_val, inplace=True)
             print(f"已用中位数 {median_val} 填充 {col} 的缺失值")
 
     # 2. 处理异常值 (以单价为例，使用IQR方法)
-    Q1 = df['price_per_sqm'].quantile(0.25)
-    Q3 = df['price_per_sqm'].quantile(0.75)
-    IQR = Q3 - Q1
-    lower_bound = Q1 - 1.5 * IQR
-    upper_bound = Q3 + 1.5 * IQR
-
+    lower_bound, upper_bound = stats['price_bounds']
     outliers = df[(df['price_per_sqm'] < lower_bound) | (df['price_per_sqm'] > upper_bound)]
     print(f"\n检测到单价异常值 {len(outliers)} 个")
-    # 通常可以选择移除或盖帽处理，这里选择移除
-    df_cleaned = df[(df['price_per_sqm'] >= lower_bound) & (df['price_per_sqm'] <= upper_bound)].copy()
+
+    # 3-6. 通常可以选择移除或盖帽处理，这里选择移除；随后解析户型、楼层并转换类型
+    df_cleaned = clean_frame(df, stats)
     print(f"移除异常值后数据形状: {df_cleaned.shape}")
 
-    # 3. 从户型字符串中提取房间数、厅数、卫数
-    df_cleaned[['rooms', 'halls', 'baths']] = df_cleaned['layout'].str.extract(r'(\d+)室(\d+)厅(\d+)卫')
-    df_cleaned[['rooms', 'halls', 'baths']] = df_cleaned[['rooms', 'halls', 'baths']].astype(float)
+    print("\n清洗后数据信息:")
+    print(df_cleaned.info())
 
-    # 4. 从楼层字符串中提取当前楼层和总楼层
-    df_cleaned[['current_floor', 'total_floors']] = df_cleaned['floor'].str.split('/', expand=True)
-    df_cleaned[['current_floor', 'total_floors']] = df_cleaned[['current_floor', 'total_floors']].astype(float)
-    # 计算楼层比率
-    df_cleaned['floor_ratio'] = df_cleaned['current_floor'] / df_cleaned['total_floors']
+    return df_cleaned
 
-    # 5. 计算房龄
-    current_year = 2024
-    df_cleaned['house_age'] = current_year - df_cleaned['year_built']
 
-    # 6. 将分类变量转换为类别类型
-    categorical_cols = ['district', 'decoration', 'orientation', 'has_elevator']
-    for col in categorical_cols:
-        df_cleaned[col] = df_cleaned[col].astype('category')
+def compute_streaming_stats(filepath, chunksize=DEFAULT_CHUNKSIZE, max_centroids=DEFAULT_MAX_CENTROIDS):
+    """
+    流式清洗第一遍：分块读取，用分位数草图估计中位数和单价四分位数，并收集类别取值
+    内存占用只与草图大小和类别数有关，与输入行数无关
+    """
+    sketches = {col: QuantileSketch(max_centroids) for col in NUMERIC_FILL_COLUMNS + ['price_per_sqm']}
+    category_values = {col: set() for col in CATEGORICAL_COLUMNS}
+    num_rows = 0
+
+    for chunk in pd.read_csv(filepath, chunksize=chunksize):
+        num_rows += len(chunk)
+        for col, sketch in sketches.items():
+            sketch.update(chunk[col].to_numpy(dtype=float))
+        for col, values in category_values.items():
+            values.update(chunk[col].dropna().unique())
+
+    stats = {
+        'medians': {col: float(sketches[col].median()) for col in NUMERIC_FILL_COLUMNS},
+        'price_bounds': tuple(float(v) for v in iqr_bounds(*sketches['price_per_sqm'].quantile([0.25, 0.75]))),
+    }
+    categories = {col: sorted(values) for col, values in category_values.items()}
+    return stats, categories, num_rows
+
+
+def load_and_clean_data_chunked(filepath, output_path=CLEANED_DATA_PATH, chunksize=DEFAULT_CHUNKSIZE,
+                                max_centroids=DEFAULT_MAX_CENTROIDS, export_csv=False):
+    """
+    流式清洗：第一遍计算全局统计量，第二遍逐块清洗并增量写出
+    返回 (全局统计量, 输入行数, 输出行数)
+    """
+    stats, categories, num_rows = compute_streaming_stats(filepath, chunksize, max_centroids)
+    print(f"第一遍扫描完成：共 {num_rows} 行")
+    for col, median_val in stats['medians'].items():
+        print(f"{col} 中位数 (估计): {median_val}")
+    print(f"单价异常值边界: {stats['price_bounds'][0]:.2f} - {stats['price_bounds'][1]:.2f}")
 
-    print("\n清洗后数据信息:")
-    print(df_cleaned.info())
+    num_cleaned = 0
+    with CleanedDataWriter(output_path, export_csv=export_csv) as writer:
+        for chunk in pd.read_csv(filepath, chunksize=chunksize):
+            cleaned_chunk = clean_frame(chunk, stats, categories)
+            writer.write(cleaned_chunk)
+            num_cleaned += len(cleaned_chunk)
 
-    return df_cleaned
+    print(f"第二遍清洗完成：保留 {num_cleaned} 行，移除异常值 {num_rows - num_cleaned} 行")
+    return stats, num_rows, num_cleaned
 
 
-def perform_analysis(df):
+def perform_analysis(df, stats=None):
     """
     执行数据分析
+    stats 为已累积到 df 的 IncrementalStats (见 incremental_stats.py) 时直接使用累积的统计量，不再扫描全表；
+    此时各中位数和分位数为草图估计值
     """
     print("\n=== 描述性统计分析 ===")
     # 按区域分组分析
-    district_stats = df.groupby('district')['price_per_sqm'].agg(['mean', 'median', 'count', 'std']).round(2)
-    district_stats.columns = ['平均单价', '单价中位数', '房源数量', '单价标准差']
+    if stats is not None:
+        district_stats = stats.district_stats()
+    else:
+        district_stats = df.groupby('district', observed=True)['price_per_sqm'].agg(['mean', 'median', 'count', 'std']).round(2)
+        district_stats.columns = ['平均单价', '单价中位数', '房源数量', '单价标准差']
     print("各区域房价统计:")
     print(district_stats)
 
     print("\n全市房价描述:")
-    print(df['price_per_sqm'].describe())
+    print(stats.price_description() if stats is not None else df['price_per_sqm'].describe())
 
     print("\n=== 相关性分析 ===")
     # 选择数值型特征进行相关性分析
-    numeric_features = ['price_per_sqm', 'area', 'house_age', 'subway_distance', 'rooms', 'halls', 'baths',
-                        'floor_ratio']
-    correlation_matrix = df[numeric_features].corr()
+    if stats is not None:
+        correlation_matrix = stats.correlation_matrix()
+    else:
+        correlation_matrix = df[CORRELATION_FEATURES].corr()
     print("相关系数矩阵:")
     print(correlation_matrix['price_per_sqm'].sort_values(ascending=False))
 
@@ -90,9 +221,29 @@ def perform_analysis(df):
 
 
 if __name__ == "__main__":
-    file_path = "data/chengdu_second_hand_housing_sample.csv"
-    cleaned_df = load_and_clean_data(file_path)
-    district_stats, corr_matrix = perform_analysis(cleaned_df)
-    # 保存清洗后的数据
-    cleaned_df.to_csv('data/chengdu_housing_cleaned.csv', index=False, encoding='utf-8-sig')
-    print("\n清洗后的数据已保存到 'data/chengdu_housing_cleaned.csv'")
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="二手房数据清洗与分析")
+    parser.add_argument('--input', default="data/chengdu_second_hand_housing_sample.csv", help="原始数据 CSV 路径")
+    parser.add_argument('--export-csv', action='store_true', help=f"同时导出 CSV 到 '{CLEANED_CSV_PATH}'")
+    parser.add_argument('--chunksize', type=int, default=None,
+                        help="启用流式清洗模式，每块读取的行数 (适用于无法整体载入内存的大文件)")
+    args = parser.parse_args()
+
+    file_path = args.input
+    if args.chunksize:
+        # 流式模式：内存占用有上界，跳过需要整表的描述性分析
+        _, _, num_cleaned = load_and_clean_data_chunked(file_path, CLEANED_DATA_PATH, args.chunksize,
+                                                        export_csv=args.export_csv)
+        # 没有保留任何行时不写出文件
+        saved = num_cleaned > 0
+    else:
+        cleaned_df = load_and_clean_data(file_path)
+        district_stats, corr_matrix = perform_analysis(cleaned_df)
+        # 保存清洗后的数据 (Parquet 列式格式，保留数据类型)
+        save_cleaned_data(cleaned_df, CLEANED_DATA_PATH, export_csv=args.export_csv)
+        saved = True
+    if not saved:
+        print("\n清洗后没有保留任何数据，未写出数据文件")
+    else:
+        print(f"\n清洗后的数据已保存到 '{CLEANED_DATA_PATH}'")
+        if args.export_csv:
+            print(f"CSV 副本已导出到 '{CLEANED_CSV_PATH}'")
\ No newline at end of file
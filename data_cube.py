@@ -0,0 +1,240 @@
+# data_cube.py
+import numpy as np
+import pandas as pd
+
+from quantile_sketch import weighted_quantile
+
+# 每个单元格保留的分位数质心数
+CELL_CENTROIDS = 8
+
+
+class CubeResult:
+    """
+    数据立方体的一次查询结果，提供柱状图、直方图和统计卡片所需的全部聚合值
+    """
+
+    def __init__(self, cube, district_codes, decoration_codes, price_bins, counts, sums, sumsqs,
+                 mins, maxs, centroid_means, centroid_weights):
+        self.cube = cube
+        self._district_codes = district_codes
+        self._decoration_codes = decoration_codes
+        self._price_bins = price_bins
+        self._counts = counts
+        self._sums = sums
+        self._centroid_means = centroid_means
+        self._centroid_weights = centroid_weights
+
+        self.count = int(counts.sum())
+        self.sum = float(sums.sum())
+        self.sumsq = float(sumsqs.sum())
+        self.min = float(mins.min()) if len(mins) else np.nan
+        self.max = float(maxs.max()) if len(maxs) else np.nan
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else np.nan
+
+    @property
+    def std(self):
+        # 样本标准差 (与 pandas 默认 ddof=1 一致)
+        if self.count < 2:
+            return np.nan
+        variance = (self.sumsq - self.sum * self.sum / self.count) / (self.count - 1)
+        return float(np.sqrt(max(variance, 0.0)))
+
+    def quantile(self, q):
+        if not self.count:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        return weighted_quantile(self._centroid_means, self._centroid_weights, q, self.min, self.max)
+
+    @property
+    def median(self):
+        return float(self.quantile(0.5))
+
+    def _group_means(self, codes, labels):
+        size = len(labels)
+        counts = np.bincount(codes, weights=self._counts, minlength=size)
+        sums = np.bincount(codes, weights=self._sums, minlength=size)
+        observed = counts > 0
+        return pd.Series(sums[observed] / counts[observed], index=pd.Index(np.asarray(labels)[observed]),
+                         name='price_per_sqm')
+
+    def district_means(self):
+        """
+        各区域平均单价 (仅包含有房源的区域)
+        """
+        series = self._group_means(self._district_codes, self.cube.districts)
+        series.index.name = 'district'
+        return series
+
+    def decoration_means(self):
+        """
+        各装修类型平均单价 (仅包含有房源的类型)
+        """
+        series = self._group_means(self._decoration_codes, self.cube.decorations)
+        series.index.name = 'decoration'
+        return series
+
+    def price_histogram(self, max_bins=30):
+        """
+        单价直方图：在立方体的单价分箱基础上合并相邻分箱，最多 max_bins 个柱子
+        返回 (分箱边界, 计数)
+        """
+        edges = self.cube.price_edges
+        counts = np.bincount(self._price_bins, weights=self._counts, minlength=len(edges) - 1)
+        nonzero = np.flatnonzero(counts)
+        if len(nonzero) == 0:
+            return edges[:1], np.zeros(0)
+
+        first, last = nonzero[0], nonzero[-1] + 1
+        factor = int(np.ceil((last - first) / max_bins))
+        groups = (np.arange(first, last) - first) // factor
+        merged_counts = np.bincount(groups, weights=counts[first:last])
+        merged_edges = edges[first:last + 1:factor]
+        if len(merged_edges) < len(merged_counts) + 1:
+            merged_edges = np.append(merged_edges, edges[first] + len(merged_counts) * factor * self.cube.price_step)
+        return merged_edges, merged_counts
+
+
+class DataCube:
+    """
+    预聚合数据立方体：按 (区域, 装修, 面积分箱, 单价分箱) 保存计数、和、平方和、最值及分位数质心
+
+    分箱起点和步长与仪表盘滑块一致 (面积从最小值起每 10 平米、单价从最小值起每 1000 元)，
+    因此滑块取值总落在分箱边界上，查询只需对完全覆盖的单元格做汇总；
+    只有部分覆盖的边界单元格才回退到逐行计算，结果与逐行筛选一致。
+    """
+
+    def __init__(self, df, area_step=10, price_step=1000):
+        self.area_step = area_step
+        self.price_step = price_step
+        self.num_rows = len(df)
+
+        district_codes, self.districts = pd.factorize(df['district'], sort=True)
+        decoration_codes, self.decorations = pd.factorize(df['decoration'], sort=True)
+        self.districts = list(self.districts)
+        self.decorations = list(self.decorations)
+        self._district_lookup = {value: code for code, value in enumerate(self.districts)}
+        self._decoration_lookup = {value: code for code, value in enumerate(self.decorations)}
+
+        self.area_values = df['area'].to_numpy(dtype=float)
+        self.price_values = df['price_per_sqm'].to_numpy(dtype=float)
+        self.area_edges = self._build_edges(self.area_values, area_step)
+        self.price_edges = self._build_edges(self.price_values, price_step)
+        area_bins = np.searchsorted(self.area_edges, self.area_values, side='right') - 1
+        price_bins = np.searchsorted(self.price_edges, self.price_values, side='right') - 1
+
+        # 缺失值或类别为空的行不进入立方体，任何筛选条件都不会选中它们
+        valid = ((district_codes >= 0) & (decoration_codes >= 0) &
+                 ~np.isnan(self.area_values) & ~np.isnan(self.price_values))
+        self.row_district = district_codes
+        self.row_decoration = decoration_codes
+
+        shape = (len(self.districts), len(self.decorations), len(self.area_edges) - 1, len(self.price_edges) - 1)
+        flat_ids = np.full(self.num_rows, -1, dtype=np.int64)
+        flat_ids[valid] = np.ravel_multi_index(
+            (district_codes[valid], decoration_codes[valid], area_bins[valid], price_bins[valid]), shape)
+
+        # 只保存非空单元格 (稀疏存储)
+        valid_rows = np.flatnonzero(valid)
+        cell_flat_ids, cell_of_row = np.unique(flat_ids[valid], return_inverse=True)
+        (self.cell_district, self.cell_decoration,
+         self.cell_area_bin, self.cell_price_bin) = np.unravel_index(cell_flat_ids, shape)
+        num_cells = len(cell_flat_ids)
+
+        prices = self.price_values[valid_rows]
+        self.cell_count = np.bincount(cell_of_row, minlength=num_cells).astype(float)
+        self.cell_sum = np.bincount(cell_of_row, weights=prices, minlength=num_cells)
+        self.cell_sumsq = np.bincount(cell_of_row, weights=prices * prices, minlength=num_cells)
+
+        # 行按 (单元格, 单价) 排序，形成 CSR 结构：边界单元格可直接取出连续的行号
+        order = np.lexsort((prices, cell_of_row))
+        self.cell_rows = valid_rows[order]
+        self.cell_offsets = np.concatenate([[0], np.cumsum(self.cell_count).astype(np.int64)])
+        sorted_prices = prices[order]
+        self.cell_min = sorted_prices[self.cell_offsets[:-1]] if num_cells else np.empty(0)
+        self.cell_max = sorted_prices[self.cell_offsets[1:] - 1] if num_cells else np.empty(0)
+
+        # 每个单元格的分位数草图：单元格内按排名切成 CELL_CENTROIDS 个等权重质心
+        sorted_cells = cell_of_row[order]
+        rank_in_cell = np.arange(len(order)) - self.cell_offsets[sorted_cells]
+        group = (rank_in_cell * CELL_CENTROIDS // self.cell_count[sorted_cells].astype(np.int64))
+        centroid_ids = sorted_cells * CELL_CENTROIDS + group
+        centroid_weights = np.bincount(centroid_ids, minlength=num_cells * CELL_CENTROIDS)
+        centroid_sums = np.bincount(centroid_ids, weights=sorted_prices, minlength=num_cells * CELL_CENTROIDS)
+        keep = centroid_weights > 0
+        self.centroid_cell = np.repeat(np.arange(num_cells), CELL_CENTROIDS)[keep]
+        self.centroid_weights = centroid_weights[keep].astype(float)
+        self.centroid_means = centroid_sums[keep] / self.centroid_weights
+
+    @staticmethod
+    def _build_edges(values, step):
+        finite = values[~np.isnan(values)]
+        if len(finite) == 0:
+            return np.array([0.0, float(step)])
+        origin = finite.min()
+        num_bins = int(np.floor((finite.max() - origin) / step)) + 1
+        return origin + step * np.arange(num_bins + 1, dtype=float)
+
+    def _code_mask(self, lookup, selected_values):
+        mask = np.zeros(len(lookup), dtype=bool)
+        for value in selected_values or []:
+            if value in lookup:
+                mask[lookup[value]] = True
+        return mask
+
+    @staticmethod
+    def _bin_coverage(edges, value_range):
+        """
+        返回每个分箱是否被 [low, high] 完全覆盖、是否部分覆盖
+        """
+        low, high = value_range
+        full = (edges[:-1] >= low) & (edges[1:] <= high)
+        overlap = (edges[1:] > low) & (edges[:-1] <= high)
+        return full, overlap & ~full
+
+    def query(self, selected_districts, selected_decorations, area_range, price_range):
+        """
+        按筛选条件聚合，耗时与单元格数量 (及边界单元格中的行数) 成正比，而与总行数无关
+        """
+        district_mask = self._code_mask(self._district_lookup, selected_districts)
+        decoration_mask = self._code_mask(self._decoration_lookup, selected_decorations)
+        area_full, area_partial = self._bin_coverage(self.area_edges, area_range)
+        price_full, price_partial = self._bin_coverage(self.price_edges, price_range)
+
+        selected = district_mask[self.cell_district] & decoration_mask[self.cell_decoration]
+        area_any = area_full | area_partial
+        price_any = price_full | price_partial
+        full_cells = selected & area_full[self.cell_area_bin] & price_full[self.cell_price_bin]
+        partial_cells = (selected & area_any[self.cell_area_bin] & price_any[self.cell_price_bin]
+                         & ~full_cells)
+
+        # 边界单元格逐行判断
+        partial_ids = np.flatnonzero(partial_cells)
+        if len(partial_ids):
+            rows = np.concatenate([self.cell_rows[self.cell_offsets[i]:self.cell_offsets[i + 1]]
+                                   for i in partial_ids])
+            area, price = self.area_values[rows], self.price_values[rows]
+            rows = rows[(area >= area_range[0]) & (area <= area_range[1]) &
+                        (price >= price_range[0]) & (price <= price_range[1])]
+        else:
+            rows = np.empty(0, dtype=np.int64)
+        row_prices = self.price_values[rows]
+        row_price_bins = np.searchsorted(self.price_edges, row_prices, side='right') - 1
+
+        full_ids = np.flatnonzero(full_cells)
+        centroid_mask = full_cells[self.centroid_cell]
+        ones = np.ones(len(rows))
+        return CubeResult(
+            self,
+            district_codes=np.concatenate([self.cell_district[full_ids], self.row_district[rows]]),
+            decoration_codes=np.concatenate([self.cell_decoration[full_ids], self.row_decoration[rows]]),
+            price_bins=np.concatenate([self.cell_price_bin[full_ids], row_price_bins]),
+            counts=np.concatenate([self.cell_count[full_ids], ones]),
+            sums=np.concatenate([self.cell_sum[full_ids], row_prices]),
+            sumsqs=np.concatenate([self.cell_sumsq[full_ids], row_prices * row_prices]),
+            mins=np.concatenate([self.cell_min[full_ids], row_prices]),
+            maxs=np.concatenate([self.cell_max[full_ids], row_prices]),
+            centroid_means=np.concatenate([self.centroid_means[centroid_mask], row_prices]),
+            centroid_weights=np.concatenate([self.centroid_weights[centroid_mask], ones]),
+        )
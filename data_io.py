@@ -0,0 +1,182 @@
+# data_io.py
+import json
+import os
+
+# 清洗后数据的主存储格式为 Parquet (列式、保留类别和数值类型)，CSV 仅作为导出格式
+CLEANED_DATA_PATH = 'data/chengdu_housing_cleaned.parquet'
+CLEANED_CSV_PATH = 'data/chengdu_housing_cleaned.csv'
+
+# 需要以类别类型存储的列
+CATEGORICAL_COLUMNS = ['district', 'decoration', 'orientation', 'has_elevator']
+# 取值种类很少的字符串列，同样以类别类型存储以减少内存
+LOW_CARDINALITY_COLUMNS = ['layout', 'floor']
+
+
+def metadata_path(path=CLEANED_DATA_PATH):
+    """
+    数据文件对应的元数据文件路径 (下拉选项、滑块范围等，仪表盘启动时无需读取整个数据集)
+    """
+    return os.path.splitext(path)[0] + '.meta.json'
+
+
+def _update_metadata(metadata, df):
+    # 按块累积：类别取值求并集，数值范围取最小/最大
+    metadata['columns'] = metadata.get('columns') or list(df.columns)
+    metadata['num_rows'] = metadata.get('num_rows', 0) + len(df)
+    for col in ('district', 'decoration'):
+        values = set(metadata.get(col, [])) | {str(v) for v in df[col].dropna().unique()}
+        metadata[col] = sorted(values)
+    for col in ('area', 'price_per_sqm'):
+        low, high = df[col].min(), df[col].max()
+        if col + '_min' in metadata:
+            low, high = min(low, metadata[col + '_min']), max(high, metadata[col + '_max'])
+        metadata[col + '_min'], metadata[col + '_max'] = float(low), float(high)
+    return metadata
+
+
+def dataset_metadata(df):
+    """
+    由内存中的数据集计算元数据 (与元数据文件内容一致)
+    """
+    return _update_metadata({}, df)
+
+
+def _write_metadata(metadata, path):
+    tmp_path = metadata_path(path) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(metadata, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_path, metadata_path(path))
+
+
+def load_metadata(path=None):
+    """
+    读取数据集元数据；元数据文件不存在 (如旧的 CSV 数据) 时读取数据计算
+    """
+    path = path or cleaned_data_path()
+    meta_path = metadata_path(path)
+    if os.path.exists(meta_path):
+        with open(meta_path, encoding='utf-8') as f:
+            return json.load(f)
+    return dataset_metadata(load_cleaned_data(path))
+
+
+def _to_storage_types(df):
+    # 类别列及低基数字符串列统一存为 category
+    df = df.copy()
+    for col in CATEGORICAL_COLUMNS + LOW_CARDINALITY_COLUMNS:
+        if col in df.columns and df[col].dtype.name != 'category':
+            df[col] = df[col].astype('category')
+    return df
+
+
+def save_cleaned_data(df, path=CLEANED_DATA_PATH, export_csv=False, csv_path=CLEANED_CSV_PATH):
+    """
+    保存清洗后的数据为 Parquet 文件，可选同时导出 CSV
+    先写临时文件再原子替换，读取方不会读到写了一半的文件
+    """
+    df = _to_storage_types(df)
+
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = path + '.tmp'
+    df.to_parquet(tmp_path, index=False)
+    _write_metadata(dataset_metadata(df), path)
+    os.replace(tmp_path, path)
+
+    if export_csv:
+        df.to_csv(csv_path, index=False, encoding='utf-8-sig')
+
+
+class CleanedDataWriter:
+    """
+    分块增量写出清洗后的数据 (每块一个 Parquet row group)，可选同时追加导出 CSV
+    全部写完后才原子替换目标文件
+
+    用法:
+        with CleanedDataWriter(path) as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+    """
+
+    def __init__(self, path=CLEANED_DATA_PATH, export_csv=False, csv_path=CLEANED_CSV_PATH):
+        self.path = path
+        self.csv_path = csv_path if export_csv else None
+        self._tmp_path = path + '.tmp'
+        self._writer = None
+        self._schema = None
+        self._csv_file = None
+        self._metadata = {}
+        self.rows_written = 0
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        if self.csv_path:
+            self._csv_file = open(self.csv_path + '.tmp', 'w', encoding='utf-8-sig', newline='')
+        return self
+
+    def write(self, df):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        if len(df) == 0:
+            return
+        table = pa.Table.from_pandas(_to_storage_types(df), preserve_index=False)
+        if self._writer is None:
+            # 字典列统一使用 int32 索引，避免各分块类别数不同导致 schema 不一致；
+            # 整数列统一存为 float64：第一块没有缺失值时读成整数，后续分块可能含缺失值或非整数的填充中位数
+            fields = [pa.field(f.name, pa.dictionary(pa.int32(), f.type.value_type))
+                      if pa.types.is_dictionary(f.type)
+                      else pa.field(f.name, pa.float64()) if pa.types.is_integer(f.type) else f
+                      for f in table.schema]
+            self._schema = pa.schema(fields, metadata=table.schema.metadata)
+            self._writer = pq.ParquetWriter(self._tmp_path, self._schema)
+        self._writer.write_table(table.cast(self._schema))
+        _update_metadata(self._metadata, df)
+        self.rows_written += len(df)
+
+        if self._csv_file is not None:
+            df.to_csv(self._csv_file, index=False, header=self._csv_file.tell() == 0)
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._writer is not None:
+            self._writer.close()
+        if self._csv_file is not None:
+            self._csv_file.close()
+
+        # 出错或没有写出任何行时丢弃临时文件，保留原有的数据文件
+        if exc_type is not None or self._writer is None:
+            for tmp_path in (self._tmp_path, self.csv_path and self.csv_path + '.tmp'):
+                if tmp_path and os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            return False
+
+        _write_metadata(self._metadata, self.path)
+        os.replace(self._tmp_path, self.path)
+        if self.csv_path:
+            os.replace(self.csv_path + '.tmp', self.csv_path)
+        return False
+
+
+def cleaned_data_path(path=CLEANED_DATA_PATH, csv_path=CLEANED_CSV_PATH):
+    """
+    返回实际使用的数据文件：优先 Parquet，不存在时回退到旧的 CSV
+    """
+    if os.path.exists(path) or not os.path.exists(csv_path):
+        return path
+    return csv_path
+
+
+def load_cleaned_data(path=None, columns=None):
+    """
+    读取清洗后的数据，类别列保持 category 类型
+    """
+    import pandas as pd
+
+    path = path or cleaned_data_path()
+    if path.endswith('.csv'):
+        df = pd.read_csv(path, usecols=columns)
+        # CSV 不保存类型信息，读入后恢复类别类型
+        for col in CATEGORICAL_COLUMNS + LOW_CARDINALITY_COLUMNS:
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+        return df
+    return pd.read_parquet(path, columns=columns)
@@ -0,0 +1,167 @@
+# data_store.py
+"""
+仪表盘的数据层：数据集及其索引在第一次使用时才加载，进程内只加载一次
+
+在 gunicorn 等多进程部署中，可在 fork 之前由主进程调用 warm_up()，
+工作进程以写时复制 (copy-on-write) 的方式共享同一份数据；warm_up() 不启动后台线程，
+避免 fork 时线程正持有锁，热加载线程在各工作进程中启动 (见 start_watcher)；
+设置环境变量 HOUSING_SHARED_DATA=1 时，各进程改为挂载共享内存中的数据集 (见 shared_dataset.py)
+
+热加载：后台线程定期检查数据版本 (数据文件的修改时间和大小，或共享数据集的 CURRENT 指针)，
+发现新版本后在后台构建新快照，再原子替换当前快照；
+回调开始时取得一次快照并在整个回调中使用，进行中的请求仍在旧快照上完成
+"""
+import os
+import threading
+import time
+
+from data_io import cleaned_data_path, dataset_metadata, load_cleaned_data
+from result_cache import file_fingerprint
+from shared_dataset import attach, current_version, default_shared_dir, shared_data_enabled
+
+# 检查数据版本的间隔 (秒)，可用环境变量 HOUSING_RELOAD_INTERVAL 修改，设为 0 关闭热加载
+DEFAULT_RELOAD_INTERVAL = 5.0
+
+
+class DataSnapshot:
+    """
+    一个版本的数据集及其派生结构 (筛选索引、预聚合立方体、推荐排序索引、问题解析器、下拉选项和滑块范围)
+    """
+
+    def __init__(self, df, source_path=None, version=None):
+        from data_cube import DataCube
+        from filter_index import FilterIndex
+        from intent_matcher import IntentMatcher
+        from ranking_index import RankingIndex
+
+        self.df = df
+        self.source_path = source_path
+        self.version = version
+        self.metadata = dataset_metadata(df)
+        self.filter_index = FilterIndex(df)
+        self.data_cube = DataCube(df)
+        self.ranking_index = RankingIndex(df)
+        self.intent_matcher = IntentMatcher(self.metadata['district'], self.metadata['decoration'])
+
+    def filter(self, selected_districts, selected_decorations, area_range, price_range):
+        return self.filter_index.apply(self.df, selected_districts, selected_decorations, area_range, price_range)
+
+
+_snapshot = None
+_lock = threading.Lock()
+# 同一时间只允许一个线程构建新快照
+_reload_lock = threading.Lock()
+# 新快照构建完成、替换之前调用的监听函数 (如预热图表缓存)
+_reload_listeners = []
+# 启动后台线程的进程号：fork 出的工作进程不会继承线程，需要各自启动
+_watcher_pid = None
+
+
+def source_version():
+    """
+    当前数据源的版本号，只读取文件元信息，开销很小；数据源不存在时返回 None
+    """
+    if shared_data_enabled():
+        return current_version()
+    fingerprint = file_fingerprint(cleaned_data_path())
+    return None if fingerprint is None else '{}-{}'.format(*fingerprint)
+
+
+def get_snapshot():
+    """
+    返回当前数据快照，首次调用时加载数据并构建索引
+    """
+    start_watcher()
+    return _current_snapshot()
+
+
+def _current_snapshot():
+    global _snapshot
+    if _snapshot is None:
+        with _lock:
+            if _snapshot is None:
+                _snapshot = load_snapshot()
+    return _snapshot
+
+
+def load_snapshot():
+    """
+    加载一个新的数据快照：启用共享内存时挂载已发布的共享数据集，否则读取数据文件
+    """
+    if shared_data_enabled():
+        df, version = attach()
+        return DataSnapshot(df, default_shared_dir(), version)
+    # 先取版本再读文件：读取期间文件被替换时，下一轮检查仍会发现变化
+    version = source_version()
+    path = cleaned_data_path()
+    return DataSnapshot(load_cleaned_data(path), path, version)
+
+
+def add_reload_listener(listener):
+    """
+    注册在新快照替换之前调用的函数 listener(snapshot)，用于在后台预热缓存
+    """
+    _reload_listeners.append(listener)
+
+
+def reload_snapshot():
+    """
+    数据版本变化时构建新快照并原子替换，返回是否替换
+    首次加载尚未完成时不做任何事：首次加载读取的就是当前版本，不必再并行加载一份
+    """
+    global _snapshot
+    with _reload_lock:
+        if _snapshot is None:
+            return False
+        version = source_version()
+        if version is None or (_snapshot is not None and _snapshot.version == version):
+            return False
+        snapshot = load_snapshot()
+        for listener in _reload_listeners:
+            try:
+                listener(snapshot)
+            except Exception as exc:  # 预热失败不影响替换
+                print(f"数据快照预热失败: {exc}")
+        # 替换引用是原子操作，已经取得旧快照的回调不受影响
+        with _lock:
+            _snapshot = snapshot
+    print(f"已加载新版本数据: {snapshot.version} ({len(snapshot.df)} 行)")
+    return True
+
+
+def reload_interval():
+    return float(os.environ.get('HOUSING_RELOAD_INTERVAL', DEFAULT_RELOAD_INTERVAL))
+
+
+def _watch(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            reload_snapshot()
+        except Exception as exc:  # 新数据有问题时继续使用旧快照
+            print(f"加载新版本数据失败，继续使用当前数据: {exc}")
+
+
+def start_watcher():
+    """
+    在当前进程中启动热加载线程 (每个进程只启动一次)；get_snapshot() 首次调用时也会启动
+    """
+    global _watcher_pid
+    if _watcher_pid == os.getpid():
+        return
+    with _lock:
+        if _watcher_pid == os.getpid():
+            return
+        _watcher_pid = os.getpid()
+        interval = reload_interval()
+        if interval > 0:
+            threading.Thread(target=_watch, args=(interval,), name='data-reload', daemon=True).start()
+
+
+def warm_up():
+    """
+    预先加载数据并构建索引，返回耗时 (秒)；不启动热加载线程，可在 fork 之前调用
+    """
+    start = time.perf_counter()
+    _current_snapshot()
+    return time.perf_counter() - start
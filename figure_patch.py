@@ -0,0 +1,61 @@
+# figure_patch.py
+"""
+图表的增量更新：把 Plotly 图表拆成 "结构" (布局、图层类型和样式) 和 "数据数组" 两部分
+
+结构签名与浏览器中已有图表的签名相同时，只用 dash.Patch 回传各图层的数据数组，
+布局保持不变；签名不同 (如图层数量变化、散点图切换为热力图) 时回传完整图表
+"""
+import hashlib
+import json
+
+import numpy as np
+
+
+def _split_trace(trace, prefix=()):
+    # 数组 (列表、ndarray 或 Plotly 的二进制数组编码) 视为数据，其余视为结构
+    structure, arrays = {}, []
+    for key, value in trace.items():
+        path = prefix + (key,)
+        if isinstance(value, dict) and 'bdata' not in value:
+            sub_structure, sub_arrays = _split_trace(value, path)
+            structure[key] = sub_structure
+            arrays += sub_arrays
+        elif isinstance(value, (list, tuple, np.ndarray, dict)):
+            arrays.append((path, value))
+        else:
+            structure[key] = value
+    return structure, arrays
+
+
+class FigureParts:
+    """
+    预先拆分好的图表：完整图表、结构签名和各图层的数据数组
+    """
+
+    def __init__(self, figure):
+        self.figure = figure.to_plotly_json() if hasattr(figure, 'to_plotly_json') else figure
+        traces = []
+        self.arrays = []
+        for index, trace in enumerate(self.figure.get('data', [])):
+            structure, arrays = _split_trace(trace)
+            # 数据数组的字段名也属于结构：字段集合变化时不能只更新数组
+            traces.append((structure, [path for path, _ in arrays]))
+            self.arrays += [(index, path, value) for path, value in arrays]
+        payload = json.dumps([traces, self.figure.get('layout', {})], sort_keys=True, default=str)
+        self.signature = hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def output(self, client_signature):
+        """
+        浏览器中图表的签名与当前结构相同时返回只含数据数组的 Patch，否则返回完整图表
+        """
+        if client_signature != self.signature:
+            return self.figure
+        from dash import Patch
+
+        patch = Patch()
+        for index, path, value in self.arrays:
+            target = patch['data'][index]
+            for key in path[:-1]:
+                target = target[key]
+            target[path[-1]] = value
+        return patch
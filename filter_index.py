@@ -0,0 +1,83 @@
+# filter_index.py
+import numpy as np
+import pandas as pd
+
+
+class FilterIndex:
+    """
+    房源筛选索引：启动时构建一次，供所有需要筛选的回调共享
+
+    - 区域、装修：每个类别一个位图 (np.packbits 压缩的布尔数组)
+    - 面积、单价：按列排序后的行号索引，范围筛选只需两次二分查找
+    """
+
+    def __init__(self, df):
+        self.num_rows = len(df)
+        self.category_bitmaps = {
+            'district': self._build_category_bitmaps(df['district']),
+            'decoration': self._build_category_bitmaps(df['decoration']),
+        }
+        self.sorted_indices = {
+            'area': self._build_sorted_index(df['area']),
+            'price_per_sqm': self._build_sorted_index(df['price_per_sqm']),
+        }
+
+    def _build_category_bitmaps(self, series):
+        # 先对列做因子化，再为每个类别生成一个位图
+        codes, uniques = pd.factorize(series)
+        bitmaps = {}
+        for code, value in enumerate(uniques):
+            bitmaps[value] = np.packbits(codes == code)
+        return bitmaps
+
+    def _build_sorted_index(self, series):
+        # 稳定排序，缺失值排在末尾，不会落入任何闭区间
+        values = series.to_numpy(dtype=float)
+        order = np.argsort(values, kind='stable')
+        return values[order], order
+
+    def _empty_bitmap(self):
+        return np.zeros((self.num_rows + 7) // 8, dtype=np.uint8)
+
+    def _category_bitmap(self, column, selected_values):
+        # 选中类别的位图按位或；未知类别直接忽略
+        bitmap = self._empty_bitmap()
+        bitmaps = self.category_bitmaps[column]
+        for value in selected_values or []:
+            if value in bitmaps:
+                bitmap |= bitmaps[value]
+        return bitmap
+
+    def _range_bitmap(self, column, value_range):
+        # 闭区间 [low, high]，两次二分查找得到有序索引中的连续片段
+        sorted_values, order = self.sorted_indices[column]
+        low, high = value_range
+        start = np.searchsorted(sorted_values, low, side='left')
+        stop = np.searchsorted(sorted_values, high, side='right')
+        mask = np.zeros(self.num_rows, dtype=bool)
+        mask[order[start:stop]] = True
+        return np.packbits(mask)
+
+    def mask(self, selected_districts, selected_decorations, area_range, price_range):
+        """
+        返回满足筛选条件的布尔掩码
+        """
+        bitmap = self._category_bitmap('district', selected_districts)
+        bitmap &= self._category_bitmap('decoration', selected_decorations)
+        if bitmap.any():
+            bitmap &= self._range_bitmap('area', area_range)
+            bitmap &= self._range_bitmap('price_per_sqm', price_range)
+        return np.unpackbits(bitmap, count=self.num_rows).astype(bool)
+
+    def positions(self, selected_districts, selected_decorations, area_range, price_range):
+        """
+        返回满足筛选条件的行位置 (升序)
+        """
+        return np.flatnonzero(self.mask(selected_districts, selected_decorations, area_range, price_range))
+
+    def apply(self, df, selected_districts, selected_decorations, area_range, price_range):
+        """
+        在构建索引时使用的同一个DataFrame上应用筛选
+        """
+        return df.iloc[self.positions(selected_districts, selected_decorations, area_range, price_range)]
+
@@ -1,13 +1,23 @@
 # generate_sample_data.py
+"""
+生成模拟的二手房数据
+
+- 全部按列向量化生成，可生成任意规模的数据；大规模数据分块生成并逐块写入磁盘，内存占用与总行数无关
+- 可配置随机种子、各列缺失值比例和单价异常值比例
+- 可选的相关性：区域溢价、房龄折旧、地铁距离影响，使单价分布更接近真实数据，
+  压测时筛选条件的选择性也更真实
+用法: python generate_sample_data.py --rows 10000000 --output data/large.csv --correlated
+"""
 import os
 import pandas as pd
 import numpy as np
 
-# 自动创建data目录（如果不存在）
-os.makedirs('data', exist_ok=True)
-
-np.random.seed(42)
-num_samples = 1000
+SAMPLE_DATA_PATH = 'data/chengdu_second_hand_housing_sample.csv'
+# 分块生成时每块的行数
+DEFAULT_CHUNKSIZE = 500000
+# 默认的缺失值比例
+DEFAULT_MISSING_RATES = {'subway_distance': 0.05, 'year_built': 0.03}
+REFERENCE_YEAR = 2024
 
 # 模拟区域
 districts = ['锦江区', '青羊区', '金牛区', '武侯区', '成华区', '高新区', '天府新区', '龙泉驿区', '温江区', '双流区']
@@ -18,28 +28,161 @@ orientation = ['南', '北', '东', '西', '东南', '西南', '东北', '西北
 # 模拟是否有电梯
 has_elevator = ['有', '无']
 
-data = {
-    'title': [f'房源{i}' for i in range(num_samples)],
-    'total_price': np.random.normal(200, 60, num_samples).round(1),
-    'price_per_sqm': np.random.normal(18000, 5000, num_samples).round(0),
-    'district': np.random.choice(districts, num_samples),
-    'area': np.random.uniform(50, 200, num_samples).round(1),
-    'layout': [f"{np.random.randint(1, 5)}室{np.random.randint(1, 3)}厅{np.random.randint(1, 3)}卫" for _ in range(num_samples)],
-    'floor': [f"{np.random.randint(1, 30)}/{np.random.randint(1, 30)}" for _ in range(num_samples)],
-    'year_built': np.random.randint(1990, 2023, num_samples),
-    'decoration': np.random.choice(decoration, num_samples),
-    'orientation': np.random.choice(orientation, num_samples),
-    'has_elevator': np.random.choice(has_elevator, num_samples, p=[0.7, 0.3]),
-    'subway_distance': np.random.exponential(1000, num_samples).round(0),
+# 各区域单价相对全市平均水平的系数 (开启相关性时使用)
+DISTRICT_PREMIUM = {
+    '锦江区': 1.25, '青羊区': 1.2, '金牛区': 0.95, '武侯区': 1.15, '成华区': 0.95,
+    '高新区': 1.35, '天府新区': 1.1, '龙泉驿区': 0.7, '温江区': 0.75, '双流区': 0.8,
 }
+# 房龄每增加一年单价下降的比例
+AGE_DEPRECIATION = 0.01
+# 紧邻地铁时的单价溢价，随距离按指数衰减 (米)
+SUBWAY_PREMIUM = 0.15
+SUBWAY_DECAY = 800
+
+# 户型 "x室y厅z卫" 和楼层 "当前/总楼层" 的取值种类很少，预先生成字符串表，按随机下标取值
+_LAYOUT_TABLE = np.array([[[f"{r}室{h}厅{b}卫" for b in range(1, 3)] for h in range(1, 3)] for r in range(1, 5)],
+                         dtype=object)
+_FLOOR_TABLE = np.array([[f"{c}/{t}" for t in range(1, 30)] for c in range(1, 30)], dtype=object)
+
+
+def _generate_frame(rng, num_samples, start=0, missing_rates=None, outlier_rate=0.0, correlated=False):
+    """
+    用给定的随机数生成器生成一块数据，房源编号从 start 开始
+    """
+    missing_rates = DEFAULT_MISSING_RATES if missing_rates is None else missing_rates
+
+    district = rng.choice(np.array(districts, dtype=object), num_samples)
+    area = rng.uniform(50, 200, num_samples).round(1)
+    year_built = rng.integers(1990, 2023, num_samples)
+    subway_distance = rng.exponential(1000, num_samples).round(0)
+    price_per_sqm = rng.normal(18000, 5000, num_samples)
+
+    if correlated:
+        premium = pd.Series(district).map(DISTRICT_PREMIUM).to_numpy(dtype=float)
+        age_factor = 1 - AGE_DEPRECIATION * (REFERENCE_YEAR - year_built)
+        subway_factor = 1 + SUBWAY_PREMIUM * np.exp(-subway_distance / SUBWAY_DECAY)
+        price_per_sqm = price_per_sqm * premium * age_factor * subway_factor
+
+    # 注入异常值：少量房源单价被放大或缩小数倍
+    if outlier_rate > 0:
+        outliers = rng.random(num_samples) < outlier_rate
+        price_per_sqm[outliers] *= rng.choice([0.2, 4.0], int(outliers.sum()))
+
+    price_per_sqm = price_per_sqm.round(0)
+    df = pd.DataFrame({
+        'title': '房源' + pd.Series(np.arange(start, start + num_samples)).astype(str),
+        'total_price': (price_per_sqm * area / 10000).round(1),
+        'price_per_sqm': price_per_sqm,
+        'district': district,
+        'area': area,
+        'layout': _LAYOUT_TABLE[rng.integers(0, 4, num_samples), rng.integers(0, 2, num_samples),
+                                rng.integers(0, 2, num_samples)],
+        'floor': _FLOOR_TABLE[rng.integers(0, 29, num_samples), rng.integers(0, 29, num_samples)],
+        'year_built': year_built,
+        'decoration': rng.choice(np.array(decoration, dtype=object), num_samples),
+        'orientation': rng.choice(np.array(orientation, dtype=object), num_samples),
+        'has_elevator': rng.choice(np.array(has_elevator, dtype=object), num_samples, p=[0.7, 0.3]),
+        'subway_distance': subway_distance,
+    })
+
+    # 引入一些缺失值
+    for col, rate in missing_rates.items():
+        if rate > 0:
+            df.loc[rng.random(num_samples) < rate, col] = np.nan
+
+    return df
+
+
+def generate_sample_data(num_samples=1000, seed=42, missing_rates=None, outlier_rate=0.0, correlated=False):
+    """
+    生成模拟的二手房数据
+    """
+    return _generate_frame(np.random.default_rng(seed), num_samples, 0, missing_rates, outlier_rate, correlated)
+
+
+def generate_sample_chunks(num_samples, chunksize=DEFAULT_CHUNKSIZE, seed=42, missing_rates=None,
+                           outlier_rate=0.0, correlated=False):
+    """
+    分块生成模拟数据，逐块返回 DataFrame
+    每块使用由种子派生的独立随机数流，结果只取决于种子和块大小
+    """
+    seeds = np.random.SeedSequence(seed).spawn((num_samples + chunksize - 1) // chunksize)
+    for i, chunk_seed in enumerate(seeds):
+        start = i * chunksize
+        yield _generate_frame(np.random.default_rng(chunk_seed), min(chunksize, num_samples - start), start,
+                              missing_rates, outlier_rate, correlated)
+
+
+def save_sample_data(df, output_path=SAMPLE_DATA_PATH):
+    """
+    保存模拟数据到CSV文件
+    """
+    # 自动创建data目录（如果不存在）
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    df.to_csv(output_path, index=False, encoding='utf-8-sig')
+
+
+def write_sample_data(output_path, num_samples, chunksize=DEFAULT_CHUNKSIZE, seed=42, missing_rates=None,
+                      outlier_rate=0.0, correlated=False):
+    """
+    分块生成模拟数据并逐块写入 CSV (或 .parquet) 文件，返回写入的行数
+    先写临时文件再原子替换；num_samples 必须为正数
+    """
+    if num_samples <= 0:
+        raise ValueError(f"生成的行数必须为正数: {num_samples}")
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    tmp_path = output_path + '.tmp'
+    parquet = output_path.endswith('.parquet')
+    writer = None
+    written = 0
+    try:
+        for chunk in generate_sample_chunks(num_samples, chunksize, seed, missing_rates, outlier_rate, correlated):
+            if parquet:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+
+                # 缺失值会使整数列变为浮点列，统一按浮点写出，保证各块的结构一致
+                chunk['year_built'] = chunk['year_built'].astype('float64')
+                table = pa.Table.from_pandas(chunk, preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(tmp_path, table.schema)
+                writer.write_table(table)
+            else:
+                chunk.to_csv(tmp_path, mode='a' if written else 'w', header=not written, index=False,
+                             encoding='utf-8' if written else 'utf-8-sig')
+            written += len(chunk)
+    finally:
+        if writer is not None:
+            writer.close()
+    os.replace(tmp_path, output_path)
+    return written
+
+
+def _parse_missing_rates(text):
+    rates = {}
+    for item in text.split(','):
+        if item.strip():
+            col, rate = item.split('=')
+            rates[col.strip()] = float(rate)
+    return rates
+
 
-df = pd.DataFrame(data)
-df['total_price'] = (df['price_per_sqm'] * df['area'] / 10000).round(1)
+if __name__ == "__main__":
+    import argparse
 
-# 引入一些缺失值
-df.loc[df.sample(frac=0.05).index, 'subway_distance'] = np.nan
-df.loc[df.sample(frac=0.03).index, 'year_built'] = np.nan
+    parser = argparse.ArgumentParser(description="生成模拟的二手房数据")
+    parser.add_argument('--rows', type=lambda v: int(float(v)), default=1000, help="生成的行数，如 1e7")
+    parser.add_argument('--seed', type=int, default=42, help="随机种子")
+    parser.add_argument('--output', default=SAMPLE_DATA_PATH, help="输出文件路径 (.csv 或 .parquet)")
+    parser.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE, help="每块生成的行数")
+    parser.add_argument('--missing', default=','.join(f'{k}={v}' for k, v in DEFAULT_MISSING_RATES.items()),
+                        help="各列缺失值比例，如 subway_distance=0.05,year_built=0.03")
+    parser.add_argument('--outlier-rate', type=float, default=0.0, help="单价异常值比例")
+    parser.add_argument('--correlated', action='store_true', help="加入区域溢价、房龄折旧和地铁距离对单价的影响")
+    args = parser.parse_args()
+    if args.rows <= 0:
+        parser.error(f"--rows 必须为正数: {args.rows}")
 
-# 保存到CSV文件 - 这里修正了拼写错误
-df.to_csv('data/chengdu_second_hand_housing_sample.csv', index=False, encoding='utf-8-sig')
-print("模拟数据已生成并保存到 'data/chengdu_second_hand_housing_sample.csv'")
\ No newline at end of file
+    rows = write_sample_data(args.output, args.rows, args.chunksize, args.seed, _parse_missing_rates(args.missing),
+                             args.outlier_rate, args.correlated)
+    print(f"模拟数据已生成并保存到 '{args.output}' ({rows} 行)")
@@ -0,0 +1,32 @@
+# gunicorn.conf.py
+# 用法: gunicorn -c gunicorn.conf.py app:server
+import os
+
+bind = os.environ.get('HOUSING_BIND', '0.0.0.0:8050')
+workers = int(os.environ.get('WEB_CONCURRENCY', 4))
+# 每个工作进程多个线程：同一页面的新请求可以在旧请求执行时到达，旧请求据此放弃过时的计算
+threads = int(os.environ.get('HOUSING_THREADS', 4))
+
+# 主进程先导入应用并加载数据，fork 出的工作进程以写时复制方式共享同一份数据
+preload_app = True
+
+
+def when_ready(server):
+    from data_store import warm_up
+    from shared_dataset import publish, shared_data_enabled
+
+    # HOUSING_SHARED_DATA=1 时先把数据集发布到共享内存，各进程挂载同一份数据
+    if shared_data_enabled():
+        from data_io import load_cleaned_data
+
+        server.log.info("已发布共享数据集版本 %s", publish(load_cleaned_data()))
+
+    # 工作进程启动前在主进程中加载数据集并构建索引
+    server.log.info("数据集预加载完成，耗时 %.2f 秒", warm_up())
+
+
+def post_fork(server, worker):
+    from data_store import start_watcher
+
+    # 热加载线程在各工作进程中启动：主进程不持有后台线程，fork 时不会有线程正持有数据层的锁
+    start_watcher()
@@ -0,0 +1,201 @@
+# incremental_cleaning.py
+"""
+增量清洗：只清洗新增或内容变化的房源，合并到已保存的清洗结果中
+
+- 每条房源按 title 标识，内容哈希覆盖原始数据的全部字段
+- 全局统计量 (填充中位数、单价 IQR 边界) 沿用上次的结果，
+  只有当新数据使其漂移超过容差时才重新全量清洗
+- 描述性分析的累积统计量 (见 incremental_stats.py) 同样只按增量更新
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_cleaning_analysis import (NUMERIC_FILL_COLUMNS, clean_frame, compute_cleaning_stats, iqr_bounds,
+                                    perform_analysis)
+from data_io import CLEANED_DATA_PATH, load_cleaned_data, save_cleaned_data
+from incremental_stats import STATS_FILE, IncrementalStats
+from quantile_sketch import QuantileSketch
+
+STATE_DIR = 'data/processed'
+STATE_FILE = 'cleaning_state.json'
+HASH_FILE = 'listing_hashes.parquet'
+# 全局统计量相对漂移的默认容差
+DEFAULT_DRIFT_TOLERANCE = 0.05
+
+SKETCH_COLUMNS = NUMERIC_FILL_COLUMNS + ['price_per_sqm']
+
+
+def listing_hashes(raw_df):
+    """
+    计算每条房源的内容哈希 (title 加全部原始字段)
+    """
+    # 数值列统一为 float64，避免缺失值有无导致 int/float 类型变化而误判为内容变化
+    normalized = raw_df.apply(lambda col: col.astype('float64') if pd.api.types.is_numeric_dtype(col) else col)
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy()
+
+
+def _state_paths(state_dir):
+    return os.path.join(state_dir, STATE_FILE), os.path.join(state_dir, HASH_FILE)
+
+
+def load_analysis_stats(state_dir=STATE_DIR):
+    """
+    读取与清洗结果对应的累积分析统计量，不存在时返回 None
+    """
+    return IncrementalStats.load(os.path.join(state_dir, STATS_FILE))
+
+
+def load_state(state_dir=STATE_DIR):
+    """
+    读取上次清洗保存的状态，不存在时返回 None
+    """
+    state_path, hash_path = _state_paths(state_dir)
+    if not (os.path.exists(state_path) and os.path.exists(hash_path)):
+        return None
+    with open(state_path, encoding='utf-8') as f:
+        state = json.load(f)
+    state['stats']['price_bounds'] = tuple(state['stats']['price_bounds'])
+    state['sketches'] = {col: QuantileSketch.from_dict(data) for col, data in state['sketches'].items()}
+    state['hashes'] = pd.read_parquet(hash_path)
+    return state
+
+
+def save_state(stats, sketches, hashes, state_dir=STATE_DIR):
+    state_path, hash_path = _state_paths(state_dir)
+    os.makedirs(state_dir, exist_ok=True)
+    hashes.to_parquet(hash_path, index=False)
+    state = {
+        'stats': {'medians': stats['medians'], 'price_bounds': list(stats['price_bounds'])},
+        'sketches': {col: sketch.to_dict() for col, sketch in sketches.items()},
+    }
+    tmp_path = state_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f, ensure_ascii=False)
+    os.replace(tmp_path, state_path)
+
+
+def build_sketches(raw_df):
+    """
+    由全部原始数据构建各列的分位数草图
+    """
+    return {col: QuantileSketch().update(raw_df[col].to_numpy(dtype=float)) for col in SKETCH_COLUMNS}
+
+
+def stats_from_sketches(sketches):
+    """
+    由原始数据的分位数草图估计全局清洗统计量
+    """
+    return {
+        'medians': {col: float(sketches[col].median()) for col in NUMERIC_FILL_COLUMNS},
+        'price_bounds': tuple(float(v) for v in iqr_bounds(*sketches['price_per_sqm'].quantile([0.25, 0.75]))),
+    }
+
+
+def stats_drift(old_stats, new_stats):
+    """
+    全局统计量的最大相对变化
+    """
+    old_values = list(old_stats['medians'].values()) + list(old_stats['price_bounds'])
+    new_values = list(new_stats['medians'].values()) + list(new_stats['price_bounds'])
+    old_values, new_values = np.asarray(old_values, dtype=float), np.asarray(new_values, dtype=float)
+    return float(np.max(np.abs(new_values - old_values) / np.maximum(np.abs(old_values), 1e-9)))
+
+
+def full_clean(raw_df, hashes, output_path, state_dir):
+    """
+    全量清洗并重建状态
+    """
+    stats = compute_cleaning_stats(raw_df)
+    sketches = build_sketches(raw_df)
+    cleaned = clean_frame(raw_df, stats)
+    save_cleaned_data(cleaned, output_path)
+    IncrementalStats().add(cleaned).save(os.path.join(state_dir, STATS_FILE))
+    save_state(stats, sketches, pd.DataFrame({'title': raw_df['title'].to_numpy(), 'hash': hashes}), state_dir)
+    print(f"全量清洗完成：{len(raw_df)} 行输入，{len(cleaned)} 行输出")
+    return cleaned
+
+
+def update_analysis_stats(analysis_stats, stale_rows, cleaned_delta, previous):
+    """
+    扣除旧记录、加入新清洗的记录；没有保存的统计量，或其行数与合并前的清洗结果不符时，
+    由合并前的完整结果重建
+    """
+    if analysis_stats is None or analysis_stats.price_moments.count != previous['price_per_sqm'].notna().sum():
+        analysis_stats = IncrementalStats().add(previous)
+    return analysis_stats.remove(stale_rows).add(cleaned_delta)
+
+
+def incremental_clean(raw_path, output_path=CLEANED_DATA_PATH, state_dir=STATE_DIR,
+                      drift_tolerance=DEFAULT_DRIFT_TOLERANCE, raw_df=None):
+    """
+    增量清洗入口，返回合并后的清洗结果
+    raw_df 为上游阶段已在内存中的原始数据 (与 raw_path 的内容相同) 时直接使用，不再读取文件
+    """
+    if raw_df is None:
+        raw_df = pd.read_csv(raw_path)
+    hashes = listing_hashes(raw_df)
+
+    state = load_state(state_dir)
+    if state is None or not os.path.exists(output_path):
+        print("未找到上次的清洗状态，执行全量清洗")
+        return full_clean(raw_df, hashes, output_path, state_dir)
+
+    # 1. 对比内容哈希，找出新增、变化和删除的房源
+    previous = state['hashes'].drop_duplicates('title', keep='last')
+    previous_titles = pd.Index(previous['title'])
+    positions = previous_titles.get_indexer(raw_df['title'])
+    is_new = positions < 0
+    changed = ~is_new & (previous['hash'].to_numpy()[positions] != hashes)
+    delta_mask = is_new | changed
+    removed_titles = previous_titles.difference(pd.Index(raw_df['title']))
+    print(f"新增 {int(is_new.sum())} 条，变化 {int(changed.sum())} 条，删除 {len(removed_titles)} 条")
+
+    if not delta_mask.any() and len(removed_titles) == 0:
+        print("数据没有变化，跳过清洗")
+        return load_cleaned_data(output_path)
+
+    # 2. 更新草图，判断全局统计量是否漂移
+    #    只有新增时把增量加入草图；有变化或删除时旧值无法从草图中扣除，由当前的原始数据重建
+    delta_df = raw_df[delta_mask]
+    if changed.any() or len(removed_titles):
+        sketches = build_sketches(raw_df)
+    else:
+        sketches = state['sketches']
+        for col in SKETCH_COLUMNS:
+            sketches[col].update(delta_df[col].to_numpy(dtype=float))
+    drift = stats_drift(state['stats'], stats_from_sketches(sketches))
+    if drift > drift_tolerance:
+        print(f"全局统计量漂移 {drift:.2%} 超过容差 {drift_tolerance:.2%}，重新全量清洗")
+        return full_clean(raw_df, hashes, output_path, state_dir)
+
+    # 3. 只清洗增量数据，沿用上次的全局统计量
+    stats = state['stats']
+    cleaned_delta = clean_frame(delta_df, stats)
+
+    # 4. 合并：去掉已删除和已变化的旧记录，追加新清洗的记录
+    stale_titles = removed_titles.union(pd.Index(raw_df.loc[changed, 'title']))
+    cleaned = load_cleaned_data(output_path)
+    is_stale = cleaned['title'].isin(stale_titles)
+    analysis_stats = update_analysis_stats(load_analysis_stats(state_dir), cleaned[is_stale], cleaned_delta, cleaned)
+    cleaned = pd.concat([cleaned[~is_stale], cleaned_delta], ignore_index=True)
+    if analysis_stats.stale_sketches:
+        analysis_stats.rebuild_sketches(cleaned)
+    save_cleaned_data(cleaned, output_path)
+    analysis_stats.save(os.path.join(state_dir, STATS_FILE))
+    save_state(stats, sketches, pd.DataFrame({'title': raw_df['title'].to_numpy(), 'hash': hashes}), state_dir)
+    print(f"增量清洗完成：清洗 {len(delta_df)} 行 (统计量漂移 {drift:.2%})，合并后共 {len(cleaned)} 行")
+    return cleaned
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="增量清洗二手房数据")
+    parser.add_argument('--input', default="data/chengdu_second_hand_housing_sample.csv", help="原始数据 CSV 路径")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_DRIFT_TOLERANCE, help="全局统计量的漂移容差")
+    args = parser.parse_args()
+    cleaned_df = incremental_clean(args.input, drift_tolerance=args.tolerance)
+    perform_analysis(cleaned_df, load_analysis_stats())
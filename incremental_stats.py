@@ -0,0 +1,271 @@
+# incremental_stats.py
+"""
+可累积的描述性统计：新增一批房源时只处理这一批，耗时与批量大小成正比
+
+- 各区域单价的计数、均值和方差按 Welford/Chan 公式合并，中位数由分位数草图估计
+- 相关系数矩阵由成对的计数、均值、平方和与协方差累积量得到，
+  缺失值按成对剔除处理，与 DataFrame.corr() 一致
+- 删除的房源从矩和协方差中精确扣除；分位数草图无法扣除，受影响的草图由 rebuild_sketches 重建
+- 全部状态可保存为 JSON，在两次运行之间沿用
+"""
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from data_cleaning_analysis import CORRELATION_FEATURES
+from quantile_sketch import DEFAULT_MAX_CENTROIDS, QuantileSketch
+
+STATS_FILE = 'analysis_stats.json'
+
+
+def _divide(numerator, denominator):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator != 0, numerator / np.where(denominator != 0, denominator, 1), 0.0)
+
+
+class Moments:
+    """
+    一列数值的计数、均值和离差平方和 (可合并，也可扣除已加入的数据)
+    """
+
+    def __init__(self, count=0.0, mean=0.0, m2=0.0):
+        self.count = float(count)
+        self.mean = float(mean)
+        self.m2 = float(m2)
+
+    @classmethod
+    def of(cls, values):
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return cls()
+        mean = values.mean()
+        return cls(len(values), mean, ((values - mean) ** 2).sum())
+
+    def merge(self, other, sign=1):
+        """
+        合并另一组矩；sign=-1 时扣除 (other 必须是已合并进来的数据)
+        """
+        count_b = sign * other.count
+        count = self.count + count_b
+        if count <= 0:
+            self.count = self.mean = self.m2 = 0.0
+            return self
+        delta = other.mean - self.mean
+        self.mean += delta * count_b / count
+        self.m2 += sign * other.m2 + delta * delta * self.count * count_b / count
+        self.count = count
+        return self
+
+    @property
+    def std(self):
+        # 样本标准差 (ddof=1)，与 pandas 一致
+        return float(np.sqrt(max(self.m2, 0.0) / (self.count - 1))) if self.count > 1 else np.nan
+
+    def to_dict(self):
+        return {'count': self.count, 'mean': self.mean, 'm2': self.m2}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['count'], data['mean'], data['m2'])
+
+
+class CovarianceAccumulator:
+    """
+    成对剔除缺失值的协方差累积量
+
+    对每对特征 (i, j) 只统计两者都不缺失的行：
+    count[i, j] 为行数，mean[i, j] 和 m2[i, j] 为这些行上特征 i 的均值和离差平方和，
+    comoment[i, j] 为两者离差乘积之和
+    """
+
+    def __init__(self, features):
+        self.features = list(features)
+        k = len(self.features)
+        self.count = np.zeros((k, k))
+        self.mean = np.zeros((k, k))
+        self.m2 = np.zeros((k, k))
+        self.comoment = np.zeros((k, k))
+
+    def _batch(self, df):
+        values = df[self.features].to_numpy(dtype=float)
+        valid = ~np.isnan(values)
+        # 先减去批内均值，减小求和时的舍入误差
+        shift = _divide(np.where(valid, values, 0.0).sum(axis=0), valid.sum(axis=0))
+        centered = np.where(valid, values - shift, 0.0)
+        weights = valid.astype(float)
+        count = weights.T @ weights
+        sums = centered.T @ weights
+        mean = _divide(sums, count)
+        m2 = (centered ** 2).T @ weights - count * mean ** 2
+        comoment = centered.T @ centered - count * mean * mean.T
+        return count, mean + shift[:, None], m2, comoment
+
+    def update(self, df, sign=1):
+        """
+        加入一批数据；sign=-1 时扣除已加入过的数据
+        """
+        count_b, mean_b, m2_b, comoment_b = self._batch(df)
+        count_b = sign * count_b
+        count = self.count + count_b
+        delta = mean_b - self.mean
+        factor = _divide(self.count * count_b, count)
+        self.mean = np.where(count > 0, self.mean + delta * _divide(count_b, count), 0.0)
+        self.m2 = np.where(count > 0, self.m2 + sign * m2_b + delta ** 2 * factor, 0.0)
+        self.comoment = np.where(count > 0, self.comoment + sign * comoment_b + delta * delta.T * factor, 0.0)
+        self.count = np.maximum(count, 0.0)
+        return self
+
+    def correlation(self):
+        """
+        相关系数矩阵 (DataFrame)，样本不足或方差为 0 时为 NaN
+        """
+        denominator = np.sqrt(np.maximum(self.m2, 0.0) * np.maximum(self.m2.T, 0.0))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = np.where((self.count > 1) & (denominator > 0), self.comoment / denominator, np.nan)
+        corr = np.clip(corr, -1.0, 1.0)
+        np.fill_diagonal(corr, np.where(np.diag(self.count > 1) & (np.diag(self.m2) > 0), 1.0, np.nan))
+        return pd.DataFrame(corr, index=self.features, columns=self.features)
+
+    def to_dict(self):
+        return {'features': self.features, 'count': self.count.tolist(), 'mean': self.mean.tolist(),
+                'm2': self.m2.tolist(), 'comoment': self.comoment.tolist()}
+
+    @classmethod
+    def from_dict(cls, data):
+        accumulator = cls(data['features'])
+        for key in ('count', 'mean', 'm2', 'comoment'):
+            setattr(accumulator, key, np.asarray(data[key], dtype=float))
+        return accumulator
+
+
+class IncrementalStats:
+    """
+    perform_analysis 所需统计量的累积状态：各区域单价统计、全市单价描述和相关系数矩阵
+    """
+
+    def __init__(self, features=CORRELATION_FEATURES, max_centroids=DEFAULT_MAX_CENTROIDS):
+        self.max_centroids = max_centroids
+        self.district_moments = {}
+        self.district_sketches = {}
+        self.price_moments = Moments()
+        self.price_sketch = QuantileSketch(max_centroids)
+        self.covariance = CovarianceAccumulator(features)
+        # 删除过数据、需要重建分位数草图的区域；None 表示全市草图
+        self.stale_sketches = set()
+
+    def _grouped_prices(self, df):
+        prices = df['price_per_sqm'].to_numpy(dtype=float)
+        codes, districts = pd.factorize(df['district'])
+        for code, district in enumerate(districts):
+            yield district, prices[codes == code]
+
+    def add(self, df):
+        """
+        加入一批新房源
+        """
+        for district, prices in self._grouped_prices(df):
+            self.district_moments.setdefault(district, Moments()).merge(Moments.of(prices))
+            self.district_sketches.setdefault(district, QuantileSketch(self.max_centroids)).update(prices)
+        prices = df['price_per_sqm'].to_numpy(dtype=float)
+        self.price_moments.merge(Moments.of(prices))
+        self.price_sketch.update(prices)
+        self.covariance.update(df)
+        return self
+
+    def remove(self, df):
+        """
+        扣除之前加入过的房源 (如已删除或内容变化的旧记录)
+        """
+        if len(df) == 0:
+            return self
+        for district, prices in self._grouped_prices(df):
+            if district in self.district_moments:
+                self.district_moments[district].merge(Moments.of(prices), sign=-1)
+                self.stale_sketches.add(district)
+        self.price_moments.merge(Moments.of(df['price_per_sqm'].to_numpy(dtype=float)), sign=-1)
+        self.stale_sketches.add(None)
+        self.covariance.update(df, sign=-1)
+        return self
+
+    def rebuild_sketches(self, df):
+        """
+        用当前的完整数据重建删除过数据的区域 (和全市) 的分位数草图
+        """
+        if None in self.stale_sketches:
+            self.price_sketch = QuantileSketch(self.max_centroids).update(df['price_per_sqm'].to_numpy(dtype=float))
+        districts = self.stale_sketches - {None}
+        if districts:
+            mask = df['district'].isin(districts).to_numpy()
+            for district, prices in self._grouped_prices(df[mask]):
+                self.district_sketches[district] = QuantileSketch(self.max_centroids).update(prices)
+            for district in districts - set(df.loc[mask, 'district'].unique()):
+                self.district_sketches[district] = QuantileSketch(self.max_centroids)
+        self.stale_sketches = set()
+        return self
+
+    def district_stats(self):
+        """
+        各区域的单价均值、中位数、数量和标准差 (列与 perform_analysis 一致)
+        """
+        rows = {district: [moments.mean, float(self.district_sketches[district].median()), int(moments.count),
+                           moments.std]
+                for district, moments in self.district_moments.items() if moments.count > 0}
+        stats = pd.DataFrame.from_dict(rows, orient='index', columns=['平均单价', '单价中位数', '房源数量', '单价标准差'])
+        stats.index.name = 'district'
+        return stats.sort_index().round(2)
+
+    def price_description(self):
+        """
+        全市单价描述，与 Series.describe() 的各项一致 (分位数为草图估计值)
+        """
+        quartiles = self.price_sketch.quantile([0.25, 0.5, 0.75])
+        return pd.Series([self.price_moments.count, self.price_moments.mean, self.price_moments.std,
+                          self.price_sketch.min, *quartiles, self.price_sketch.max],
+                         index=['count', 'mean', 'std', 'min', '25%', '50%', '75%', 'max'], name='price_per_sqm')
+
+    def correlation_matrix(self):
+        return self.covariance.correlation()
+
+    def to_dict(self):
+        return {
+            'max_centroids': self.max_centroids,
+            'districts': {str(district): {'moments': moments.to_dict(),
+                                          'sketch': self.district_sketches[district].to_dict()}
+                          for district, moments in self.district_moments.items()},
+            'price_moments': self.price_moments.to_dict(),
+            'price_sketch': self.price_sketch.to_dict(),
+            'covariance': self.covariance.to_dict(),
+            'stale_sketches': ['' if district is None else str(district) for district in self.stale_sketches],
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        stats = cls(data['covariance']['features'], data['max_centroids'])
+        for district, entry in data['districts'].items():
+            stats.district_moments[district] = Moments.from_dict(entry['moments'])
+            stats.district_sketches[district] = QuantileSketch.from_dict(entry['sketch'])
+        stats.price_moments = Moments.from_dict(data['price_moments'])
+        stats.price_sketch = QuantileSketch.from_dict(data['price_sketch'])
+        stats.covariance = CovarianceAccumulator.from_dict(data['covariance'])
+        stats.stale_sketches = {district or None for district in data['stale_sketches']}
+        return stats
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """
+        读取保存的统计状态，不存在时返回 None
+        """
+        if not os.path.exists(path):
+            return None
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
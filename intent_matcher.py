@@ -0,0 +1,296 @@
+# intent_matcher.py
+"""
+AI助手的问题解析：一次扫描用户输入，识别问题意图并提取筛选条件
+
+- 意图词表、区域名和装修类型在构建时编译为一个 Aho-Corasick 自动机，
+  无论词表多大，匹配都只需沿输入扫描一遍
+- 被更长的匹配完全覆盖的短匹配不计 (如 "不贵" 中的 "贵")；
+  多个意图同时出现时按 INTENTS 中的顺序取靠前的意图
+- 数值条件 (如 "100平以下"、"单价1.5万到2万"、"80~120平米") 转为面积和单价范围；
+  总价/预算条件 (如 "总价80万到120万") 单独提取，筛选索引不含总价，回复时说明未按总价筛选
+  与页面上的筛选条件取交集后走筛选索引 (见 filter_index.py)；交集为空时由 ParsedQuery.conflicts 说明冲突
+"""
+import re
+from collections import deque
+
+# 意图及其关键词，按优先级排列；关键词统一按小写匹配
+INTENTS = [
+    ('expensive', ['贵', '价格高', '最贵', '房价高', '高价', '高端', 'expensive', 'priciest', 'luxury']),
+    ('cheap', ['便宜', '性价比', '划算', '不贵', '实惠', '低价', '价格低', '房价低', '价格洼地',
+               'cheap', 'affordable', 'budget', 'bargain']),
+    ('decoration', ['装修', 'decoration', 'decorated', 'renovat', 'furnish']),
+    ('recommend', ['推荐', '建议', '值得买', '买哪', '选哪', 'recommend', 'suggest', 'best deal']),
+    ('trend', ['趋势', '分析', '走势', '行情', '概况', '整体', 'trend', 'overview', 'analy']),
+    ('selection', ['当前筛选', '筛选结果', '多少套', '几套', '平均', '均价', '中位数',
+                   'how many', 'average', 'median']),
+]
+
+_NUMBER = r'(\d+(?:\.\d+)?)\s*(万|w|千|k)?'
+_AREA_UNIT = r'平方米|平米|平方|平|㎡|m²|m2|sqm'
+# "/平"、"每平" 表示单价，需要排在面积单位之前匹配
+_PRICE_UNIT = r'(?:元|块)?\s*(?:/|每)\s*(?:平方米|平米|平|㎡|m²|m2|sqm)|元|块'
+_QUANTITY = re.compile(_NUMBER + r'\s*(' + _PRICE_UNIT + '|' + _AREA_UNIT + ')?')
+_SCALES = {'万': 10000, 'w': 10000, '千': 1000, 'k': 1000}
+_RANGE_JOINERS = re.compile(r'\s*(?:-|~|～|—|到|至|to)\s*')
+_AREA_WORDS = ('面积', '大小', 'area', 'size')
+_PRICE_WORDS = ('单价', '价格', '房价', '均价', '每平', 'price')
+_TOTAL_WORDS = ('总价', '预算', '总共', '一共', 'total', 'budget')
+_UPPER_PREFIXES = ('低于', '小于', '少于', '不超过', '不到', '不高于', '不大于', '最多',
+                   'below', 'under', 'less than', 'at most', '<=', '<', '≤')
+_LOWER_PREFIXES = ('高于', '大于', '多于', '超过', '至少', '不少于', '不低于', '不小于',
+                   'above', 'over', 'more than', 'at least', '>=', '>', '≥')
+_UPPER_SUFFIXES = ('以下', '以内', '之内', '内', '或以下', '及以下', '封顶', 'or less', 'below', 'max')
+_LOWER_SUFFIXES = ('以上', '之上', '或以上', '及以上', '起', '+', 'or more', 'above', 'plus', 'min')
+_APPROX_SUFFIXES = ('左右', '上下', '附近')
+_APPROX_PREFIXES = ('大约', '大概', '约', 'around', 'about')
+# "左右" 等模糊说法按上下浮动的比例处理
+APPROX_TOLERANCE = 0.1
+# 往前查找面积/单价等说明词的字符数
+_CONTEXT_CHARS = 6
+
+
+class AhoCorasick:
+    """
+    多模式字符串匹配自动机：构建一次，之后每次查找只需扫描一遍文本
+    """
+
+    def __init__(self, patterns):
+        # 每个状态的转移表、失败指针和在该状态结束的模式 (长度, 附带值)
+        self._goto = [{}]
+        self._fail = [0]
+        self._output = [[]]
+        for pattern, payload in patterns:
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append([])
+                    self._goto[node][char] = next_node
+                node = next_node
+            self._output[node].append((len(pattern), payload))
+
+        # 按广度优先顺序设置失败指针，并合并失败状态上的输出
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, next_node in self._goto[node].items():
+                queue.append(next_node)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[next_node] = self._goto[fail].get(char, 0)
+                self._output[next_node] = self._output[next_node] + self._output[self._fail[next_node]]
+
+    def find_all(self, text):
+        """
+        返回文本中所有模式的出现位置 (起点, 终点, 附带值)
+        """
+        node = 0
+        for end, char in enumerate(text, 1):
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            for length, payload in self._output[node]:
+                yield end - length, end, payload
+
+
+def _outermost(matches):
+    # 去掉被更长的匹配完全覆盖的匹配
+    return [m for m in matches
+            if not any(o[0] <= m[0] and m[1] <= o[1] and o[1] - o[0] > m[1] - m[0] for o in matches)]
+
+
+def _number_label(value):
+    # 面向用户的文字，不使用科学计数法
+    value = round(float(value), 1)
+    return f'{value:,.0f}' if value.is_integer() else f'{value:,.1f}'
+
+
+def _intersect(current, extra):
+    # 页面上的范围与问题中的范围取交集；交集为空时下限大于上限
+    low, high = current
+    if extra[0] is not None:
+        low = max(low, extra[0])
+    if extra[1] is not None:
+        high = min(high, extra[1])
+    return [low, high]
+
+
+def _describe_range(label, bounds, unit):
+    low, high = bounds
+    if low is not None and high is not None:
+        return f'{label}{_number_label(low)}-{_number_label(high)}{unit}'
+    if high is not None:
+        return f'{label}{_number_label(high)}{unit}以下'
+    if low is not None:
+        return f'{label}{_number_label(low)}{unit}以上'
+    return None
+
+
+class ParsedQuery:
+    """
+    一个问题的解析结果：意图和从问题中提取的筛选条件
+    范围的某一端为 None 表示该端不限
+    """
+
+    def __init__(self, intent=None, districts=(), decorations=(), area_range=(None, None), price_range=(None, None),
+                 total_range=(None, None)):
+        self.intent = intent
+        self.districts = list(districts)
+        self.decorations = list(decorations)
+        self.area_range = tuple(area_range)
+        self.price_range = tuple(price_range)
+        # 总价范围 (元)，只用于提示，不参与筛选
+        self.total_range = tuple(total_range)
+
+    @property
+    def has_constraints(self):
+        return bool(self.districts or self.decorations
+                    or any(v is not None for v in self.area_range + self.price_range))
+
+    def apply(self, selected_districts, selected_decorations, area_range, price_range):
+        """
+        与页面上的筛选条件合并：问题中提到的区域和装修类型代替下拉框的选择，数值范围取交集
+        """
+        return (self.districts or selected_districts,
+                self.decorations or selected_decorations,
+                _intersect(area_range, self.area_range),
+                _intersect(price_range, self.price_range))
+
+    def conflicts(self, area_range, price_range):
+        """
+        问题中的数值范围与页面上的范围没有交集时，返回 (问题中的条件, 页面上的范围) 说明的列表，
+        如 [('面积100平米以下', '面积120-200平米')]；都有交集时返回空列表
+        """
+        conflicts = []
+        for label, current, extra, unit in (('面积', area_range, self.area_range, '平米'),
+                                            ('单价', price_range, self.price_range, '元/平米')):
+            low, high = _intersect(current, extra)
+            if low > high:
+                conflicts.append((_describe_range(label, extra, unit), _describe_range(label, current, unit)))
+        return conflicts
+
+    def describe(self):
+        """
+        提取出的筛选条件的简短说明，如 "武侯区、面积100平米以下"
+        """
+        parts = self.districts + self.decorations
+        parts += [part for part in (_describe_range('面积', self.area_range, '平米'),
+                                    _describe_range('单价', self.price_range, '元/平米')) if part]
+        return '、'.join(parts)
+
+    def describe_total(self):
+        """
+        总价条件的说明，如 "总价80-120万元"；没有总价条件时返回空字符串
+        """
+        bounds = tuple(None if value is None else value / 10000 for value in self.total_range)
+        return _describe_range('总价', bounds, '万元') or ''
+
+
+class IntentMatcher:
+    """
+    由意图词表和数据集中的区域、装修类型构建的问题解析器
+    """
+
+    def __init__(self, districts=(), decorations=(), intents=INTENTS):
+        self._priority = {name: rank for rank, (name, _) in enumerate(intents)}
+        patterns = [(word.lower(), ('intent', name)) for name, words in intents for word in words]
+        for district in districts:
+            patterns.append((str(district).lower(), ('district', district)))
+            # 区域名也可省略末尾的 "区"，如 "武侯" 指 "武侯区"
+            if str(district).endswith('区') and len(str(district)) > 2:
+                patterns.append((str(district)[:-1].lower(), ('district', district)))
+        for decoration in decorations:
+            patterns.append((str(decoration).lower(), ('decoration', decoration)))
+        self._automaton = AhoCorasick(patterns)
+
+    def parse(self, text):
+        text = (text or '').lower()
+        found = list(self._automaton.find_all(text))
+        # 意图词和区域/装修名分别去掉被覆盖的短匹配
+        intents = _outermost([m for m in found if m[2][0] == 'intent'])
+        entities = _outermost([m for m in found if m[2][0] != 'intent'])
+        # 区域/装修名中的意图词 (如 "精装修" 中的 "装修") 只在没有其他意图词时才计入
+        explicit = [m for m in intents if not any(o[0] <= m[0] and m[1] <= o[1] for o in entities)]
+
+        intent = None
+        for _, _, (_, value) in explicit or intents:
+            if intent is None or self._priority[value] < self._priority[intent]:
+                intent = value
+        districts, decorations = [], []
+        for _, _, (kind, value) in entities:
+            if kind == 'district' and value not in districts:
+                districts.append(value)
+            elif kind == 'decoration' and value not in decorations:
+                decorations.append(value)
+        # 问装修影响时 (如 "精装修对房价的影响") 需要比较各装修类型，提到的装修类型不作为筛选条件
+        if intent == 'decoration':
+            decorations = []
+
+        area_range, price_range, total_range = _numeric_constraints(text)
+        return ParsedQuery(intent, districts, decorations, area_range, price_range, total_range)
+
+
+def _after_last(text, words, other_words):
+    # text 中出现 words 之一，且其后没有再出现 other_words 中的词
+    end = max((text.rfind(word) + len(word) for word in words if word in text), default=-1)
+    return end >= 0 and not any(text.rfind(word) >= end for word in other_words if word in text)
+
+
+def _quantity_dimension(scale, unit, before):
+    # 由单位判断数值是面积、单价还是总价；没有单位或单位只是 "元" 时看数值前面的说明词
+    if unit and unit not in ('元', '块'):
+        return 'price' if unit.startswith(('元', '块', '/', '每')) else 'area'
+    before = before[-_CONTEXT_CHARS:]
+    # "总价80万"、"预算100万元以内" 是总价，不是单价
+    if _after_last(before, _TOTAL_WORDS, _AREA_WORDS + _PRICE_WORDS):
+        return 'total'
+    if unit or scale:
+        return 'price'
+    if any(word in before for word in _AREA_WORDS):
+        return 'area'
+    if any(word in before for word in _PRICE_WORDS):
+        return 'price'
+    return None
+
+
+def _numeric_constraints(text):
+    """
+    从问题中提取面积、单价和总价范围，返回 ((面积下限, 面积上限), (单价下限, 单价上限), (总价下限, 总价上限))
+    """
+    quantities = []
+    for match in _QUANTITY.finditer(text):
+        number, scale, unit = match.groups()
+        value = float(number) * _SCALES.get(scale, 1)
+        unit = unit.strip() if unit else unit
+        quantities.append([match.start(), match.end(), value,
+                           _quantity_dimension(scale, unit, text[:match.start()])])
+
+    bounds = {'area': [None, None], 'price': [None, None], 'total': [None, None]}
+    index = 0
+    while index < len(quantities):
+        start, end, value, dimension = quantities[index]
+        # "a-b"、"a到b" 形式的范围：两端共用同一单位 (如 "80到120平")
+        if index + 1 < len(quantities) and _RANGE_JOINERS.fullmatch(text[end:quantities[index + 1][0]]):
+            _, high, high_dimension = quantities[index + 1][1:]
+            dimension = dimension or high_dimension
+            if dimension:
+                bounds[dimension] = [min(value, high), max(value, high)]
+            index += 2
+            continue
+
+        index += 1
+        if dimension is None:
+            continue
+        before = text[:start].rstrip()
+        after = text[end:].lstrip()
+        if before.endswith(_UPPER_PREFIXES) or after.startswith(_UPPER_SUFFIXES):
+            bounds[dimension][1] = value
+        elif before.endswith(_LOWER_PREFIXES) or after.startswith(_LOWER_SUFFIXES):
+            bounds[dimension][0] = value
+        elif before.endswith(_APPROX_PREFIXES) or after.startswith(_APPROX_SUFFIXES):
+            bounds[dimension] = [value * (1 - APPROX_TOLERANCE), value * (1 + APPROX_TOLERANCE)]
+    return tuple(bounds['area']), tuple(bounds['price']), tuple(bounds['total'])
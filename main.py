@@ -6,39 +6,84 @@
 2. 数据清洗与分析
 3. 创建可视化图表
 4. 启动Dash交互式仪表盘
+
+前三步由进程内的流水线编排 (pipeline.py)，输入未变化的阶段会被跳过，
+阶段之间直接在内存中传递 DataFrame
 """
 
 import os
-import subprocess
-import sys
+import time
 
+from pipeline import Pipeline, Stage
 
-def main():
-    print("=== 成都市二手房房价数据分析与可视化项目 ===")
+RAW_DATA_FILE = "data/chengdu_second_hand_housing_sample.csv"
+
+
+def generate_stage():
+    from generate_sample_data import generate_sample_data, save_sample_data
+
+    print("未找到数据文件，正在生成模拟数据...")
+    df = generate_sample_data()
+    save_sample_data(df, RAW_DATA_FILE)
+    return df
 
-    # 检查数据文件是否存在
-    data_file = "data/chengdu_second_hand_housing_sample.csv"
-    if not os.path.exists(data_file):
-        print("未找到数据文件，正在生成模拟数据...")
-        # 运行数据生成脚本
-        subprocess.run([sys.executable, "generate_sample_data.py"], check=True)
 
-    # 数据清洗与分析
-    print("\n1. 正在执行数据清洗与分析...")
-    subprocess.run([sys.executable, "data_cleaning_analysis.py"], check=True)
+def clean_stage(generate):
+    from data_cleaning_analysis import perform_analysis
+    from incremental_cleaning import incremental_clean, load_analysis_stats
+
+    # 增量模式：只清洗新增或变化的房源，描述性统计由累积的统计量得到
+    # 本次运行生成了数据时直接使用内存中的 DataFrame；生成阶段被跳过时 generate 为 None，从文件读取
+    cleaned_df = incremental_clean(RAW_DATA_FILE, raw_df=generate)
+    perform_analysis(cleaned_df, load_analysis_stats())
+    return cleaned_df
+
+
+def visualize_stage(clean):
+    from visualization import create_interactive_plots, create_static_plots
 
-    # 创建可视化图表
-    print("\n2. 正在创建可视化图表...")
     # 确保plots目录存在
     if not os.path.exists('plots'):
         os.makedirs('plots')
-    subprocess.run([sys.executable, "visualization.py"], check=True)
+    create_static_plots(clean)
+    create_interactive_plots(clean)
+
+
+def load_cleaned_stage():
+    from data_io import load_cleaned_data
+
+    return load_cleaned_data()
+
+
+def build_pipeline():
+    from data_io import CLEANED_DATA_PATH
+
+    return Pipeline([
+        Stage('generate', generate_stage, outputs=[RAW_DATA_FILE]),
+        Stage('clean', clean_stage, inputs=[RAW_DATA_FILE], outputs=[CLEANED_DATA_PATH],
+              deps=['generate'], load=load_cleaned_stage),
+        Stage('visualize', visualize_stage, inputs=[CLEANED_DATA_PATH],
+              outputs=['plots/district_price_boxplot.png', 'plots/interactive_district_price.html'],
+              deps=['clean']),
+    ])
+
+
+def main():
+    print("=== 成都市二手房房价数据分析与可视化项目 ===")
+    start = time.perf_counter()
+
+    pipeline = build_pipeline()
+    pipeline.run(['visualize'])
+    pipeline.print_timings()
+
+    # 启动Dash应用 (在当前进程中启动，避免重新启动解释器)
+    print("\n启动Dash交互式仪表盘...")
+    from app import app
 
-    # 启动Dash应用
-    print("\n3. 启动Dash交互式仪表盘...")
+    print(f"从启动到仪表盘就绪共耗时 {time.perf_counter() - start:.2f} 秒")
     print("请访问 http://127.0.0.1:8050 查看交互式仪表盘")
-    subprocess.run([sys.executable, "app.py"], check=True)
+    app.run(debug=False)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,190 @@
+# metrics.py
+"""
+回调耗时统计：按回调和阶段 (筛选、聚合、绘图、序列化等) 记录耗时和响应大小，
+在 /metrics 路由以 Prometheus 文本格式导出
+
+设置环境变量 HOUSING_METRICS=1 开启；未开启时装饰器直接返回原函数、span() 返回空的上下文管理器，
+不产生额外开销。设置 HOUSING_SLOW_CALLBACK_MS 后，超过该耗时的回调会连同筛选条件输出到日志
+"""
+import contextlib
+import functools
+import inspect
+import os
+import threading
+import time
+
+ENABLED = os.environ.get('HOUSING_METRICS', '').lower() in ('1', 'true', 'yes')
+# 慢回调阈值 (秒)，0 表示不记录
+SLOW_CALLBACK_SECONDS = float(os.environ.get('HOUSING_SLOW_CALLBACK_MS', 0)) / 1000
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+PAYLOAD_BUCKETS = (1e3, 1e4, 1e5, 1e6, 1e7)
+# 慢回调日志中输出的参数 (筛选条件)
+FILTER_PARAMS = ('selected_districts', 'selected_decorations', 'area_range', 'price_range',
+                 'sort_by', 'filter_query', 'user_input')
+
+_NOOP_SPAN = contextlib.nullcontext()
+
+
+class Histogram:
+    """
+    累积分桶直方图 (与 Prometheus histogram 的语义一致)
+    """
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latency = {}
+        self.payload = {}
+        self.gauges = {}
+
+    def observe_latency(self, callback, stage, seconds):
+        with self._lock:
+            histogram = self.latency.get((callback, stage))
+            if histogram is None:
+                histogram = self.latency[(callback, stage)] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(seconds)
+
+    def observe_payload(self, callback, num_bytes):
+        with self._lock:
+            histogram = self.payload.get(callback)
+            if histogram is None:
+                histogram = self.payload[callback] = Histogram(PAYLOAD_BUCKETS)
+            histogram.observe(num_bytes)
+
+    def add_gauge(self, name, help_text, read, metric_type='gauge'):
+        """
+        注册在导出时读取的指标，read() 返回当前值
+        """
+        self.gauges[name] = (help_text, read, metric_type)
+
+    @staticmethod
+    def _render_histogram(lines, name, labels, histogram):
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            lines.append(f'{name}_bucket{{{labels},le="{bound:g}"}} {count}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {histogram.count}')
+        lines.append(f'{name}_sum{{{labels}}} {histogram.sum:.6f}')
+        lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+
+    def render(self):
+        """
+        Prometheus 文本格式
+        """
+        lines = ['# HELP housing_callback_stage_seconds Dash callback latency by stage',
+                 '# TYPE housing_callback_stage_seconds histogram']
+        with self._lock:
+            for (callback, stage), histogram in sorted(self.latency.items()):
+                self._render_histogram(lines, 'housing_callback_stage_seconds',
+                                       f'callback="{callback}",stage="{stage}"', histogram)
+            lines += ['# HELP housing_callback_payload_bytes Serialized Dash callback response size',
+                      '# TYPE housing_callback_payload_bytes histogram']
+            for callback, histogram in sorted(self.payload.items()):
+                self._render_histogram(lines, 'housing_callback_payload_bytes', f'callback="{callback}"', histogram)
+        for name, (help_text, read, metric_type) in sorted(self.gauges.items()):
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {metric_type}', f'{name} {read()}']
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+class _Span:
+    __slots__ = ('callback', 'stage', 'start')
+
+    def __init__(self, callback, stage):
+        self.callback = callback
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        registry.observe_latency(self.callback, self.stage, time.perf_counter() - self.start)
+        return False
+
+
+def span(callback, stage):
+    """
+    记录一个阶段的耗时：with span('update_figures', 'filter'): ...
+    """
+    if not ENABLED:
+        return _NOOP_SPAN
+    return _Span(callback, stage)
+
+
+def _log_slow_callback(name, func, args, kwargs, elapsed):
+    try:
+        bound = inspect.signature(func).bind(*args, **kwargs).arguments
+    except TypeError:
+        bound = {}
+    state = {key: value for key, value in bound.items() if key in FILTER_PARAMS}
+    print(f"慢回调 {name} 耗时 {elapsed * 1000:.0f} ms，筛选条件: {state}")
+
+
+def instrument(name):
+    """
+    回调装饰器：记录回调总耗时，供 after_request 计算序列化耗时和响应大小
+    """
+    def decorator(func):
+        if not ENABLED:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            from flask import g, has_request_context
+
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                registry.observe_latency(name, 'total', elapsed)
+                if has_request_context():
+                    g.metrics_callback = name
+                    g.metrics_callback_seconds = elapsed
+                if SLOW_CALLBACK_SECONDS and elapsed > SLOW_CALLBACK_SECONDS:
+                    _log_slow_callback(name, func, args, kwargs, elapsed)
+        return wrapper
+    return decorator
+
+
+def init_app(server):
+    """
+    在 Flask 应用上注册请求钩子和 /metrics 路由 (未开启时不做任何事)
+    """
+    if not ENABLED:
+        return
+    from flask import Response, g
+
+    @server.before_request
+    def _start_timer():
+        g.metrics_request_start = time.perf_counter()
+
+    @server.after_request
+    def _record_response(response):
+        name = g.get('metrics_callback')
+        if name is not None and not response.direct_passthrough:
+            # 回调返回后到响应生成之间的时间主要是 Dash 的 JSON 序列化
+            total = time.perf_counter() - g.metrics_request_start
+            registry.observe_latency(name, 'serialize', max(total - g.metrics_callback_seconds, 0.0))
+            registry.observe_payload(name, len(response.get_data()))
+        return response
+
+    @server.route('/metrics')
+    def _metrics():
+        return Response(registry.render(), mimetype='text/plain; version=0.0.4')
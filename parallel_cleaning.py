@@ -0,0 +1,121 @@
+# parallel_cleaning.py
+"""
+多进程分区清洗：按分片文件 (如按区域/按天) 并行清洗
+
+1. map：各进程读取自己的分片，计算局部统计量 (分位数草图、类别取值)
+2. reduce：合并为全局统计量 (中位数、单价 IQR 边界)，与单文件清洗口径一致
+3. map：各进程用全局统计量清洗自己的分片，分别写出 Parquet 分区文件
+"""
+import argparse
+import glob
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from data_cleaning_analysis import NUMERIC_FILL_COLUMNS, clean_frame, iqr_bounds
+from data_io import CATEGORICAL_COLUMNS, save_cleaned_data
+from quantile_sketch import QuantileSketch
+
+DEFAULT_OUTPUT_DIR = 'data/cleaned_partitions'
+
+
+def partial_stats(path, max_centroids=None):
+    """
+    计算单个分片的局部统计量
+    max_centroids 为 None 时草图保存全部数值，归约后的中位数和分位数与单文件清洗完全一致
+    """
+    df = pd.read_csv(path)
+    sketches = {}
+    for col in NUMERIC_FILL_COLUMNS + ['price_per_sqm']:
+        sketches[col] = QuantileSketch(max_centroids).update(df[col].to_numpy(dtype=float))
+    category_values = {col: set(df[col].dropna().unique()) for col in CATEGORICAL_COLUMNS}
+    return {'sketches': sketches, 'categories': category_values, 'num_rows': len(df)}
+
+
+def reduce_stats(partials):
+    """
+    合并各分片的局部统计量，得到全局清洗统计量和类别集合
+    """
+    sketches = partials[0]['sketches']
+    categories = {col: set(values) for col, values in partials[0]['categories'].items()}
+    for partial in partials[1:]:
+        for col, sketch in partial['sketches'].items():
+            sketches[col].merge(sketch)
+        for col, values in partial['categories'].items():
+            categories[col].update(values)
+
+    stats = {
+        'medians': {col: float(sketches[col].median()) for col in NUMERIC_FILL_COLUMNS},
+        'price_bounds': tuple(float(v) for v in iqr_bounds(*sketches['price_per_sqm'].quantile([0.25, 0.75]))),
+    }
+    return stats, {col: sorted(values) for col, values in categories.items()}
+
+
+def partition_output_path(path, output_dir):
+    return os.path.join(output_dir, os.path.splitext(os.path.basename(path))[0] + '.parquet')
+
+
+def clean_partition(path, output_dir, stats, categories):
+    """
+    用全局统计量清洗单个分片并写出对应的分区文件
+    返回 (输入行数, 输出行数)
+    """
+    df = pd.read_csv(path)
+    cleaned = clean_frame(df, stats, categories)
+    save_cleaned_data(cleaned, partition_output_path(path, output_dir))
+    return len(df), len(cleaned)
+
+
+def clean_partitions(input_paths, output_dir=DEFAULT_OUTPUT_DIR, workers=None, max_centroids=None):
+    """
+    并行清洗多个分片文件，返回全局统计量
+    """
+    input_paths = sorted(input_paths)
+    if not input_paths:
+        raise ValueError("没有需要清洗的分片文件")
+    os.makedirs(output_dir, exist_ok=True)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # 1. map：局部统计量
+        partials = list(executor.map(partial_stats, input_paths, [max_centroids] * len(input_paths)))
+
+        # 2. reduce：全局统计量
+        stats, categories = reduce_stats(partials)
+        print(f"共 {len(input_paths)} 个分片，{sum(p['num_rows'] for p in partials)} 行")
+        for col, median_val in stats['medians'].items():
+            print(f"{col} 全局中位数: {median_val}")
+        print(f"单价异常值边界: {stats['price_bounds'][0]:.2f} - {stats['price_bounds'][1]:.2f}")
+
+        # 3. map：按全局统计量清洗并写出分区
+        n = len(input_paths)
+        results = list(executor.map(clean_partition, input_paths, [output_dir] * n, [stats] * n, [categories] * n))
+
+    num_rows = sum(r[0] for r in results)
+    num_cleaned = sum(r[1] for r in results)
+    print(f"清洗完成：保留 {num_cleaned} 行，移除异常值 {num_rows - num_cleaned} 行，分区文件已写入 '{output_dir}'")
+    return stats
+
+
+def load_partitions(output_dir=DEFAULT_OUTPUT_DIR):
+    """
+    读取全部分区文件，合并为一个DataFrame
+    目录中还有各分区的元数据文件 (*.meta.json)，只读取 Parquet 文件
+    """
+    paths = sorted(glob.glob(os.path.join(output_dir, '*.parquet')))
+    if not paths:
+        raise FileNotFoundError(f"'{output_dir}' 中没有分区文件")
+    return pd.read_parquet(paths)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="多进程分区清洗二手房数据")
+    parser.add_argument('inputs', nargs='+', help="分片 CSV 文件或通配符，如 'data/raw/*.csv'")
+    parser.add_argument('--output-dir', default=DEFAULT_OUTPUT_DIR, help="分区输出目录")
+    parser.add_argument('--workers', type=int, default=None, help="进程数，默认使用全部 CPU 核")
+    parser.add_argument('--max-centroids', type=int, default=None,
+                        help="分位数草图的质心上限；默认精确计算 (与单文件清洗结果一致)")
+    args = parser.parse_args()
+
+    paths = sorted({path for pattern in args.inputs for path in glob.glob(pattern)})
+    clean_partitions(paths, args.output_dir, args.workers, args.max_centroids)
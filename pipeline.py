@@ -0,0 +1,158 @@
+# pipeline.py
+"""
+进程内的流水线编排：按依赖关系 (DAG) 依次执行各阶段
+
+- 每个阶段声明输入文件、输出文件和上游阶段
+- 输入文件 (修改时间/大小，变化时再比对内容哈希) 和上游结果都没有变化、且输出齐全时跳过该阶段
+- 阶段之间直接在内存中传递结果 (如 DataFrame)，被跳过的阶段在下游需要时才从磁盘加载
+- 输出每个阶段的耗时
+"""
+import hashlib
+import json
+import os
+import time
+
+DEFAULT_STAMP_PATH = 'data/processed/pipeline_stamps.json'
+
+
+class Stage:
+    """
+    流水线中的一个阶段
+
+    run(**upstream_results) 执行阶段并返回结果；
+    load() 在阶段被跳过、而下游又需要其结果时从磁盘加载
+    """
+
+    def __init__(self, name, run, inputs=(), outputs=(), deps=(), load=None, always_run=False):
+        self.name = name
+        self.run = run
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.deps = list(deps)
+        self.load = load
+        self.always_run = always_run
+
+
+def _file_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class Pipeline:
+    """
+    DAG 编排器
+    """
+
+    def __init__(self, stages, stamp_path=DEFAULT_STAMP_PATH):
+        self.stages = {stage.name: stage for stage in stages}
+        self.stamp_path = stamp_path
+        self.results = {}
+        self.timings = []
+
+    def _order(self, targets):
+        # 深度优先的拓扑排序，只包含目标阶段及其上游
+        order, visiting, done = [], set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"流水线存在循环依赖: {name}")
+            visiting.add(name)
+            for dep in self.stages[name].deps:
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+            order.append(name)
+
+        for name in targets or self.stages:
+            visit(name)
+        return order
+
+    def _load_stamps(self):
+        if not os.path.exists(self.stamp_path):
+            return {}
+        with open(self.stamp_path, encoding='utf-8') as f:
+            return json.load(f)
+
+    def _save_stamps(self, stamps):
+        os.makedirs(os.path.dirname(self.stamp_path) or '.', exist_ok=True)
+        with open(self.stamp_path, 'w', encoding='utf-8') as f:
+            json.dump(stamps, f, ensure_ascii=False, indent=2)
+
+    def _input_stamps(self, stage, previous):
+        """
+        输入文件的指纹：修改时间和大小不变时直接沿用上次的内容哈希，否则重新计算
+        """
+        stamps = {}
+        previous_inputs = (previous or {}).get('inputs', {})
+        for path in stage.inputs:
+            if not os.path.exists(path):
+                stamps[path] = None
+                continue
+            stat = os.stat(path)
+            old = previous_inputs.get(path)
+            if old and old['mtime_ns'] == stat.st_mtime_ns and old['size'] == stat.st_size:
+                stamps[path] = old
+            else:
+                stamps[path] = {'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha256': _file_digest(path)}
+        return stamps
+
+    @staticmethod
+    def _same_inputs(old, new):
+        if old is None or set(old) != set(new):
+            return False
+        return all(old[path] is not None and new[path] is not None and old[path]['sha256'] == new[path]['sha256']
+                   for path in new)
+
+    def get_result(self, name):
+        """
+        获取阶段结果：优先使用内存中的结果，否则调用阶段的 load 从磁盘读取
+        """
+        if name not in self.results:
+            stage = self.stages[name]
+            self.results[name] = stage.load() if stage.load else None
+        return self.results[name]
+
+    def run(self, targets=None):
+        stamps = self._load_stamps()
+        executed = set()
+
+        for name in self._order(targets):
+            stage = self.stages[name]
+            previous = stamps.get(name)
+            input_stamps = self._input_stamps(stage, previous)
+            upstream_ran = any(dep in executed for dep in stage.deps)
+            outputs_exist = all(os.path.exists(path) for path in stage.outputs)
+
+            # 没有输入文件的阶段 (如生成数据) 只要输出存在就视为最新
+            inputs_unchanged = (not stage.inputs or
+                                self._same_inputs((previous or {}).get('inputs'), input_stamps))
+            if not stage.always_run and not upstream_ran and outputs_exist and inputs_unchanged:
+                print(f"[{name}] 已是最新，跳过")
+                self.timings.append((name, 0.0, True))
+                continue
+
+            start = time.perf_counter()
+            upstream = {dep: self.get_result(dep) for dep in stage.deps}
+            self.results[name] = stage.run(**upstream)
+            elapsed = time.perf_counter() - start
+            executed.add(name)
+            self.timings.append((name, elapsed, False))
+            print(f"[{name}] 完成，耗时 {elapsed:.2f} 秒")
+
+            if not stage.always_run:
+                # 输出可能就是下游的输入，执行后重新记录指纹
+                stamps[name] = {'inputs': self._input_stamps(stage, None)}
+                self._save_stamps(stamps)
+
+        return self.results
+
+    def print_timings(self):
+        print("\n各阶段耗时:")
+        for name, elapsed, skipped in self.timings:
+            print(f"  {name:<12} {'跳过' if skipped else f'{elapsed:.2f} 秒'}")
+        print(f"  {'合计':<12} {sum(t[1] for t in self.timings):.2f} 秒")
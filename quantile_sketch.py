@@ -0,0 +1,147 @@
+# quantile_sketch.py
+import numpy as np
+
+# 默认保留的质心数量，决定分位数精度 (误差约为 1 / DEFAULT_MAX_CENTROIDS)
+DEFAULT_MAX_CENTROIDS = 1000
+
+
+def compress_centroids(means, weights, max_centroids):
+    """
+    将 (均值, 权重) 质心压缩到不超过 max_centroids 个
+    按均值排序后切成权重相等的若干组，每组合并为一个质心
+    """
+    order = np.argsort(means, kind='stable')
+    means, weights = means[order], weights[order]
+    if max_centroids is None or len(means) <= max_centroids:
+        return means, weights
+
+    cum_before = np.cumsum(weights) - weights
+    groups = np.floor(cum_before / weights.sum() * max_centroids).astype(np.int64)
+    group_weights = np.bincount(groups, weights=weights)
+    group_sums = np.bincount(groups, weights=means * weights)
+    keep = group_weights > 0
+    return group_sums[keep] / group_weights[keep], group_weights[keep]
+
+
+def weighted_quantile(means, weights, q, min_value=None, max_value=None):
+    """
+    由质心计算分位数 (线性插值)
+    所有权重都为 1 时与 numpy/pandas 默认的 linear 插值结果完全一致
+    """
+    if len(means) == 0:
+        return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+
+    order = np.argsort(means, kind='stable')
+    means, weights = np.asarray(means, dtype=float)[order], np.asarray(weights, dtype=float)[order]
+    total = weights.sum()
+    # 每个质心代表的样本在排名空间中的中心位置
+    centers = np.cumsum(weights) - weights + (weights - 1) / 2
+
+    # 已知精确最小/最大值时补上两端，保证 q=0/q=1 的结果准确
+    if min_value is not None and centers[0] > 0:
+        centers = np.concatenate([[0.0], centers])
+        means = np.concatenate([[min_value], means])
+    if max_value is not None and centers[-1] < total - 1:
+        centers = np.concatenate([centers, [total - 1]])
+        means = np.concatenate([means, [max_value]])
+
+    return np.interp(np.asarray(q, dtype=float) * (total - 1), centers, means)
+
+
+class QuantileSketch:
+    """
+    可合并的分位数草图
+
+    - 样本数不超过 max_centroids 时保存全部数据，结果精确
+    - 超过后压缩为等权重质心，内存占用有上界
+    - 两个草图可以 merge，适合分块、分区计算后再归约
+    """
+
+    def __init__(self, max_centroids=DEFAULT_MAX_CENTROIDS, buffer_size=None):
+        self.max_centroids = max_centroids
+        self.buffer_size = buffer_size or (max_centroids or 0) * 5
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.nan
+        self.max = np.nan
+        self._buffer = []
+        self._buffered = 0
+
+    @property
+    def count(self):
+        self._flush()
+        return float(self.weights.sum())
+
+    def update(self, values):
+        """
+        加入一批数值，缺失值会被忽略
+        """
+        values = np.asarray(values, dtype=float).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return self
+        self.min = np.nanmin([self.min, values.min()])
+        self.max = np.nanmax([self.max, values.max()])
+        self._buffer.append(values)
+        self._buffered += len(values)
+        if self.max_centroids is not None and self._buffered > self.buffer_size:
+            self._flush()
+        return self
+
+    def _flush(self):
+        if not self._buffer:
+            return
+        values = np.concatenate(self._buffer)
+        self._buffer = []
+        self._buffered = 0
+        self.means, self.weights = compress_centroids(
+            np.concatenate([self.means, values]),
+            np.concatenate([self.weights, np.ones(len(values))]),
+            self.max_centroids
+        )
+
+    def merge(self, other):
+        """
+        合并另一个草图，返回自身
+        """
+        self._flush()
+        other._flush()
+        if len(other.means) == 0:
+            return self
+        self.min = np.nanmin([self.min, other.min])
+        self.max = np.nanmax([self.max, other.max])
+        self.means, self.weights = compress_centroids(
+            np.concatenate([self.means, other.means]),
+            np.concatenate([self.weights, other.weights]),
+            self.max_centroids
+        )
+        return self
+
+    def quantile(self, q):
+        self._flush()
+        return weighted_quantile(self.means, self.weights, q, self.min, self.max)
+
+    def median(self):
+        return self.quantile(0.5)
+
+    def to_dict(self):
+        """
+        转为可 JSON 序列化的字典，便于持久化
+        """
+        self._flush()
+        return {
+            'max_centroids': self.max_centroids,
+            'means': self.means.tolist(),
+            'weights': self.weights.tolist(),
+            'min': None if np.isnan(self.min) else float(self.min),
+            'max': None if np.isnan(self.max) else float(self.max),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        sketch = cls(max_centroids=data['max_centroids'])
+        sketch.means = np.asarray(data['means'], dtype=float)
+        sketch.weights = np.asarray(data['weights'], dtype=float)
+        sketch.min = np.nan if data['min'] is None else data['min']
+        sketch.max = np.nan if data['max'] is None else data['max']
+        return sketch
@@ -0,0 +1,67 @@
+# ranking_index.py
+"""
+房源推荐的排序索引：每种评分在加载数据时计算一次，并按评分从高到低保存行号
+
+查询前 k 名时沿排序索引逐块向后查找，用按位压缩的筛选结果 (np.packbits) 判断每一行是否满足条件，
+找够 k 行即停止，无需对筛选结果重新计算评分或排序。评分相同时行号靠前的优先 (与 DataFrame.nlargest 一致)
+"""
+import numpy as np
+
+DEFAULT_SCORING = 'value_ratio'
+# 沿索引查找时第一块的行数，之后每块翻倍 (筛选条件越严格，需要查找的行越多)
+FIRST_BLOCK = 256
+MAX_BLOCK = 1 << 16
+
+# 评分函数注册表：名称 -> (说明, 由 DataFrame 计算评分的函数，分数越高越靠前)
+SCORING_FUNCTIONS = {
+    'value_ratio': ('性价比', lambda df: df['area'].to_numpy(dtype=float) / df['price_per_sqm'].to_numpy(dtype=float)),
+    'low_unit_price': ('单价', lambda df: -df['price_per_sqm'].to_numpy(dtype=float)),
+    'low_total_price': ('总价', lambda df: -df['total_price'].to_numpy(dtype=float)),
+    'large_area': ('面积', lambda df: df['area'].to_numpy(dtype=float)),
+}
+
+
+def register_scoring(name, label, func):
+    """
+    注册新的评分函数 func(df) -> 与行对齐的分数数组
+    """
+    SCORING_FUNCTIONS[name] = (label, func)
+
+
+class RankingIndex:
+    """
+    各评分的排序索引；默认评分在构建时计算，其余评分在第一次使用时计算并保留
+    """
+
+    def __init__(self, df, scorings=(DEFAULT_SCORING,)):
+        self._df = df
+        self._orders = {}
+        for name in scorings:
+            self.order(name)
+
+    def order(self, scoring=DEFAULT_SCORING):
+        """
+        按评分从高到低排列的行号 (评分缺失的行不在其中)
+        """
+        if scoring not in self._orders:
+            scores = np.asarray(SCORING_FUNCTIONS[scoring][1](self._df), dtype=float)
+            order = np.argsort(-scores, kind='stable')
+            # 缺失值排在最后，直接截掉
+            self._orders[scoring] = order[:np.count_nonzero(~np.isnan(scores))]
+        return self._orders[scoring]
+
+    def top_k(self, bitmap, k, scoring=DEFAULT_SCORING):
+        """
+        返回满足筛选条件的前 k 行的行号，按评分从高到低排列
+        bitmap 为 np.packbits(筛选掩码)，第 i 行对应第 i // 8 字节从高位起的第 i % 8 位
+        """
+        order = self.order(scoring)
+        found = []
+        start, block = 0, FIRST_BLOCK
+        while len(found) < k and start < len(order):
+            rows = order[start:start + block]
+            selected = (bitmap[rows >> 3] >> (7 - (rows & 7)).astype(np.uint8)) & 1
+            found.extend(rows[selected.astype(bool)][:k - len(found)])
+            start += block
+            block = min(block * 2, MAX_BLOCK)
+        return np.asarray(found, dtype=np.int64)
@@ -0,0 +1,109 @@
+# request_coalescing.py
+"""
+回调请求合并：同一会话在短时间内连续触发的同一类计算 (如拖动滑块) 只执行最新的一次
+
+- 每个请求到达时登记为该会话、该类计算的最新请求
+- 同一会话、同一类计算的上一个请求仍在进行时 (如连续拖动滑块)，先等待一个很短的防抖间隔，
+  期间有更新的请求到达则直接放弃；单独的请求不等待，直接执行
+- 较重的计算需要先取得有限的执行名额；排队期间被新请求取代的请求不再执行，
+  服务器繁忙时也不会堆积过时的计算
+- 计算完成时已被取代的结果不再回传浏览器 (结果仍可写入缓存)
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from dash.exceptions import PreventUpdate
+
+DEFAULT_DEBOUNCE_SECONDS = float(os.environ.get('HOUSING_DEBOUNCE_MS', 80)) / 1000
+DEFAULT_MAX_CONCURRENT = int(os.environ.get('HOUSING_MAX_HEAVY_CALLBACKS', os.cpu_count() or 4))
+# 记录最新请求的会话数上限，超出时淘汰最久未活动的会话
+MAX_SESSIONS = 10000
+# 排队等待执行名额时检查是否被取代的间隔 (秒)
+POLL_INTERVAL = 0.02
+
+
+class Superseded(PreventUpdate):
+    """
+    请求已被同一会话的更新请求取代；Dash 将其视为不更新输出
+    """
+
+
+class RequestCoalescer:
+    def __init__(self, debounce=DEFAULT_DEBOUNCE_SECONDS, max_concurrent=DEFAULT_MAX_CONCURRENT):
+        self.debounce = debounce
+        self._slots = threading.BoundedSemaphore(max_concurrent)
+        self._lock = threading.Lock()
+        self._latest = OrderedDict()
+        # (会话, 计算类别) -> 进行中的请求数
+        self._in_flight = {}
+        self._counter = 0
+        self.superseded = 0
+
+    def begin(self, session_id, channel):
+        """
+        登记一个新请求并返回其序号
+        """
+        with self._lock:
+            self._counter += 1
+            key = (session_id, channel)
+            self._latest[key] = self._counter
+            self._latest.move_to_end(key)
+            while len(self._latest) > MAX_SESSIONS:
+                self._latest.popitem(last=False)
+            return self._counter
+
+    def is_superseded(self, session_id, channel, token):
+        with self._lock:
+            latest = self._latest.get((session_id, channel))
+        return latest is not None and latest != token
+
+    def check(self, session_id, channel, token):
+        """
+        请求已被取代时抛出 Superseded
+        """
+        if session_id is not None and self.is_superseded(session_id, channel, token):
+            with self._lock:
+                self.superseded += 1
+            raise Superseded()
+
+    @contextmanager
+    def slot(self, session_id, channel, token=None):
+        """
+        取得执行名额后执行 with 语句块，期间被取代时抛出 Superseded
+        同一会话的上一个请求仍在进行时先防抖；没有会话标识时不做合并，只限制并发
+        token 为已由 begin 登记的序号 (如先查缓存、未命中才计算的回调)，为 None 时在这里登记
+        """
+        if session_id is None:
+            token, busy = None, False
+        else:
+            key = (session_id, channel)
+            with self._lock:
+                busy = self._in_flight.get(key, 0) > 0
+                self._in_flight[key] = self._in_flight.get(key, 0) + 1
+            if token is None:
+                token = self.begin(session_id, channel)
+        try:
+            if busy and self.debounce > 0:
+                time.sleep(self.debounce)
+            self.check(session_id, channel, token)
+            while not self._slots.acquire(timeout=POLL_INTERVAL):
+                self.check(session_id, channel, token)
+            try:
+                self.check(session_id, channel, token)
+                yield token
+            finally:
+                self._slots.release()
+        finally:
+            if session_id is not None:
+                self._leave(key)
+
+    def _leave(self, key):
+        with self._lock:
+            remaining = self._in_flight[key] - 1
+            if remaining:
+                self._in_flight[key] = remaining
+            else:
+                del self._in_flight[key]
@@ -0,0 +1,98 @@
+# result_cache.py
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def make_filter_key(selected_districts, selected_decorations, area_range, price_range):
+    """
+    将筛选条件规范化为可哈希的元组：类别去重排序，范围统一转为浮点数
+    """
+    return (
+        tuple(sorted(set(selected_districts or []))),
+        tuple(sorted(set(selected_decorations or []))),
+        tuple(float(v) for v in area_range),
+        tuple(float(v) for v in price_range),
+    )
+
+
+def file_fingerprint(path):
+    """
+    数据文件指纹 (修改时间 + 大小)，文件不存在时返回 None
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+class ResultCache:
+    """
+    带容量和过期时间的LRU缓存，数据文件变化时自动清空
+    """
+
+    def __init__(self, maxsize=128, ttl=600, source_path=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.source_path = source_path
+        self._source_fingerprint = file_fingerprint(source_path) if source_path else None
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _check_source(self):
+        # 数据文件被重新生成后，旧的计算结果全部失效
+        if self.source_path is None:
+            return
+        fingerprint = file_fingerprint(self.source_path)
+        if fingerprint != self._source_fingerprint:
+            self._entries.clear()
+            self._source_fingerprint = fingerprint
+
+    def get(self, key):
+        """
+        命中返回缓存值，未命中或已过期返回 None
+        """
+        with self._lock:
+            self._check_source()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            stored_at, value = entry
+            if self.ttl is not None and time.monotonic() - stored_at > self.ttl:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._check_source()
+            self._entries[key] = (time.monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """
+        先查缓存，未命中时调用 compute() 计算并写入缓存
+        """
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
@@ -0,0 +1,109 @@
+# scatter_render.py
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+# 点数超过该阈值时改用 WebGL 渲染
+WEBGL_THRESHOLD = 5000
+# 点数超过该阈值时不再下发原始点，改为服务端分箱后的密度热力图
+DENSITY_THRESHOLD = 200000
+# 密度热力图每个坐标轴的分箱数
+DENSITY_BINS = 200
+
+
+def scatter_render_mode(num_points):
+    """
+    根据点数选择渲染方式：'svg'、'webgl' 或 'density'
+    """
+    if num_points > DENSITY_THRESHOLD:
+        return 'density'
+    if num_points > WEBGL_THRESHOLD:
+        return 'webgl'
+    return 'svg'
+
+
+def density_heatmap(df, x, y, x_range=None, y_range=None, nbins=DENSITY_BINS, title=None, labels=None):
+    """
+    服务端二维分箱，只下发 nbins x nbins 的计数矩阵
+    x_range/y_range 为当前可视范围，缩放后按新范围重新分箱
+    """
+    labels = labels or {}
+    x_values = df[x].to_numpy(dtype=float)
+    y_values = df[y].to_numpy(dtype=float)
+    valid = ~(np.isnan(x_values) | np.isnan(y_values))
+    x_values, y_values = x_values[valid], y_values[valid]
+
+    if x_range is None:
+        x_range = (x_values.min(), x_values.max()) if len(x_values) else (0, 1)
+    if y_range is None:
+        y_range = (y_values.min(), y_values.max()) if len(y_values) else (0, 1)
+
+    counts, x_edges, y_edges = np.histogram2d(x_values, y_values, bins=nbins, range=[x_range, y_range])
+    # 空箱子显示为透明
+    z = np.where(counts.T > 0, counts.T, np.nan)
+
+    fig = go.Figure(go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=z,
+        colorscale='Viridis',
+        colorbar={'title': '房源数量'},
+        hovertemplate=f"{labels.get(x, x)}: %{{x:.0f}}<br>{labels.get(y, y)}: %{{y:.0f}}<br>房源数量: %{{z}}<extra></extra>"
+    ))
+    fig.update_layout(
+        title=title,
+        xaxis={'title': labels.get(x, x), 'range': list(x_range)},
+        yaxis={'title': labels.get(y, y), 'range': list(y_range)},
+    )
+    return fig
+
+
+def build_area_price_scatter(df, x_range=None, y_range=None):
+    """
+    仪表盘中的面积-单价散点图，按点数自动切换渲染方式
+    """
+    title = '面积与单价关系'
+    labels = {'area': '面积 (平米)', 'price_per_sqm': '单价 (元/平米)', 'district': '区域'}
+    mode = scatter_render_mode(len(df))
+
+    if mode == 'density':
+        fig = density_heatmap(df, 'area', 'price_per_sqm', x_range, y_range, title=title, labels=labels)
+    else:
+        fig = px.scatter(df, x='area', y='price_per_sqm', color='district',
+                         hover_data=['layout', 'decoration', 'year_built'],
+                         title=title, labels=labels, render_mode=mode)
+    fig.update_layout(plot_bgcolor='rgba(0,0,0,0)', paper_bgcolor='rgba(0,0,0,0)')
+    return fig
+
+
+def build_bubble_chart(df):
+    """
+    静态导出的面积、区域、房龄与单价气泡图，按点数自动切换渲染方式
+    """
+    title = '面积、区域、房龄与单价的关系'
+    labels = {'area': '面积 (平米)', 'price_per_sqm': '单价 (元/平米)', 'district': '区域', 'house_age': '房龄'}
+    mode = scatter_render_mode(len(df))
+
+    if mode == 'density':
+        return density_heatmap(df, 'area', 'price_per_sqm', title=title, labels=labels)
+    return px.scatter(df, x='area', y='price_per_sqm', color='district',
+                      size='house_age', hover_data=['layout', 'decoration'],
+                      title=title, labels=labels, render_mode=mode)
+
+
+def parse_relayout_ranges(relayout_data):
+    """
+    从 relayoutData 中解析缩放后的坐标范围
+    返回 (x_range, y_range)，未缩放或双击复位的轴返回 None
+    """
+    relayout_data = relayout_data or {}
+    ranges = []
+    for axis in ('xaxis', 'yaxis'):
+        if f'{axis}.range[0]' in relayout_data and f'{axis}.range[1]' in relayout_data:
+            ranges.append((float(relayout_data[f'{axis}.range[0]']), float(relayout_data[f'{axis}.range[1]'])))
+        elif f'{axis}.range' in relayout_data:
+            low, high = relayout_data[f'{axis}.range']
+            ranges.append((float(low), float(high)))
+        else:
+            ranges.append(None)
+    return tuple(ranges)
@@ -28,11 +28,12 @@ setup(
     ],
     python_requires=">=3.8",
     install_requires=[
-        "dash>=2.0.0",
+        "dash>=2.9.0",
         "pandas>=1.3.0",
         "numpy>=1.21.0",
         "plotly>=5.0.0",
         "flask>=2.0.0",
+        "pyarrow>=7.0.0",
     ],
     extras_require={
         "dev": [
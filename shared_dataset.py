@@ -0,0 +1,132 @@
+# shared_dataset.py
+"""
+多进程共享的数据集：把清洗后的数据按列发布为内存映射文件 (默认放在 /dev/shm 共享内存中)
+
+- 数值列直接保存为 .npy；类别列和字符串列保存类别编码 (.npy) 和类别取值 (.json)
+- 各工作进程以只读内存映射方式挂载，多个进程共享同一份物理内存
+- 每次发布写入新的版本目录，最后原子替换 CURRENT 指针文件；
+  已挂载旧版本的进程不受影响，下次挂载时切换到新版本
+"""
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = 'manifest.json'
+# 发布新版本后保留的旧版本数 (仍被挂载的旧版本在 Linux 上删除后依然可用)
+KEEP_VERSIONS = 2
+
+
+def default_shared_dir():
+    """
+    共享数据目录：优先使用环境变量 HOUSING_SHARED_DATA_DIR，其次 /dev/shm，最后退回 data/shared
+    """
+    if os.environ.get('HOUSING_SHARED_DATA_DIR'):
+        return os.environ['HOUSING_SHARED_DATA_DIR']
+    if os.path.isdir('/dev/shm'):
+        return '/dev/shm/chengdu_housing'
+    return 'data/shared'
+
+
+def shared_data_enabled():
+    return os.environ.get('HOUSING_SHARED_DATA', '').lower() in ('1', 'true', 'yes')
+
+
+def current_version(base_dir=None):
+    """
+    当前发布的版本号，尚未发布时返回 None
+    """
+    base_dir = base_dir or default_shared_dir()
+    try:
+        with open(os.path.join(base_dir, CURRENT_FILE), encoding='utf-8') as f:
+            return f.read().strip() or None
+    except OSError:
+        return None
+
+
+def publish(df, base_dir=None):
+    """
+    把DataFrame发布为新版本的共享数据集，返回版本号
+    """
+    base_dir = base_dir or default_shared_dir()
+    version = f"v{time.time_ns()}"
+    version_dir = os.path.join(base_dir, version)
+    os.makedirs(version_dir)
+
+    columns = []
+    for col in df.columns:
+        series = df[col]
+        entry = {'name': col, 'file': f'{len(columns)}.npy'}
+        if series.dtype.kind in 'biuf':
+            np.save(os.path.join(version_dir, entry['file']), series.to_numpy())
+            entry['kind'] = 'numeric'
+        else:
+            # 类别列和字符串列统一按编码保存，编码使用 pandas 自身选择的最小整数类型
+            categorical = series if series.dtype.name == 'category' else series.astype('category')
+            np.save(os.path.join(version_dir, entry['file']), categorical.cat.codes.to_numpy())
+            entry['kind'] = 'categorical'
+            entry['categories_file'] = f'{len(columns)}.categories.json'
+            with open(os.path.join(version_dir, entry['categories_file']), 'w', encoding='utf-8') as f:
+                json.dump([str(v) for v in categorical.cat.categories], f, ensure_ascii=False)
+        columns.append(entry)
+
+    with open(os.path.join(version_dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+        json.dump({'version': version, 'num_rows': len(df), 'columns': columns}, f, ensure_ascii=False)
+
+    # 原子切换版本指针
+    tmp_path = os.path.join(base_dir, CURRENT_FILE + '.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(version)
+    os.replace(tmp_path, os.path.join(base_dir, CURRENT_FILE))
+
+    _remove_old_versions(base_dir, version)
+    return version
+
+
+def _remove_old_versions(base_dir, current):
+    versions = sorted(name for name in os.listdir(base_dir)
+                      if name.startswith('v') and os.path.isdir(os.path.join(base_dir, name)) and name != current)
+    for name in versions[:-KEEP_VERSIONS] if KEEP_VERSIONS else versions:
+        shutil.rmtree(os.path.join(base_dir, name), ignore_errors=True)
+
+
+def attach(base_dir=None, version=None):
+    """
+    以只读内存映射方式挂载共享数据集，返回 (DataFrame, 版本号)
+    数值列和类别编码不复制，直接引用共享内存
+    """
+    import pandas as pd
+
+    base_dir = base_dir or default_shared_dir()
+    version = version or current_version(base_dir)
+    if version is None:
+        raise FileNotFoundError(f"共享数据集尚未发布: {base_dir}")
+    version_dir = os.path.join(base_dir, version)
+    with open(os.path.join(version_dir, MANIFEST_FILE), encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    data = {}
+    for entry in manifest['columns']:
+        values = np.load(os.path.join(version_dir, entry['file']), mmap_mode='r')
+        if entry['kind'] == 'categorical':
+            with open(os.path.join(version_dir, entry['categories_file']), encoding='utf-8') as f:
+                categories = json.load(f)
+            data[entry['name']] = pd.Categorical.from_codes(values, categories=categories)
+        else:
+            data[entry['name']] = values
+    return pd.DataFrame(data, copy=False), version
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from data_io import load_cleaned_data
+
+    parser = argparse.ArgumentParser(description="发布清洗后的数据集到共享内存")
+    parser.add_argument('--dir', default=None, help="共享数据目录 (默认 /dev/shm/chengdu_housing)")
+    args = parser.parse_args()
+    published = publish(load_cleaned_data(), args.dir)
+    print(f"已发布共享数据集版本 {published} 到 '{args.dir or default_shared_dir()}'")
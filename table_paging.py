@@ -0,0 +1,114 @@
+# table_paging.py
+import math
+
+# DataTable 自定义筛选语法支持的运算符 (与前端 filter_query 的写法保持一致)
+FILTER_OPERATORS = [
+    ['ge ', '>='],
+    ['le ', '<='],
+    ['lt ', '<'],
+    ['gt ', '>'],
+    ['ne ', '!='],
+    ['eq ', '='],
+    ['contains '],
+    ['datestartswith '],
+]
+
+
+def split_filter_part(filter_part):
+    """
+    解析单个筛选条件，例如 "{area} >= 100"
+    返回 (列名, 运算符, 值)，无法解析时返回 [None] * 3
+    """
+    for operator_group in FILTER_OPERATORS:
+        for operator in operator_group:
+            if operator in filter_part:
+                name_part, value_part = filter_part.split(operator, 1)
+                name = name_part[name_part.find('{') + 1: name_part.rfind('}')]
+
+                value_part = value_part.strip()
+                v0 = value_part[0] if value_part else ''
+                if v0 and v0 == value_part[-1] and v0 in ("'", '"', '`'):
+                    value = value_part[1: -1].replace('\\' + v0, v0)
+                else:
+                    try:
+                        value = float(value_part)
+                    except ValueError:
+                        value = value_part
+
+                # 统一使用第一种写法作为运算符名称
+                return name, operator_group[0].strip(), value
+
+    return [None] * 3
+
+
+def apply_filter_query(df, filter_query):
+    """
+    将 DataTable 的 filter_query 下推到服务端的DataFrame上执行
+    """
+    from pandas.api.types import is_numeric_dtype
+
+    if not filter_query:
+        return df
+
+    for filter_part in filter_query.split(' && '):
+        col_name, operator, filter_value = split_filter_part(filter_part)
+        if col_name not in df.columns:
+            continue
+
+        column = df[col_name]
+        if operator in ('eq', 'ne', 'lt', 'le', 'gt', 'ge'):
+            # 分类列按字符串比较，数值列按数值比较
+            if not is_numeric_dtype(column):
+                column = column.astype(str)
+                filter_value = _format_value(filter_value)
+            elif isinstance(filter_value, str):
+                continue
+            df = df.loc[getattr(column, operator)(filter_value)]
+        elif operator == 'contains':
+            df = df.loc[column.astype(str).str.contains(_format_value(filter_value), regex=False)]
+        elif operator == 'datestartswith':
+            df = df.loc[column.astype(str).str.startswith(_format_value(filter_value))]
+
+    return df
+
+
+def _format_value(value):
+    # 数值型筛选值转成字符串时去掉多余的 ".0"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def query_table_page(df, page_current, page_size, sort_by=None, filter_query='', columns=None):
+    """
+    服务端分页：先筛选、再排序，最后只物化当前页 (及表格展示列) 的记录
+    页码超出筛选后的总页数时截断到最后一页；返回 (当前页记录, 总页数, 实际页码)
+    """
+    from pandas.api.types import is_numeric_dtype
+
+    df = apply_filter_query(df, filter_query)
+
+    page_count = max(1, math.ceil(len(df) / page_size))
+    page_current = min(page_current or 0, page_count - 1)
+    start = page_current * page_size
+    stop = start + page_size
+
+    if sort_by:
+        column = sort_by[0]['column_id']
+        if len(sort_by) == 1 and is_numeric_dtype(df[column]) and not df[column].hasnans:
+            # 单列数值排序只需要前 stop 行，用部分排序代替整体排序
+            if sort_by[0]['direction'] == 'asc':
+                df = df.nsmallest(stop, column, keep='first')
+            else:
+                df = df.nlargest(stop, column, keep='first')
+        else:
+            df = df.sort_values(
+                [col['column_id'] for col in sort_by],
+                ascending=[col['direction'] == 'asc' for col in sort_by],
+                kind='mergesort'
+            )
+
+    page_df = df.iloc[start:stop]
+    if columns is not None:
+        page_df = page_df[columns]
+    return page_df.to_dict('records'), page_count, page_current
@@ -0,0 +1,27 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+# 模块都在仓库根目录下，直接以脚本方式组织，测试时加入导入路径
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_cleaning_analysis import clean_frame, compute_cleaning_stats  # noqa: E402
+from generate_sample_data import generate_sample_data  # noqa: E402
+
+
+@pytest.fixture
+def raw_df():
+    """
+    小规模的原始模拟数据 (不超过分位数草图的质心数，草图结果是精确值)
+    """
+    return generate_sample_data(600, seed=7)
+
+
+@pytest.fixture
+def cleaned_df(raw_df):
+    """
+    清洗后的模拟数据，行号从 0 开始
+    """
+    return clean_frame(raw_df, compute_cleaning_stats(raw_df)).reset_index(drop=True)
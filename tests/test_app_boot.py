@@ -0,0 +1,18 @@
+# tests/test_app_boot.py
+import os
+import subprocess
+import sys
+
+from data_io import save_cleaned_data
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_app_import_does_not_load_pandas(cleaned_df, tmp_path):
+    # 仪表盘启动时只读取元数据，pandas 在第一次回调时才导入
+    save_cleaned_data(cleaned_df, str(tmp_path / 'data' / 'chengdu_housing_cleaned.parquet'))
+    env = dict(os.environ, PYTHONPATH=REPO_ROOT, HOUSING_RELOAD_INTERVAL='0')
+    code = "import sys, app; print(sorted({'pandas', 'pyarrow'} & set(sys.modules)))"
+    result = subprocess.run([sys.executable, '-c', code], cwd=tmp_path, env=env, capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip().splitlines()[-1] == '[]'
@@ -0,0 +1,60 @@
+# tests/test_assistant_jobs.py
+import threading
+import time
+
+import pytest
+
+from assistant_jobs import DONE, FAILED, PENDING, UNKNOWN, JobQueue, QueueFull
+
+
+def test_fast_job_returns_within_wait():
+    queue = JobQueue(workers=1)
+    job_id = queue.submit(lambda a, b=0: a + b, 1, b=2)
+    assert queue.wait(job_id, timeout=1) == (DONE, 3)
+    # 结果取走后不再保留
+    assert queue.poll(job_id) == (UNKNOWN, None)
+
+
+def test_slow_job_is_polled_until_done():
+    queue = JobQueue(workers=1)
+    release = threading.Event()
+    job_id = queue.submit(lambda: release.wait(2) and 'ok')
+    assert queue.wait(job_id, timeout=0.05) == (PENDING, None)
+    assert queue.pending == 1
+    release.set()
+    assert queue.wait(job_id, timeout=1) == (DONE, 'ok')
+    assert queue.pending == 0
+
+
+def test_failed_job_returns_exception():
+    queue = JobQueue(workers=1)
+
+    def fail():
+        raise ValueError('bad')
+
+    status, error = queue.wait(queue.submit(fail), timeout=1)
+    assert status == FAILED and isinstance(error, ValueError)
+
+
+def test_queue_full_is_rejected():
+    queue = JobQueue(workers=1, max_pending=2)
+    release = threading.Event()
+    jobs = [queue.submit(release.wait, 2) for _ in range(2)]
+    with pytest.raises(QueueFull):
+        queue.submit(release.wait, 2)
+    assert queue.rejected == 1 and queue.submitted == 2
+    release.set()
+    for job_id in jobs:
+        assert queue.wait(job_id, timeout=1)[0] == DONE
+    queue.submit(lambda: None)
+
+
+def test_unclaimed_results_expire():
+    queue = JobQueue(workers=1, ttl=0.05)
+    job_id = queue.submit(lambda: 'stale')
+    queue._jobs[job_id][0].result(1)
+    time.sleep(0.1)
+    # 提交新任务时清理超时未取走的结果
+    queue.submit(lambda: None)
+    assert queue.poll(job_id) == (UNKNOWN, None)
+    assert queue.poll('no-such-job') == (UNKNOWN, None)
@@ -0,0 +1,31 @@
+# tests/test_benchmark.py
+import time
+
+from benchmark import compare_with_baseline, measure
+
+
+def test_measure_excludes_warm_up_call():
+    calls = []
+
+    def func():
+        # 第一次调用模拟延迟导入等一次性开销
+        time.sleep(0.2 if not calls else 0.0)
+        calls.append(1)
+        return len(calls)
+
+    result, elapsed, peak = measure(func, repeat=3, trace_memory=True)
+    assert len(calls) == 4 and result == 4
+    assert elapsed < 0.1
+    assert peak is not None
+
+    calls.clear()
+    _, _, peak = measure(func, repeat=2, trace_memory=False)
+    assert len(calls) == 3 and peak is None
+
+
+def test_compare_with_baseline_ignores_small_differences():
+    baseline = {'results': {'1000': {'clean': {'seconds': 0.050, 'peak_memory_mb': 10.0}}}}
+    noisy = {'results': {'1000': {'clean': {'seconds': 0.055, 'peak_memory_mb': 10.2}}}}
+    slow = {'results': {'1000': {'clean': {'seconds': 0.200, 'peak_memory_mb': 10.0}}}}
+    assert compare_with_baseline(noisy, baseline) == []
+    assert [item['step'] for item in compare_with_baseline(slow, baseline)] == ['clean']
@@ -0,0 +1,67 @@
+# tests/test_data_cube.py
+import numpy as np
+import pytest
+
+from data_cleaning_analysis import clean_frame, compute_cleaning_stats
+from data_cube import DataCube
+from generate_sample_data import generate_sample_data
+
+
+@pytest.fixture(scope='module')
+def df():
+    raw = generate_sample_data(5000, seed=11)
+    return clean_frame(raw, compute_cleaning_stats(raw)).reset_index(drop=True)
+
+
+def _random_selection(df, rng):
+    districts = df['district'].unique()
+    decorations = df['decoration'].unique()
+    area_min, price_min = df['area'].min(), df['price_per_sqm'].min()
+    if rng.random() < 0.5:
+        # 与滑块一致的分箱边界
+        area_range = sorted(area_min + 10 * rng.integers(0, 17, 2))
+        price_range = sorted(price_min + 1000 * rng.integers(0, 40, 2))
+    else:
+        area_range = sorted(rng.uniform(40, 210, 2))
+        price_range = sorted(rng.uniform(3000, 40000, 2))
+    return (list(rng.choice(districts, rng.integers(0, len(districts) + 1), replace=False)),
+            list(rng.choice(decorations, rng.integers(1, len(decorations) + 1), replace=False)),
+            list(area_range), list(price_range))
+
+
+def test_query_matches_pandas(df):
+    cube = DataCube(df)
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        districts, decorations, area_range, price_range = selection = _random_selection(df, rng)
+        filtered = df[df['district'].isin(districts) & df['decoration'].isin(decorations)
+                      & df['area'].between(*area_range) & df['price_per_sqm'].between(*price_range)]
+        prices = filtered['price_per_sqm']
+        result = cube.query(*selection)
+
+        assert result.count == len(filtered)
+        if not len(filtered):
+            assert np.isnan(result.mean) and np.isnan(result.median)
+            continue
+        assert result.mean == pytest.approx(prices.mean())
+        assert result.min == prices.min() and result.max == prices.max()
+        if len(filtered) > 1:
+            assert result.std == pytest.approx(prices.std(), rel=1e-6)
+        district_means = filtered.groupby('district', observed=True)['price_per_sqm'].mean()
+        np.testing.assert_allclose(result.district_means().reindex(district_means.index), district_means)
+        decoration_means = filtered.groupby('decoration', observed=True)['price_per_sqm'].mean()
+        np.testing.assert_allclose(result.decoration_means().reindex(decoration_means.index), decoration_means)
+        edges, counts = result.price_histogram()
+        assert counts.sum() == len(filtered)
+        assert edges[0] <= prices.min() and prices.max() < edges[-1]
+        # 中位数由单元格质心估计，排名误差很小
+        low, high = prices.quantile([0.4, 0.6])
+        assert low - 1e-6 <= result.median <= high + 1e-6
+
+
+def test_query_outside_data_range_is_empty(df):
+    cube = DataCube(df)
+    result = cube.query(list(df['district'].unique()), list(df['decoration'].unique()), [1e6, 2e6], [0, 1e9])
+    assert result.count == 0
+    assert np.isnan(result.min) and np.isnan(result.quantile(0.5))
+    assert len(result.district_means()) == 0
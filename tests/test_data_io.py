@@ -0,0 +1,71 @@
+# tests/test_data_io.py
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_io import CleanedDataWriter, load_cleaned_data, load_metadata, metadata_path
+
+
+def _chunks(cleaned_df):
+    first = cleaned_df.iloc[:200].copy()
+    first['year_built'] = first['year_built'].round().astype('int64')
+    # 后续分块的整数列填充了非整数的中位数，且类别取值与第一块不同
+    second = cleaned_df.iloc[200:400].copy()
+    second['year_built'] = second['year_built'].astype(float)
+    second.iloc[0, second.columns.get_loc('year_built')] = 2005.5
+    second = second[second['district'] != first['district'].iloc[0]]
+    third = cleaned_df.iloc[400:].copy()
+    third.iloc[0, third.columns.get_loc('subway_distance')] = np.nan
+    return [first, cleaned_df.iloc[:0], second, third]
+
+
+def test_chunks_with_different_dtypes(cleaned_df, tmp_path):
+    path = str(tmp_path / 'cleaned.parquet')
+    chunks = _chunks(cleaned_df)
+    with CleanedDataWriter(path, export_csv=True, csv_path=str(tmp_path / 'cleaned.csv')) as writer:
+        for chunk in chunks:
+            writer.write(chunk)
+
+    expected = pd.concat(chunks, ignore_index=True)
+    loaded = load_cleaned_data(path)
+    assert writer.rows_written == len(expected) == len(loaded)
+    assert loaded['year_built'].dtype == 'float64'
+    assert loaded['year_built'].iloc[200] == 2005.5
+    np.testing.assert_array_equal(loaded['district'].astype(str), expected['district'].astype(str))
+    np.testing.assert_allclose(loaded['price_per_sqm'], expected['price_per_sqm'])
+    assert len(pd.read_csv(tmp_path / 'cleaned.csv')) == len(expected)
+
+    metadata = load_metadata(path)
+    assert metadata['num_rows'] == len(expected)
+    assert metadata['district'] == sorted(expected['district'].astype(str).unique())
+    assert metadata['price_per_sqm_max'] == expected['price_per_sqm'].max()
+
+
+def test_no_rows_keeps_existing_file(cleaned_df, tmp_path):
+    path = str(tmp_path / 'cleaned.parquet')
+    with CleanedDataWriter(path) as writer:
+        writer.write(cleaned_df.iloc[:0])
+    assert writer.rows_written == 0
+    assert not os.path.exists(path) and not os.path.exists(path + '.tmp')
+
+    with CleanedDataWriter(path) as writer:
+        writer.write(cleaned_df)
+    with CleanedDataWriter(path) as writer:
+        pass
+    assert len(load_cleaned_data(path)) == len(cleaned_df)
+
+
+def test_error_discards_partial_output(cleaned_df, tmp_path):
+    path = str(tmp_path / 'cleaned.parquet')
+    with CleanedDataWriter(path) as writer:
+        writer.write(cleaned_df)
+
+    with pytest.raises(RuntimeError):
+        with CleanedDataWriter(path) as writer:
+            writer.write(cleaned_df.iloc[:10])
+            raise RuntimeError('中断')
+    assert len(load_cleaned_data(path)) == len(cleaned_df)
+    assert not os.path.exists(path + '.tmp')
+    assert os.path.exists(metadata_path(path))
@@ -0,0 +1,50 @@
+# tests/test_data_store.py
+import os
+import threading
+import time
+
+import pytest
+
+import data_store
+from data_io import save_cleaned_data
+
+
+@pytest.fixture
+def data_dir(cleaned_df, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(data_store, '_snapshot', None)
+    # 测试中不启动热加载线程
+    monkeypatch.setattr(data_store, '_watcher_pid', os.getpid())
+    save_cleaned_data(cleaned_df)
+    return tmp_path
+
+
+def test_reload_waits_for_initial_load(data_dir, monkeypatch):
+    loads = []
+    original = data_store.load_snapshot
+    first_load_started = threading.Event()
+
+    def slow_load():
+        loads.append(threading.current_thread().name)
+        first_load_started.set()
+        time.sleep(0.2)
+        return original()
+
+    monkeypatch.setattr(data_store, 'load_snapshot', slow_load)
+    loader = threading.Thread(target=data_store._current_snapshot)
+    loader.start()
+    first_load_started.wait(1)
+    # 首次加载进行中，热加载线程不应再并行加载同一版本
+    assert data_store.reload_snapshot() is False
+    loader.join()
+    assert len(loads) == 1
+    assert data_store.reload_snapshot() is False
+
+
+def test_reload_replaces_snapshot_on_new_version(data_dir, cleaned_df):
+    snapshot = data_store._current_snapshot()
+    assert len(snapshot.df) == len(cleaned_df)
+    save_cleaned_data(cleaned_df.iloc[:100])
+    assert data_store.reload_snapshot() is True
+    assert len(data_store.get_snapshot().df) == 100
+    assert data_store.get_snapshot() is not snapshot
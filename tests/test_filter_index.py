@@ -0,0 +1,43 @@
+# tests/test_filter_index.py
+import numpy as np
+
+from filter_index import FilterIndex
+
+
+def _pandas_mask(df, districts, decorations, area_range, price_range):
+    return (df['district'].isin(districts) & df['decoration'].isin(decorations)
+            & df['area'].between(*area_range) & df['price_per_sqm'].between(*price_range)).to_numpy()
+
+
+def test_mask_matches_pandas(cleaned_df):
+    index = FilterIndex(cleaned_df)
+    districts = cleaned_df['district'].unique()
+    decorations = cleaned_df['decoration'].unique()
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        selection = (list(rng.choice(districts, rng.integers(0, len(districts) + 1), replace=False)),
+                     list(rng.choice(decorations, rng.integers(0, len(decorations) + 1), replace=False)),
+                     sorted(rng.uniform(40, 210, 2)),
+                     sorted(rng.uniform(3000, 35000, 2)))
+        expected = _pandas_mask(cleaned_df, *selection)
+        np.testing.assert_array_equal(index.mask(*selection), expected)
+        np.testing.assert_array_equal(index.positions(*selection), np.flatnonzero(expected))
+
+
+def test_range_bounds_are_inclusive(cleaned_df):
+    index = FilterIndex(cleaned_df)
+    area = float(cleaned_df['area'].iloc[0])
+    price = float(cleaned_df['price_per_sqm'].iloc[0])
+    selection = (list(cleaned_df['district'].unique()), list(cleaned_df['decoration'].unique()),
+                 [area, area], [price, price])
+    assert index.mask(*selection)[0]
+    np.testing.assert_array_equal(index.mask(*selection), _pandas_mask(cleaned_df, *selection))
+
+
+def test_unknown_or_empty_categories_select_nothing(cleaned_df):
+    index = FilterIndex(cleaned_df)
+    decorations = list(cleaned_df['decoration'].unique())
+    full = ([0, 1e9], [0, 1e9])
+    assert not index.mask(['不存在的区域'], decorations, *full).any()
+    assert not index.mask([], decorations, *full).any()
+    assert index.mask(list(cleaned_df['district'].unique()), decorations, *full).all()
@@ -0,0 +1,41 @@
+# tests/test_incremental_cleaning.py
+import pandas as pd
+
+from data_cleaning_analysis import compute_cleaning_stats
+from incremental_cleaning import incremental_clean, load_state, stats_drift, stats_from_sketches
+
+
+def _run(raw_df, tmp_path, **kwargs):
+    raw_path = str(tmp_path / 'raw.csv')
+    raw_df.to_csv(raw_path, index=False)
+    return incremental_clean(raw_path, str(tmp_path / 'cleaned.parquet'), str(tmp_path / 'state'), **kwargs)
+
+
+def _sketch_drift(tmp_path):
+    # 保存的草图与当前原始数据全量计算的统计量之差
+    current = pd.read_csv(tmp_path / 'raw.csv')
+    sketches = load_state(str(tmp_path / 'state'))['sketches']
+    return stats_drift(compute_cleaning_stats(current), stats_from_sketches(sketches))
+
+
+def test_sketches_follow_changed_and_removed_listings(raw_df, tmp_path):
+    _run(raw_df, tmp_path)
+
+    updated = raw_df.iloc[50:].copy()
+    changed = updated.index[:100]
+    updated.loc[changed, 'price_per_sqm'] *= 1.5
+    updated.loc[changed, 'subway_distance'] += 2000
+    # 容差设为无穷大，保证走增量路径而不是重新全量清洗
+    cleaned = _run(updated, tmp_path, drift_tolerance=float('inf'))
+
+    assert _sketch_drift(tmp_path) < 1e-9
+    assert set(cleaned['title']) <= set(updated['title'])
+    assert cleaned['title'].is_unique
+
+
+def test_sketches_follow_appended_listings(raw_df, tmp_path):
+    _run(raw_df.iloc[:400], tmp_path)
+    cleaned = _run(raw_df, tmp_path, drift_tolerance=float('inf'))
+
+    assert _sketch_drift(tmp_path) < 1e-9
+    assert len(cleaned) <= len(raw_df)
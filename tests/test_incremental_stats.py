@@ -0,0 +1,62 @@
+# tests/test_incremental_stats.py
+import numpy as np
+import pandas as pd
+
+from data_cleaning_analysis import CORRELATION_FEATURES
+from incremental_stats import IncrementalStats, Moments
+
+
+def _assert_matches(stats, df):
+    # 样本数不超过草图的质心数，中位数和分位数也是精确值
+    expected = df.groupby('district', observed=True)['price_per_sqm'].agg(['mean', 'median', 'count', 'std']).round(2)
+    expected.columns = ['平均单价', '单价中位数', '房源数量', '单价标准差']
+    district_stats = stats.district_stats()
+    pd.testing.assert_index_equal(district_stats.index.astype(str), expected.index.astype(str))
+    np.testing.assert_allclose(district_stats.to_numpy(dtype=float), expected.to_numpy(dtype=float), atol=0.011)
+
+    np.testing.assert_allclose(stats.price_description().to_numpy(), df['price_per_sqm'].describe().to_numpy())
+    np.testing.assert_allclose(stats.correlation_matrix().to_numpy(), df[CORRELATION_FEATURES].corr().to_numpy(),
+                               atol=1e-9)
+
+
+def test_moments_merge_and_remove():
+    values = np.random.default_rng(0).normal(100, 15, 1000)
+    moments = Moments.of(values[:300]).merge(Moments.of(values[300:]))
+    assert moments.count == 1000
+    np.testing.assert_allclose([moments.mean, moments.std], [values.mean(), values.std(ddof=1)])
+    moments.merge(Moments.of(values[:300]), sign=-1)
+    np.testing.assert_allclose([moments.mean, moments.std], [values[300:].mean(), values[300:].std(ddof=1)])
+
+
+def test_add_in_batches_matches_full_scan(cleaned_df):
+    stats = IncrementalStats()
+    for start in range(0, len(cleaned_df), 150):
+        stats.add(cleaned_df.iloc[start:start + 150])
+    _assert_matches(stats, cleaned_df)
+
+
+def test_remove_and_rebuild_matches_remaining_rows(cleaned_df):
+    stats = IncrementalStats().add(cleaned_df)
+    # 删除一整个区域和其他区域中的部分房源
+    district = cleaned_df['district'].iloc[0]
+    removed = (cleaned_df['district'] == district) | (cleaned_df.index % 7 == 0)
+    remaining = cleaned_df[~removed]
+    stats.remove(cleaned_df[removed])
+    assert None in stats.stale_sketches and district in stats.stale_sketches
+    stats.rebuild_sketches(remaining)
+
+    assert district not in stats.district_stats().index
+    _assert_matches(stats, remaining)
+
+
+def test_save_and_load(cleaned_df, tmp_path):
+    path = str(tmp_path / 'stats' / 'analysis_stats.json')
+    stats = IncrementalStats().add(cleaned_df)
+    stats.remove(cleaned_df.iloc[:20])
+    stats.save(path)
+
+    loaded = IncrementalStats.load(path)
+    assert loaded.stale_sketches == stats.stale_sketches
+    loaded.rebuild_sketches(cleaned_df.iloc[20:])
+    _assert_matches(loaded, cleaned_df.iloc[20:])
+    assert IncrementalStats.load(str(tmp_path / 'missing.json')) is None
@@ -0,0 +1,93 @@
+# tests/test_intent_matcher.py
+import pytest
+
+from intent_matcher import AhoCorasick, IntentMatcher
+
+DISTRICTS = ['武侯区', '高新区', '锦江区']
+DECORATIONS = ['精装', '简装', '毛坯']
+
+
+@pytest.fixture(scope='module')
+def matcher():
+    return IntentMatcher(DISTRICTS, DECORATIONS)
+
+
+def test_aho_corasick_finds_overlapping_patterns():
+    automaton = AhoCorasick([('he', 1), ('she', 2), ('hers', 3)])
+    assert sorted(automaton.find_all('ushers')) == [(1, 4, 2), (2, 4, 1), (2, 6, 3)]
+
+
+@pytest.mark.parametrize('text, intent', [
+    ('哪个区域房价最贵？', 'expensive'),
+    ('不贵的房子有哪些', 'cheap'),
+    ('装修情况对价格影响大吗？', 'decoration'),
+    ('推荐性价比高的房源', 'cheap'),
+    ('最近的走势怎么样', 'trend'),
+    ('Which area is the most EXPENSIVE?', 'expensive'),
+    ('你好', None),
+])
+def test_intent(matcher, text, intent):
+    assert matcher.parse(text).intent == intent
+
+
+@pytest.mark.parametrize('text, area_range, price_range', [
+    ('100平以下', (None, 100.0), (None, None)),
+    ('面积大于80', (80.0, None), (None, None)),
+    ('80到120平米', (80.0, 120.0), (None, None)),
+    ('单价1.5万到2万', (None, None), (15000.0, 20000.0)),
+    ('不超过2万元/平', (None, None), (None, 20000.0)),
+    ('100平左右', (90.0, 110.0), (None, None)),
+    ('3室的房子', (None, None), (None, None)),
+])
+def test_numeric_constraints(matcher, text, area_range, price_range):
+    query = matcher.parse(text)
+    assert query.area_range == pytest.approx(area_range)
+    assert query.price_range == pytest.approx(price_range)
+
+
+def test_districts_and_decorations(matcher):
+    query = matcher.parse('武侯和高新区精装 100平以下 推荐')
+    assert query.intent == 'recommend'
+    assert query.districts == ['武侯区', '高新区']
+    assert query.decorations == ['精装']
+    assert query.describe() == '武侯区、高新区、精装、面积100平米以下'
+
+
+def test_decoration_question_keeps_all_decorations():
+    matcher = IntentMatcher(DISTRICTS, ['精装修', '简装修', '毛坯'])
+    query = matcher.parse('精装修对房价的影响')
+    assert query.intent == 'decoration'
+    assert query.decorations == []
+
+
+def test_apply_intersects_with_page_filters(matcher):
+    query = matcher.parse('锦江区 100平以下')
+    districts, decorations, area_range, price_range = query.apply(DISTRICTS, DECORATIONS, [50, 200], [5000, 30000])
+    assert districts == ['锦江区'] and decorations == DECORATIONS
+    assert area_range == [50, 100.0] and price_range == [5000, 30000]
+    assert query.conflicts([50, 200], [5000, 30000]) == []
+
+
+def test_conflicting_ranges_are_reported(matcher):
+    query = matcher.parse('单价2万以上')
+    assert query.conflicts([50, 200], [5000, 15000]) == [('单价20,000元/平米以上', '单价5,000-15,000元/平米')]
+
+
+@pytest.mark.parametrize('text, total_range, price_range', [
+    ('总价80万到120万的房子推荐', (800000.0, 1200000.0), (None, None)),
+    ('预算100万以内', (None, 1000000.0), (None, None)),
+    ('总价150万元以下', (None, 1500000.0), (None, None)),
+    ('总价100万，单价2万以下', (None, None), (None, 20000.0)),
+    ('单价1.5万到2万', (None, None), (15000.0, 20000.0)),
+])
+def test_total_price_is_not_a_unit_price(matcher, text, total_range, price_range):
+    query = matcher.parse(text)
+    assert query.total_range == pytest.approx(total_range)
+    assert query.price_range == pytest.approx(price_range)
+
+
+def test_labels_avoid_scientific_notation(matcher):
+    query = matcher.parse('总价80万到120万 单价1.2万到1.5万 100平左右')
+    assert query.describe() == '面积90-110平米、单价12,000-15,000元/平米'
+    assert query.describe_total() == '总价80-120万元'
+    assert 'e+' not in query.describe() + query.describe_total()
@@ -0,0 +1,38 @@
+# tests/test_parallel_cleaning.py
+import os
+
+import numpy as np
+import pytest
+
+from data_cleaning_analysis import clean_frame, compute_cleaning_stats
+from parallel_cleaning import clean_partitions, load_partitions
+
+
+def test_partitions_match_single_file_cleaning(raw_df, tmp_path):
+    # 按区域拆分为多个分片
+    paths = []
+    for index, (_, shard) in enumerate(raw_df.groupby('district')):
+        path = str(tmp_path / f'shard{index}.csv')
+        shard.to_csv(path, index=False)
+        paths.append(path)
+    output_dir = str(tmp_path / 'out')
+
+    stats = clean_partitions(paths, output_dir, workers=2)
+    # 每个分区旁边都有元数据文件，读取时需要跳过
+    assert any(name.endswith('.meta.json') for name in os.listdir(output_dir))
+    loaded = load_partitions(output_dir)
+
+    expected_stats = compute_cleaning_stats(raw_df)
+    assert stats['price_bounds'] == pytest.approx(expected_stats['price_bounds'])
+    expected = clean_frame(raw_df, expected_stats).sort_values('title').reset_index(drop=True)
+    loaded = loaded.sort_values('title').reset_index(drop=True)
+    assert len(loaded) == len(expected)
+    np.testing.assert_array_equal(loaded['title'], expected['title'])
+    np.testing.assert_allclose(loaded['year_built'], expected['year_built'])
+    np.testing.assert_allclose(loaded['subway_distance'], expected['subway_distance'])
+    np.testing.assert_array_equal(loaded['district'].astype(str), expected['district'].astype(str))
+
+
+def test_load_partitions_without_files(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_partitions(str(tmp_path))
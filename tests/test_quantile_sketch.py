@@ -0,0 +1,51 @@
+# tests/test_quantile_sketch.py
+import numpy as np
+import pytest
+
+from quantile_sketch import QuantileSketch
+
+QUANTILES = [0, 0.1, 0.25, 0.5, 0.75, 0.9, 1]
+
+
+def test_exact_below_capacity():
+    values = np.random.default_rng(0).normal(18000, 5000, 800)
+    sketch = QuantileSketch(max_centroids=1000).update(values)
+    np.testing.assert_allclose(sketch.quantile(QUANTILES), np.quantile(values, QUANTILES))
+    assert sketch.count == len(values)
+
+
+def test_merge_of_chunks_matches_single_sketch():
+    values = np.random.default_rng(1).lognormal(10, 0.4, 900)
+    merged = QuantileSketch(max_centroids=1000)
+    for chunk in np.array_split(values, 7):
+        merged.merge(QuantileSketch(max_centroids=1000).update(chunk))
+    np.testing.assert_allclose(merged.quantile(QUANTILES), np.quantile(values, QUANTILES))
+    assert (merged.min, merged.max) == (values.min(), values.max())
+
+
+def test_compressed_rank_error_is_bounded():
+    values = np.random.default_rng(2).normal(18000, 5000, 200000)
+    merged = QuantileSketch(max_centroids=200)
+    for chunk in np.array_split(values, 20):
+        merged.merge(QuantileSketch(max_centroids=200).update(chunk))
+    assert len(merged.means) <= 200
+    assert merged.count == len(values)
+    sorted_values = np.sort(values)
+    for q in QUANTILES[1:-1]:
+        rank = np.searchsorted(sorted_values, merged.quantile(q)) / len(values)
+        assert rank == pytest.approx(q, abs=2 / 200)
+    assert merged.quantile(0) == values.min() and merged.quantile(1) == values.max()
+
+
+def test_missing_values_and_empty_sketch():
+    sketch = QuantileSketch()
+    assert np.isnan(sketch.median())
+    sketch.update([1.0, np.nan, 3.0])
+    assert sketch.count == 2
+    assert sketch.median() == 2.0
+
+
+def test_dict_round_trip():
+    sketch = QuantileSketch(max_centroids=50).update(np.random.default_rng(3).uniform(0, 100, 500))
+    restored = QuantileSketch.from_dict(sketch.to_dict())
+    np.testing.assert_allclose(restored.quantile(QUANTILES), sketch.quantile(QUANTILES))
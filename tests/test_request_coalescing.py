@@ -0,0 +1,92 @@
+# tests/test_request_coalescing.py
+import threading
+import time
+
+import pytest
+from dash.exceptions import PreventUpdate
+
+from request_coalescing import RequestCoalescer, Superseded
+
+
+def _in_thread(coalescer, session_id, results, name, hold=0.0, started=None):
+    def run():
+        try:
+            with coalescer.slot(session_id, 'figures'):
+                if started is not None:
+                    started.set()
+                time.sleep(hold)
+            results.append(name)
+        except Superseded:
+            results.append(('superseded', name))
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_lone_request_is_not_debounced():
+    coalescer = RequestCoalescer(debounce=0.5)
+    start = time.perf_counter()
+    with coalescer.slot('s', 'figures') as token:
+        assert token is not None
+    assert time.perf_counter() - start < 0.25
+
+
+def test_check_raises_once_a_newer_request_arrives():
+    coalescer = RequestCoalescer(debounce=0)
+    token = coalescer.begin('s', 'figures')
+    coalescer.check('s', 'figures', token)
+    coalescer.begin('s', 'figures')
+    with pytest.raises(Superseded):
+        coalescer.check('s', 'figures', token)
+    # 其他会话和其他类别的计算互不影响
+    coalescer.check('other', 'figures', coalescer.begin('other', 'figures'))
+    assert coalescer.superseded == 1
+    assert issubclass(Superseded, PreventUpdate)
+
+
+def test_burst_keeps_only_latest_request():
+    coalescer = RequestCoalescer(debounce=0.1)
+    results, started = [], threading.Event()
+    first = _in_thread(coalescer, 's', results, 'first', hold=0.3, started=started)
+    started.wait(1)
+    # 上一个请求仍在执行，后续请求先防抖，期间被更新的请求取代
+    second = _in_thread(coalescer, 's', results, 'second')
+    time.sleep(0.02)
+    third = _in_thread(coalescer, 's', results, 'third')
+    for thread in (first, second, third):
+        thread.join(2)
+    assert ('superseded', 'second') in results
+    assert 'third' in results and 'first' in results
+
+
+def test_queued_request_is_dropped_when_superseded():
+    coalescer = RequestCoalescer(debounce=0, max_concurrent=1)
+    results, started = [], threading.Event()
+    busy = _in_thread(coalescer, 'a', results, 'busy', hold=0.3, started=started)
+    started.wait(1)
+    # 执行名额被占用时排队，排队期间同一会话的新请求到达
+    queued = _in_thread(coalescer, 'b', results, 'queued')
+    time.sleep(0.05)
+    coalescer.begin('b', 'figures')
+    for thread in (busy, queued):
+        thread.join(2)
+    assert set(results) == {'busy', ('superseded', 'queued')}
+
+
+def test_requests_without_session_are_not_coalesced():
+    coalescer = RequestCoalescer(debounce=0.5)
+    with coalescer.slot(None, 'figures') as token:
+        assert token is None
+    coalescer.check(None, 'figures', None)
+
+
+def test_request_registered_before_cache_lookup_supersedes_running_miss():
+    coalescer = RequestCoalescer(debounce=0)
+    miss = coalescer.begin('s', 'figures')
+    with coalescer.slot('s', 'figures', miss) as token:
+        assert token == miss
+        # 计算期间同一会话的新请求命中缓存：只登记，不进入 slot
+        coalescer.begin('s', 'figures')
+    with pytest.raises(Superseded):
+        coalescer.check('s', 'figures', miss)
@@ -0,0 +1,51 @@
+# tests/test_table_paging.py
+import pytest
+
+from table_paging import apply_filter_query, query_table_page, split_filter_part
+
+
+@pytest.mark.parametrize('filter_part, expected', [
+    ('{area} >= 100', ('area', 'ge', 100.0)),
+    ('{area} ge 100', ('area', 'ge', 100.0)),
+    ('{price_per_sqm} < 15000', ('price_per_sqm', 'lt', 15000.0)),
+    ('{district} = "武侯区"', ('district', 'eq', '武侯区')),
+    ("{layout} contains '3室'", ('layout', 'contains', '3室')),
+    ('{decoration} != 精装', ('decoration', 'ne', '精装')),
+])
+def test_split_filter_part(filter_part, expected):
+    assert tuple(split_filter_part(filter_part)) == expected
+
+
+def test_numeric_and_category_filters_match_pandas(cleaned_df):
+    district = cleaned_df['district'].iloc[0]
+    result = apply_filter_query(cleaned_df, f'{{area}} >= 100 && {{district}} = "{district}" && {{price_per_sqm}} lt 20000')
+    expected = cleaned_df[(cleaned_df['area'] >= 100) & (cleaned_df['district'] == district)
+                          & (cleaned_df['price_per_sqm'] < 20000)]
+    assert result.index.equals(expected.index)
+
+
+def test_contains_filter(cleaned_df):
+    result = apply_filter_query(cleaned_df, '{layout} contains 3室')
+    assert result.index.equals(cleaned_df[cleaned_df['layout'].astype(str).str.contains('3室')].index)
+
+
+def test_unparsable_filters_are_ignored(cleaned_df):
+    assert apply_filter_query(cleaned_df, '') is cleaned_df
+    # 未知列、数值列上的字符串比较都不做筛选
+    assert len(apply_filter_query(cleaned_df, '{no_such_column} > 1 && {area} > abc')) == len(cleaned_df)
+
+
+def test_query_table_page_sorts_before_paging(cleaned_df):
+    sort_by = [{'column_id': 'price_per_sqm', 'direction': 'desc'}]
+    records, page_count, page = query_table_page(cleaned_df, 2, 25, sort_by, '{area} > 80',
+                                                 columns=['title', 'price_per_sqm'])
+
+    expected = cleaned_df[cleaned_df['area'] > 80].sort_values('price_per_sqm', ascending=False, kind='mergesort')
+    assert page_count == -(-len(expected) // 25) and page == 2
+    assert records == expected[['title', 'price_per_sqm']].iloc[50:75].to_dict('records')
+
+
+def test_query_table_page_clamps_page_number(cleaned_df):
+    records, page_count, page = query_table_page(cleaned_df, 10 ** 6, 100)
+    assert page == page_count - 1
+    assert records == cleaned_df.iloc[(page_count - 1) * 100:].to_dict('records')
@@ -1,4 +1,9 @@
 # visualization.py
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
@@ -6,6 +11,8 @@ import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import plotly.figure_factory as ff
+from data_io import load_cleaned_data
+from scatter_render import build_bubble_chart
 
 # 设置中文字体和样式
 plt.rcParams['font.sans-serif'] = ['SimHei', 'DejaVu Sans']  # 用来正常显示中文标签
@@ -13,57 +20,136 @@ plt.rcParams['axes.unicode_minus'] = False  # 用来正常显示负号
 sns.set_style("whitegrid")
 
 
-def create_static_plots(df):
-    """
-    创建静态图表 (Matplotlib/Seaborn)
-    """
-    print("生成静态图表...")
+# 静态图表渲染清单：记录每张图的数据指纹和参数，未变化时跳过重新渲染
+STATIC_RENDER_MANIFEST = '.static_render_manifest.json'
+DEFAULT_STATIC_FORMATS = ('png',)
+
 
+def plot_district_boxplot(df):
     # 1. 各区域房价分布箱线图
-    plt.figure(figsize=(12, 8))
+    fig = plt.figure(figsize=(12, 8))
     # 按平均单价排序区域
-    order = df.groupby('district')['price_per_sqm'].median().sort_values(ascending=False).index
+    order = df.groupby('district', observed=True)['price_per_sqm'].median().sort_values(ascending=False).index
     sns.boxplot(data=df, x='district', y='price_per_sqm', order=order)
     plt.title('成都市各区域二手房单价分布')
     plt.xlabel('区域')
     plt.ylabel('单价 (元/平米)')
     plt.xticks(rotation=45)
     plt.tight_layout()
-    plt.savefig('plots/district_price_boxplot.png', dpi=300)
-    plt.close()
+    return fig
+
 
+def plot_area_price_scatter(df):
     # 2. 房价与面积的关系散点图
-    plt.figure(figsize=(10, 6))
+    fig = plt.figure(figsize=(10, 6))
     sns.scatterplot(data=df, x='area', y='price_per_sqm', hue='district', alpha=0.6, palette='viridis')
     plt.title('二手房面积与单价关系')
     plt.xlabel('面积 (平米)')
     plt.ylabel('单价 (元/平米)')
     plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left')
     plt.tight_layout()
-    plt.savefig('plots/area_vs_price_scatter.png', dpi=300)
-    plt.close()
+    return fig
 
+
+def plot_age_price_regplot(df):
     # 3. 房龄与单价的关系
-    plt.figure(figsize=(10, 6))
+    fig = plt.figure(figsize=(10, 6))
     sns.regplot(data=df, x='house_age', y='price_per_sqm', scatter_kws={'alpha': 0.3}, line_kws={"color": "red"})
     plt.title('房龄对单价的影响')
     plt.xlabel('房龄 (年)')
     plt.ylabel('单价 (元/平米)')
     plt.tight_layout()
-    plt.savefig('plots/age_vs_price_regplot.png', dpi=300)
-    plt.close()
+    return fig
+
 
+def plot_correlation_heatmap(df):
     # 4. 相关性热力图
     numeric_features = ['price_per_sqm', 'area', 'house_age', 'subway_distance', 'rooms', 'floor_ratio']
-    plt.figure(figsize=(10, 8))
+    fig = plt.figure(figsize=(10, 8))
     corr = df[numeric_features].corr()
     sns.heatmap(corr, annot=True, cmap='coolwarm', center=0, square=True)
     plt.title('特征相关性热力图')
     plt.tight_layout()
-    plt.savefig('plots/correlation_heatmap.png', dpi=300)
-    plt.close()
+    return fig
+
 
-    print("静态图表已保存至 'plots/' 目录")
+# 图表名称 -> (绘图函数, 用到的列)
+STATIC_PLOTS = {
+    'district_price_boxplot': (plot_district_boxplot, ['district', 'price_per_sqm']),
+    'area_vs_price_scatter': (plot_area_price_scatter, ['area', 'price_per_sqm', 'district']),
+    'age_vs_price_regplot': (plot_age_price_regplot, ['house_age', 'price_per_sqm']),
+    'correlation_heatmap': (plot_correlation_heatmap,
+                            ['price_per_sqm', 'area', 'house_age', 'subway_distance', 'rooms', 'floor_ratio']),
+}
+
+
+def static_plot_fingerprint(name, data, dpi, formats):
+    """
+    图表输入数据和绘图参数的指纹
+    """
+    digest = hashlib.sha256()
+    digest.update(pd.util.hash_pandas_object(data, index=False).to_numpy().tobytes())
+    digest.update(json.dumps({'name': name, 'columns': list(data.columns), 'dpi': dpi,
+                              'formats': sorted(formats)}).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def render_static_plot(name, data, output_dir, dpi, formats):
+    """
+    在工作进程中渲染单张图表 (Matplotlib 不是线程安全的，每张图使用独立进程)
+    """
+    plt.switch_backend('Agg')
+    plot_func = STATIC_PLOTS[name][0]
+    fig = plot_func(data)
+    paths = []
+    for fmt in formats:
+        path = os.path.join(output_dir, f'{name}.{fmt}')
+        fig.savefig(path, dpi=dpi, format=fmt)
+        paths.append(path)
+    plt.close(fig)
+    return paths
+
+
+def _load_render_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def create_static_plots(df, dpi=300, formats=DEFAULT_STATIC_FORMATS, output_dir='plots', workers=None, force=False):
+    """
+    创建静态图表 (Matplotlib/Seaborn)
+    每张图在独立的工作进程中并行渲染；数据指纹和参数未变化且输出文件齐全的图表会被跳过
+    """
+    print("生成静态图表...")
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, STATIC_RENDER_MANIFEST)
+    manifest = _load_render_manifest(manifest_path)
+
+    jobs = {}
+    for name, (_, columns) in STATIC_PLOTS.items():
+        data = df[columns]
+        fingerprint = static_plot_fingerprint(name, data, dpi, formats)
+        outputs_exist = all(os.path.exists(os.path.join(output_dir, f'{name}.{fmt}')) for fmt in formats)
+        if not force and manifest.get(name) == fingerprint and outputs_exist:
+            print(f"  {name}: 数据和参数未变化，跳过")
+            continue
+        jobs[name] = (data, fingerprint)
+
+    if jobs:
+        with ProcessPoolExecutor(max_workers=workers or len(jobs)) as executor:
+            futures = {name: executor.submit(render_static_plot, name, data, output_dir, dpi, formats)
+                       for name, (data, _) in jobs.items()}
+            for name, future in futures.items():
+                future.result()
+                manifest[name] = jobs[name][1]
+                print(f"  {name}: 已渲染")
+
+        with open(manifest_path, 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+    print(f"静态图表已保存至 '{output_dir}/' 目录")
 
 
 def create_interactive_plots(df):
@@ -73,18 +159,14 @@ def create_interactive_plots(df):
     print("生成交互式图表...")
 
     # 1. 各区域平均单价柱状图
-    district_avg = df.groupby('district')['price_per_sqm'].mean().sort_values().reset_index()
+    district_avg = df.groupby('district', observed=True)['price_per_sqm'].mean().sort_values().reset_index()
     fig1 = px.bar(district_avg, x='price_per_sqm', y='district', orientation='h',
                   title='成都市各区域二手房平均单价',
                   labels={'price_per_sqm': '平均单价 (元/平米)', 'district': '区域'})
     fig1.write_html('plots/interactive_district_price.html')
 
-    # 2. 房价与面积、房龄的交互散点图
-    fig2 = px.scatter(df, x='area', y='price_per_sqm', color='district',
-                      size='house_age', hover_data=['layout', 'decoration'],
-                      title='面积、区域、房龄与单价的关系',
-                      labels={'area': '面积 (平米)', 'price_per_sqm': '单价 (元/平米)', 'district': '区域',
-                              'house_age': '房龄'})
+    # 2. 房价与面积、房龄的交互散点图 (点数多时自动切换为 WebGL 或密度热力图)
+    fig2 = build_bubble_chart(df)
     fig2.write_html('plots/interactive_bubble_chart.html')
 
     # 3. 房价分布直方图
@@ -103,12 +185,18 @@ def create_interactive_plots(df):
 
 
 if __name__ == "__main__":
-    # 确保有plots目录
-    import os
+    import argparse
+
+    parser = argparse.ArgumentParser(description="生成静态和交互式图表")
+    parser.add_argument('--dpi', type=int, default=300, help="静态图表分辨率")
+    parser.add_argument('--formats', default=','.join(DEFAULT_STATIC_FORMATS), help="静态图表格式，逗号分隔，如 png,svg")
+    parser.add_argument('--force', action='store_true', help="忽略渲染清单，重新渲染全部静态图表")
+    args = parser.parse_args()
 
+    # 确保有plots目录
     if not os.path.exists('plots'):
         os.makedirs('plots')
 
-    df = pd.read_csv('data/chengdu_housing_cleaned.csv')
-    create_static_plots(df)
+    df = load_cleaned_data()
+    create_static_plots(df, dpi=args.dpi, formats=tuple(args.formats.split(',')), force=args.force)
     create_interactive_plots(df)
\ No newline at end of file